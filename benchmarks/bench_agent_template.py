@@ -0,0 +1,78 @@
+"""
+Agent 构建开销基准测试
+
+对比每次请求的 Agent 构建成本：
+- 改造前：Agent(model=MODEL_ID, system_prompt=SYSTEM_PROMPT, tools=tools)
+- 改造后：get_agent_template(tools).bind(session_manager)
+
+不访问网络（BedrockModel 构建时不会发起请求）。
+
+Usage:
+    python benchmarks/bench_agent_template.py [--iterations 200]
+"""
+
+import argparse
+import logging
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from strands import Agent
+
+from src.agent.template import get_agent_template
+from src.config import MODEL_ID
+from src.tools.tavily_search import tavily_search
+from src.utils.prompts import SYSTEM_PROMPT
+
+
+def _measure(build, iterations: int) -> list:
+    """执行 build 多次，返回每次耗时（毫秒）"""
+    build()  # 预热
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        build()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def _report(name: str, samples: list) -> None:
+    samples = sorted(samples)
+    p50 = statistics.median(samples)
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    print(f"{name:28s} mean={statistics.mean(samples):8.3f}ms  p50={p50:8.3f}ms  p99={p99:8.3f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Agent 构建开销基准测试")
+    parser.add_argument("--iterations", type=int, default=200, help="每种方式的构建次数")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    tools = [tavily_search]
+
+    print("=" * 80)
+    print(f"Agent 构建开销 (iterations={args.iterations}, tools={len(tools)})")
+    print("=" * 80)
+
+    before = _measure(
+        lambda: Agent(model=MODEL_ID, system_prompt=SYSTEM_PROMPT, tools=tools, callback_handler=None),
+        args.iterations
+    )
+    _report("before: Agent(model=MODEL_ID)", before)
+
+    after = _measure(
+        lambda: get_agent_template(tools).bind(None, callback_handler=None),
+        args.iterations
+    )
+    _report("after: template.bind()", after)
+
+    print("-" * 80)
+    print(f"加速比: {statistics.mean(before) / statistics.mean(after):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
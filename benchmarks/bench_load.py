@@ -0,0 +1,166 @@
+"""
+端到端负载测试
+
+所有后端均使用本地替身，不需要 AWS、百度地图或 Tavily 凭证：
+- 百度地图 MCP SSE 服务、Tavily 搜索接口：StubBaiduMCPServer / StubTavilyServer（子进程）
+- 模型：ScriptedModel（按问题关键词调用工具，再流式输出回答）
+- AgentCore Memory：FakeMemorySessionManager（阻塞读写，带延迟）
+
+以给定并发回放 clients/boto3_client.py 中 all_scenarios 的多轮对话：每个场景是一个会话，
+会话内的问题按顺序提问，并发数即同时进行的会话数。直接调用 invoke，统计首 token 延迟
+（第一个文本增量）、单轮总耗时的 p50/p95/p99 和每秒完成的请求数。
+
+延迟参数均为 Latency 规格字符串（见 benchmarks/stubs.py）："50"、"20-80"、"lognormal:中位数:p99"。
+
+Usage:
+    python benchmarks/bench_load.py [--concurrency 16] [--repeat 1] [--scenarios 🚗智能导航,🚗停车场景]
+        [--model-first-token lognormal:400:1500] [--model-delta 15] [--answer-chars 200]
+        [--mcp-latency lognormal:80:300] [--tavily-latency lognormal:300:1200]
+        [--memory-read lognormal:30:120] [--memory-write lognormal:15:60] [--think-time-ms 0]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import logging
+import os
+import sys
+import time
+import uuid
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stubs import (
+    FakeMemorySessionManager,
+    FakeMemoryStore,
+    Latency,
+    ScriptedModel,
+    StubBaiduMCPServer,
+    StubTavilyServer
+)
+from clients.boto3_client import all_scenarios
+
+ACTOR_HEADER = "X-Amzn-Bedrock-AgentCore-Runtime-Custom-Actor-Id"
+
+
+def _percentile(samples, pct):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * pct))]
+
+
+def _summary(name, samples):
+    if not samples:
+        return f"{name:14s} n/a"
+    return (f"{name:14s} p50={_percentile(samples, 0.5):8.1f}ms  p95={_percentile(samples, 0.95):8.1f}ms  "
+            f"p99={_percentile(samples, 0.99):8.1f}ms  max={max(samples):8.1f}ms")
+
+
+def _configure_environment(mcp_server, tavily_server):
+    """把被测代码指向替身服务（需在导入 src 之前调用）"""
+    os.environ["BEDROCK_AGENTCORE_MEMORY_ID"] = "bench-memory"
+    os.environ["PREWARM_ON_STARTUP"] = "false"
+    os.environ["BAIDU_MAPS_API_KEY"] = "bench"
+    os.environ["BAIDU_MCP_SSE_URL"] = mcp_server.sse_url
+    os.environ["TAVILY_API_KEY"] = "bench"
+    os.environ["TAVILY_API_URL"] = tavily_server.url
+
+
+async def run_turn(invoke, prompt, context):
+    """执行一轮对话，返回 (首 token 毫秒, 总毫秒, 是否出错)"""
+    first_token, error = None, False
+    start = time.perf_counter()
+    async for event in invoke({"prompt": prompt}, context):
+        if "error" in event:
+            error = True
+        elif first_token is None and "text" in event.get("event", {}).get("contentBlockDelta", {}).get("delta", {}):
+            first_token = (time.perf_counter() - start) * 1000
+    return first_token, (time.perf_counter() - start) * 1000, error
+
+
+async def run_load(invoke, sessions, concurrency, think_time):
+    """以 concurrency 个并发会话回放 sessions，返回 (每轮结果列表, 耗时秒)"""
+    queue: asyncio.Queue = asyncio.Queue()
+    for session in sessions:
+        queue.put_nowait(session)
+    results = []
+
+    async def worker(worker_id):
+        while not queue.empty():
+            scenario, questions = queue.get_nowait()
+            context = SimpleNamespace(
+                session_id=f"bench-{uuid.uuid4().hex}",
+                headers={ACTOR_HEADER: f"bench-user-{worker_id}"}
+            )
+            for i, question in enumerate(questions):
+                if i:
+                    await think_time.sleep()
+                results.append((scenario, *await run_turn(invoke, question, context)))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    return results, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="端到端负载测试（本地替身后端）")
+    parser.add_argument("--concurrency", type=int, default=16, help="并发会话数")
+    parser.add_argument("--repeat", type=int, default=1, help="每个场景回放的次数")
+    parser.add_argument("--scenarios", default="", help="逗号分隔的场景名，默认全部场景")
+    parser.add_argument("--think-time-ms", default="0", help="同一会话两次提问之间的间隔")
+    parser.add_argument("--model-first-token", default="lognormal:400:1500", help="每次模型调用的首 token 延迟")
+    parser.add_argument("--model-delta", default="15", help="模型文本增量间隔")
+    parser.add_argument("--answer-chars", type=int, default=200, help="每个回答的字符数")
+    parser.add_argument("--mcp-latency", default="lognormal:80:300", help="百度地图 MCP 工具调用延迟")
+    parser.add_argument("--tavily-latency", default="lognormal:300:1200", help="Tavily 搜索延迟")
+    parser.add_argument("--memory-read", default="lognormal:30:120", help="Memory 读延迟")
+    parser.add_argument("--memory-write", default="lognormal:15:60", help="Memory 写延迟")
+    args = parser.parse_args()
+
+    names = [name for name in args.scenarios.split(",") if name] or list(all_scenarios)
+    sessions = [(name, all_scenarios[name]) for _ in range(args.repeat) for name in names]
+
+    logging.disable(logging.CRITICAL)
+
+    with StubBaiduMCPServer(latency=args.mcp_latency) as mcp_server, StubTavilyServer(latency=args.tavily_latency) as tavily_server:
+        _configure_environment(mcp_server, tavily_server)
+
+        from src.agent import main as agent_main
+        from src.agent import template as template_module
+        from src.utils.metrics import get_metrics_registry
+
+        # 替换模型和 Memory 会话管理器；工具目录和 MCP 会话池在计时前完成预热
+        model = ScriptedModel(args.model_first_token, args.model_delta, args.answer_chars)
+        tools = agent_main._load_tools(agent_main._get_tool_catalog())
+        template_module._template = template_module.AgentTemplate(tools, model=model)
+        store = FakeMemoryStore(read=args.memory_read, write=args.memory_write)
+        agent_main.session_cache._factory = lambda actor_id, session_id: FakeMemorySessionManager(session_id, store, actor_id)
+
+        # Agent 默认的回调会把流式文本打印到标准输出（计入耗时，但不显示）
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            results, elapsed = asyncio.run(run_load(agent_main.invoke, sessions, args.concurrency, Latency(args.think_time_ms)))
+
+        first_tokens = [first_token for _, first_token, _, error in results if first_token is not None and not error]
+        totals = [total for _, _, total, error in results if not error]
+        errors = sum(1 for *_, error in results if error)
+
+        print("=" * 100)
+        print(f"端到端负载 (sessions={len(sessions)}, turns={len(results)}, concurrency={args.concurrency}, "
+              f"model first token={args.model_first_token}, mcp={args.mcp_latency}, tavily={args.tavily_latency}, "
+              f"memory read/write={args.memory_read}/{args.memory_write})")
+        print("=" * 100)
+        print(f"throughput     {len(results) / elapsed:8.2f} req/s  ({len(results)} turns in {elapsed:.1f}s, errors={errors})")
+        print(_summary("first token", first_tokens))
+        print(_summary("total", totals))
+        print("-" * 100)
+        print(f"model calls={model.calls}  tool calls={model.tool_calls}")
+        print(f"baidu mcp stub={mcp_server.stats()['calls']}  tavily stub requests={tavily_server.stats()['requests']}")
+        print(f"memory reads={store.stats['reads']} writes={store.stats['writes']}")
+        stats = get_metrics_registry().snapshot()["stats"]
+        for component in ("baidu_tool_cache", "poi_index", "tavily_cache", "session_cache", "single_flight",
+                          "history_compaction", "session_summary", "tool_router", "model_tokens", "prefetch", "tool_executor"):
+            print(f"{component}: {stats.get(component)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+长期记忆检索意图路由基准测试
+
+在 benchmarks/memory_intent_labels.py 的标注集（all_scenarios 全部问题）上评估
+src/utils/intent.py 的分类器。输入与生产一致：按会话回放 all_scenarios，用 build_context_aware_prompt
+构建带对话历史的增强提示词，再由 current_question 取出当前问题（retrieve_customer_context 的做法）；
+另外给出直接对整个增强提示词分类时的准确率作为对照。评估内容：
+- 准确率：每个命名空间的精确率/召回率，以及命名空间集合完全一致的比例
+- 分类耗时：单次 classify 的平均耗时（微秒）
+- 节省：按 Latency 分布模拟每个命名空间的检索耗时（并发检索取最慢的一个），
+  对比始终检索 facts/preferences/locations 三个命名空间；以及少检索的记录数和注入 token 数
+
+注意：分类器的特征和权重是参照这份标注集调出来的，这里的准确率是集内结果，
+新增场景时应先补充标注再评估。
+
+Usage:
+    python benchmarks/bench_memory_intent.py [--latency lognormal:60:200] [--record-tokens 40] [--rounds 20] [--seed 0]
+"""
+
+import argparse
+import logging
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.memory_intent_labels import LABELS
+from benchmarks.stubs import Latency
+from clients.boto3_client import all_scenarios
+from src.utils.history import HistoryCompactor
+from src.utils.intent import NAMESPACES, MemoryIntentClassifier
+from src.utils.memory import build_context_aware_prompt, current_question
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+
+def production_inputs():
+    """按会话回放全部场景，返回 [(问题, 增强提示词)]（每轮的回答用固定文本代替）"""
+    compactor = HistoryCompactor()
+    inputs = []
+    for questions in all_scenarios.values():
+        history = []
+        for prompt in questions:
+            inputs.append((prompt, build_context_aware_prompt(prompt, history, compactor)))
+            history += [{"role": "user", "content": prompt}, {"role": "assistant", "content": "好的，已为您查询。"}]
+    return inputs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="长期记忆检索意图路由基准测试")
+    parser.add_argument("--latency", default="lognormal:60:200", help="单个命名空间的检索耗时分布（毫秒）")
+    parser.add_argument("--record-tokens", type=int, default=40, help="每条记忆注入提示词的平均 token 数")
+    parser.add_argument("--rounds", type=int, default=20, help="延迟模拟的轮数")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+
+    prompts = [prompt for questions in all_scenarios.values() for prompt in questions]
+    unlabelled = [prompt for prompt in prompts if prompt not in LABELS]
+    if unlabelled:
+        print(f"以下问题缺少标注: {unlabelled}")
+        sys.exit(1)
+
+    inputs = production_inputs()
+    classifier = MemoryIntentClassifier()
+    predictions = {prompt: set(classifier.classify(current_question(enhanced)).namespaces) for prompt, enhanced in inputs}
+    whole_prompt = MemoryIntentClassifier()
+    whole_exact = sum(1 for prompt, enhanced in inputs if set(whole_prompt.classify(enhanced).namespaces) == LABELS[prompt])
+
+    print("=" * 100)
+    print(f"记忆检索意图路由 (prompts={len(prompts)}, threshold={classifier.threshold}, latency={args.latency})")
+    print("=" * 100)
+    for namespace in NAMESPACES:
+        tp = sum(1 for p in prompts if namespace in predictions[p] and namespace in LABELS[p])
+        fp = sum(1 for p in prompts if namespace in predictions[p] and namespace not in LABELS[p])
+        fn = sum(1 for p in prompts if namespace not in predictions[p] and namespace in LABELS[p])
+        precision = tp / (tp + fp) if tp + fp else 1.0
+        recall = tp / (tp + fn) if tp + fn else 1.0
+        print(f"{namespace:12s} precision={precision:6.1%}  recall={recall:6.1%}  labelled={tp + fn}  selected={tp + fp}")
+    exact = sum(1 for p in prompts if predictions[p] == LABELS[p])
+    print(f"{'exact set':12s} accuracy={exact / len(prompts):6.1%}  ({exact}/{len(prompts)})")
+    print(f"{'(whole enhanced prompt)':12s} accuracy={whole_exact / len(inputs):6.1%}  ({whole_exact}/{len(inputs)})")
+    for prompt in prompts:
+        if predictions[prompt] != LABELS[prompt]:
+            print(f"  mismatch: {prompt}  label={sorted(LABELS[prompt])}  predicted={sorted(predictions[prompt])}")
+
+    timing = MemoryIntentClassifier()
+    start = time.perf_counter()
+    for _ in range(args.rounds):
+        for prompt in prompts:
+            timing.classify(prompt)
+    per_call_us = (time.perf_counter() - start) / (args.rounds * len(prompts)) * 1e6
+    print(f"{'classify':12s} {per_call_us:8.1f}µs/prompt")
+
+    rng = random.Random(args.seed)
+    latency = Latency(args.latency)
+    before, after = [], []
+    for _ in range(args.rounds):
+        for prompt in prompts:
+            samples = {namespace: latency.sample(rng) for namespace in NAMESPACES}
+            before.append(max(samples.values()))
+            after.append(max((samples[namespace] for namespace in predictions[prompt]), default=0.0) + per_call_us / 1000)
+    print("-" * 100)
+    for label, values in (("before: all namespaces", before), ("after: intent routing", after)):
+        print(f"{label:28s} retrieval mean={statistics.mean(values):7.1f}ms  "
+              f"p50={percentile(values, 0.5):7.1f}ms  p95={percentile(values, 0.95):7.1f}ms")
+
+    stats = classifier.stats()
+    requested, skipped = stats["records_requested"], stats["records_skipped"]
+    print(f"{'namespaces':28s} selected={stats['namespaces_selected']}  skipped={stats['namespaces_skipped']}  "
+          f"no retrieval={sum(1 for p in prompts if not predictions[p])}/{len(prompts)} prompts")
+    print(f"{'records (top_k)':28s} requested={requested}  skipped={skipped} ({skipped / (requested + skipped):.0%})  "
+          f"≈{skipped * args.record_tokens / len(prompts):.0f} injected tokens saved/prompt")
+
+
+if __name__ == "__main__":
+    main()
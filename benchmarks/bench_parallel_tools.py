@@ -0,0 +1,161 @@
+"""
+同一轮多个工具调用的并发执行基准测试
+
+启动百度地图 MCP 和 Tavily 替身服务，按 main 的方式加载工具。替身模型第一次调用在一轮输出中
+请求 N 个相互独立的工具调用（多个目的地的路线规划、沿途的地点检索、网络搜索，参数各不相同，
+不命中缓存），拿到全部工具结果后输出回答。对比 N = 2/4/8 时一次请求的端到端耗时：
+- sequential:  strands SequentialToolExecutor（逐个执行）
+- bounded:     src/agent/tool_executor.py 的 BoundedToolExecutor（每个后端的并发上限为 TOOL_PARALLELISM）
+- unbounded:   strands ConcurrentToolExecutor（不限制并发）
+并检查返回给模型的工具结果顺序是否与模型请求的顺序一致。
+
+Usage:
+    python benchmarks/bench_parallel_tools.py [--counts 2,4,8] [--mcp-latency 200] [--tavily-latency 200] [--rounds 3]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from strands.models.model import Model
+
+from benchmarks.stubs import Latency, StubBaiduMCPServer, StubTavilyServer
+from clients.boto3_client import enroute_service_scenario, multi_destination_scenario
+
+DESTINATIONS = ["北京朝阳区人寿保险大厦", "北京首都国际机场", "北京朝阳区国贸商城", "北京海淀区颐和园", "北京东城区王府井"]
+PLACES = ["餐厅", "加油站", "停车场", "充电桩", "便利店"]
+
+
+def fan_out_calls(count: int, tag: str):
+    """N 个相互独立的工具调用：路线规划、地点检索、网络搜索轮流出现"""
+    builders = [
+        lambda i: ("map_directions", {"origin": "北京海淀区上地十街10号", "destination": f"{DESTINATIONS[i % 5]}{tag}-{i}"}),
+        lambda i: ("map_search_places", {"query": f"{PLACES[i % 5]}{tag}-{i}", "location": "39.915,116.404", "radius": 1000 + i}),
+        lambda i: ("tavily_search", {"query": f"{multi_destination_scenario[0]} {enroute_service_scenario[1]} {tag}-{i}"}),
+    ]
+    return [builders[i % 3](i) for i in range(count)]
+
+
+class FanOutModel(Model):
+    """第一次调用在一轮输出中请求 calls 中的全部工具调用，之后输出回答
+
+    记录每次收到的工具结果的 toolUseId 顺序。
+    """
+
+    def __init__(self, first_token: str = "100"):
+        self.first_token = Latency(first_token)
+        self.calls = []
+        self.result_orders = []
+
+    def update_config(self, **model_config):
+        pass
+
+    def get_config(self):
+        return {}
+
+    async def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        yield {}
+
+    async def stream(self, messages, tool_specs=None, system_prompt=None, **kwargs):
+        await self.first_token.sleep()
+        last = messages[-1]["content"]
+        yield {"messageStart": {"role": "assistant"}}
+        if any("toolResult" in block for block in last):
+            self.result_orders.append([block["toolResult"]["toolUseId"] for block in last if "toolResult" in block])
+            yield {"contentBlockStart": {"start": {}}}
+            yield {"contentBlockDelta": {"delta": {"text": "已为您规划好全部路线和沿途地点。"}}}
+            yield {"contentBlockStop": {}}
+            yield {"messageStop": {"stopReason": "end_turn"}}
+        else:
+            for index, (name, arguments) in enumerate(self.calls):
+                yield {"contentBlockStart": {"start": {"toolUse": {"toolUseId": f"tooluse_{index}", "name": name}}, "contentBlockIndex": index}}
+                yield {"contentBlockDelta": {"delta": {"toolUse": {"input": json.dumps(arguments, ensure_ascii=False)}}, "contentBlockIndex": index}}
+                yield {"contentBlockStop": {"contentBlockIndex": index}}
+            yield {"messageStop": {"stopReason": "tool_use"}}
+        yield {"metadata": {"usage": {"inputTokens": 1, "outputTokens": 1, "totalTokens": 2}, "metrics": {"latencyMs": 1}}}
+
+
+async def run_request(template, executor) -> float:
+    agent = template.bind(None, callback_handler=None, tool_executor=executor)
+    start = time.perf_counter()
+    async for _ in agent.stream_async(multi_destination_scenario[1]):
+        pass
+    return (time.perf_counter() - start) * 1000
+
+
+async def run_all(template, model, executors, counts, rounds):
+    """在同一个事件循环中运行全部请求（与 AgentCore Runtime 一致，Tavily 连接池按事件循环创建）
+
+    Returns:
+        [(N, [各执行器的平均耗时], 工具结果顺序是否一致)]
+    """
+    model.calls = fan_out_calls(3, "warmup")
+    await run_request(template, executors[-1][1])
+
+    rows = []
+    for count in counts:
+        row, ordered = [], True
+        for label, executor in executors:
+            latencies = []
+            for round_index in range(rounds):
+                model.calls = fan_out_calls(count, f"{label}{count}-{round_index}")
+                model.result_orders = []
+                latencies.append(await run_request(template, executor))
+                ordered &= model.result_orders == [[f"tooluse_{index}" for index in range(count)]]
+            row.append(sum(latencies) / len(latencies))
+        rows.append((count, row, ordered))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="同一轮多个工具调用的并发执行基准测试")
+    parser.add_argument("--counts", default="2,4,8", help="逗号分隔的每轮工具调用数")
+    parser.add_argument("--mcp-latency", default="200", help="百度地图替身服务的工具调用延迟（毫秒）")
+    parser.add_argument("--tavily-latency", default="200", help="Tavily 替身服务的搜索延迟（毫秒）")
+    parser.add_argument("--first-token", default="100", help="替身模型每次调用的首 token 延迟（毫秒）")
+    parser.add_argument("--rounds", type=int, default=3, help="每种组合的请求次数")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    counts = [int(count) for count in args.counts.split(",") if count]
+
+    with StubBaiduMCPServer(latency=args.mcp_latency) as mcp_server, StubTavilyServer(latency=args.tavily_latency) as tavily_server:
+        os.environ["BAIDU_MAPS_API_KEY"] = "bench"
+        os.environ["BAIDU_MCP_SSE_URL"] = mcp_server.sse_url
+        os.environ["TAVILY_API_KEY"] = "bench"
+        os.environ["TAVILY_API_URL"] = tavily_server.url
+        os.environ["PREWARM_ON_STARTUP"] = "false"
+
+        from strands.tools.executors import ConcurrentToolExecutor, SequentialToolExecutor
+
+        from src.agent import main as agent_main
+        from src.agent.template import AgentTemplate
+        from src.agent.tool_executor import BoundedToolExecutor
+        from src.config import TOOL_PARALLELISM
+
+        model = FanOutModel(args.first_token)
+        template = AgentTemplate(agent_main._load_tools(agent_main._get_tool_catalog()), model=model)
+        executors = (
+            ("sequential", SequentialToolExecutor()),
+            ("bounded", BoundedToolExecutor()),
+            ("unbounded", ConcurrentToolExecutor()),
+        )
+
+        print("=" * 100)
+        print(f"同一轮多个工具调用 (mcp latency={args.mcp_latency}ms, tavily latency={args.tavily_latency}ms, "
+              f"first token={args.first_token}ms, limits={TOOL_PARALLELISM}, rounds={args.rounds})")
+        print("=" * 100)
+        print(f"{'calls':>5s}  " + "  ".join(f"{label:>12s}" for label, _ in executors) + "  result order")
+        for count, row, ordered in asyncio.run(run_all(template, model, executors, counts, args.rounds)):
+            print(f"{count:5d}  " + "  ".join(f"{ms:10.0f}ms" for ms in row) + f"  {'ok' if ordered else 'MISMATCH'}")
+        print(f"upstream calls: baidu mcp={mcp_server.stats()['calls']}  tavily={tavily_server.stats()['requests']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+附近 POI 空间索引基准测试
+
+在北京六环范围内随机写入 N 个 POI（默认 100 万），测量：
+- 写入吞吐和内存占用
+- 不同半径、有无类别过滤时，取最近 20 个 POI 的查询延迟（p50 / p99）
+- 与逐点扫描的对比（只在少量查询上执行）
+
+Usage:
+    python benchmarks/bench_poi_index.py [--points 1000000] [--queries 2000]
+"""
+
+import argparse
+import os
+import random
+import resource
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.spatial_index import SpatialIndex, distance_m
+
+# 北京六环外接矩形（约 60km × 70km）
+LAT_RANGE = (39.70, 40.25)
+LNG_RANGE = (116.05, 116.75)
+CATEGORIES = ["加油站", "停车场", "充电站", "餐厅", "酒店", "医院", "超市", "咖啡"]
+
+
+def _percentile(samples, pct):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * pct))]
+
+
+def _max_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _random_point(rng):
+    return rng.uniform(*LAT_RANGE), rng.uniform(*LNG_RANGE)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="附近 POI 空间索引基准测试")
+    parser.add_argument("--points", type=int, default=1_000_000, help="写入的 POI 数")
+    parser.add_argument("--queries", type=int, default=2000, help="每种查询的次数")
+    parser.add_argument("--cell-degrees", type=float, default=0.01, help="网格单元边长（度）")
+    parser.add_argument("--limit", type=int, default=20, help="每次查询返回的最近 POI 数")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    index = SpatialIndex(max_points=args.points, max_age=3600, cell_degrees=args.cell_degrees)
+    points = [_random_point(rng) for _ in range(args.points)]
+
+    rss_before = _max_rss_mb()
+    start = time.perf_counter()
+    for i, (lat, lng) in enumerate(points):
+        index.upsert(str(i), lat, lng, CATEGORIES[i % len(CATEGORIES)], None)
+    insert_s = time.perf_counter() - start
+
+    print("=" * 100)
+    print(f"附近 POI 空间索引 (points={args.points}, cell={args.cell_degrees}°)")
+    print("=" * 100)
+    print(f"写入: {args.points / insert_s:,.0f} points/s ({insert_s:.1f}s), "
+          f"内存增量 ≈ {_max_rss_mb() - rss_before:.0f} MB, 网格单元数 {index.stats()['cells']}")
+    print()
+
+    centers = [_random_point(rng) for _ in range(args.queries)]
+    for radius in (500, 1000, 3000):
+        for category in (None, "加油站"):
+            latencies, found = [], []
+            for lat, lng in centers:
+                start = time.perf_counter()
+                matches = index.query(lat, lng, radius, category=category, limit=args.limit)
+                latencies.append((time.perf_counter() - start) * 1000)
+                found.append(len(matches))
+            label = f"radius={radius}m category={category or '*'}"
+            print(f"{label:34s} p50={statistics.median(latencies):7.3f}ms  "
+                  f"p99={_percentile(latencies, 0.99):7.3f}ms  avg results={statistics.mean(found):8.1f}")
+
+    print()
+    scan_queries = centers[:5]
+    start = time.perf_counter()
+    for lat, lng in scan_queries:
+        [p for p in points if distance_m(lat, lng, p[0], p[1]) <= 1000]
+    scan_ms = (time.perf_counter() - start) * 1000 / len(scan_queries)
+    print(f"{'逐点扫描 radius=1000m':34s} avg={scan_ms:9.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+推测性预取基准测试
+
+启动百度地图 MCP 替身服务，按 main 的方式加载工具，用替身模型逐会话回放 all_scenarios，
+对比关闭/开启推测性预取（src/tools/prefetch.py）时：
+- 每轮对话的平均耗时（全部轮次 / 有预取的轮次）
+- 百度地图上游调用数（替身服务统计，包含浪费的预取）
+- 预取命中率：被模型的工具调用用到的预取 / 发起的预取
+
+替身模型在问题提到用户的家、公司时，第一次模型调用先解析这些地点（地理编码或路线规划，
+模拟真实模型看到长期记忆中的地址后的行为），拿到结果后再按 ScriptedModel 的关键词规则调用工具；
+其他问题直接按关键词规则调用工具。--drift 为模型的工具参数与
+预取不一致（多带一个 city 参数）的概率，用于观察命中率下降时浪费的上游调用。
+每个会话使用独立的用户，开始前清空工具结果缓存和附近 POI 索引。
+
+Usage:
+    python benchmarks/bench_prefetch.py [--mcp-latency 200] [--first-token 300] [--drift 0.2]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stubs import ScriptedModel, StubBaiduMCPServer, _current_question
+from clients.boto3_client import all_scenarios
+
+# 基础场景的第一个问题：用户的家和公司地址（长期记忆 /users/{actorId}/locations 的内容）
+LOCATIONS = all_scenarios["基础场景"][0]
+
+
+class PlaceAwareModel(ScriptedModel):
+    """问题提到用户的家、公司时先解析这些地点、再调用其他工具的替身模型
+
+    Args:
+        places: 标签 -> 地址
+        drift: 工具参数与预取不一致的概率
+    """
+
+    def __init__(self, places, drift: float, **kwargs):
+        super().__init__(**kwargs)
+        self.places = places
+        self.drift = drift
+
+    def _plan_tools(self, messages, tool_names):
+        from src.utils.places import mentioned_labels
+
+        # 当前问题，以及问题之后已经拿到几轮工具结果
+        index = max(i for i, message in enumerate(messages)
+                    if message["role"] == "user" and not any("toolResult" in block for block in message["content"]))
+        steps = sum(1 for message in messages[index + 1:] if message["role"] == "user")
+        planned = super()._plan_tools(messages[index:index + 1], tool_names)
+        if not planned:
+            return planned
+        question = _current_question("".join(block.get("text", "") for block in messages[index]["content"]))
+        addresses = [self.places[label] for label in mentioned_labels(question) if label in self.places]
+        if len(addresses) >= 2:
+            place_calls = [("map_directions", {"origin": addresses[0], "destination": addresses[1]})]
+        else:
+            place_calls = [("map_geocode", {"address": address}) for address in addresses]
+        # 同一问题在两种模式下参数是否偏离保持一致
+        if place_calls and random.Random(question).random() < self.drift:
+            place_calls = [(name, {**arguments, "city": "北京"}) for name, arguments in place_calls]
+        if not place_calls:
+            return planned if steps == 0 else []
+        return [place_calls, planned, []][min(steps, 2)]
+
+
+async def replay(template, tools, questions, actor_id, prefetcher, latencies):
+    """回放一个会话的问题，按 main 的方式在模型调用前发起预取"""
+    from src.tools.baidu_maps import SPECULATIVE_PREFETCH
+
+    agent = template.bind(None, callback_handler=None)
+    history = []
+    for prompt in questions:
+        start = time.perf_counter()
+        batch = prefetcher.start(actor_id, prompt, history, tools) if prefetcher else None
+        async for _ in agent.stream_async(prompt, invocation_state={SPECULATIVE_PREFETCH: batch}):
+            pass
+        if batch is not None:
+            prefetcher.finish(batch)
+        latencies.append((prompt, (time.perf_counter() - start) * 1000))
+        history += [{"role": "user", "content": prompt}, {"role": "assistant", "content": ""}]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="推测性预取基准测试")
+    parser.add_argument("--mcp-latency", default="200", help="百度地图替身服务的工具调用延迟（毫秒）")
+    parser.add_argument("--first-token", default="300", help="替身模型每次调用的首 token 延迟（毫秒）")
+    parser.add_argument("--drift", type=float, default=0.2, help="模型工具参数与预取不一致的概率")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    sessions = [questions for name, questions in all_scenarios.items() if name != "基础场景"]
+
+    with StubBaiduMCPServer(latency=args.mcp_latency) as mcp_server:
+        os.environ["BAIDU_MAPS_API_KEY"] = "bench"
+        os.environ["BAIDU_MCP_SSE_URL"] = mcp_server.sse_url
+        os.environ["PREWARM_ON_STARTUP"] = "false"
+
+        from src.agent import main as agent_main
+        from src.agent.template import AgentTemplate
+        from src.tools.baidu_maps import BaiduPOIIndex, PooledMCPTool, get_baidu_tool_result_cache
+        from src.tools.prefetch import SpeculativePrefetcher
+        from src.utils.places import KnownPlaces, extract_places
+
+        tools = agent_main._load_tools(agent_main._get_tool_catalog())
+        places = {label: address for label, address in extract_places(LOCATIONS) if label}
+        model = PlaceAwareModel(places, args.drift, first_token=args.first_token, delta="0", answer_chars=40)
+        template = AgentTemplate(tools, model=model)
+
+        print("=" * 100)
+        print(f"推测性预取 (sessions={len(sessions)}, turns={sum(len(questions) for questions in sessions)}, "
+              f"mcp latency={args.mcp_latency}ms, first token={args.first_token}ms, drift={args.drift:.0%})")
+        print("=" * 100)
+        # 有预取的问题（两种模式下分别统计这些轮次的耗时）
+        planner = SpeculativePrefetcher(known_places=KnownPlaces())
+        planner.known_places.learn("bench", LOCATIONS)
+        prefetched_prompts = {prompt for questions in sessions for prompt in questions if planner.plan("bench", prompt)}
+        for label, enabled in (("no prefetch", False), ("prefetch", True)):
+            prefetcher = None
+            if enabled:
+                known_places = KnownPlaces()
+                prefetcher = SpeculativePrefetcher(known_places=known_places)
+            calls_before = mcp_server.stats()["requests"]
+            latencies = []
+            for index, questions in enumerate(sessions):
+                get_baidu_tool_result_cache().clear()
+                poi_index = BaiduPOIIndex()
+                for tool in tools:
+                    if isinstance(tool, PooledMCPTool):
+                        tool.poi_index = poi_index
+                actor_id = f"bench-{index}"
+                if prefetcher:
+                    known_places.learn(actor_id, LOCATIONS)
+                asyncio.run(replay(template, tools, questions, actor_id, prefetcher, latencies))
+            upstream = mcp_server.stats()["requests"] - calls_before
+
+            place_turns = [ms for prompt, ms in latencies if prompt in prefetched_prompts]
+            line = (f"{label:14s} mean={sum(ms for _, ms in latencies) / len(latencies):6.0f}ms  "
+                    f"place turns mean={sum(place_turns) / max(1, len(place_turns)):6.0f}ms  upstream calls={upstream:3d}")
+            if prefetcher:
+                stats = prefetcher.stats()
+                line += (f"  prefetched={stats['started']} used={stats['used']} wasted={stats['wasted']} "
+                         f"hit rate={stats['hit_rate']:.0%}")
+            print(line)
+        print(f"place turns: {len(prefetched_prompts)} prompts, e.g. {sorted(prefetched_prompts)[:3]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+提示词前缀缓存基准测试
+
+启动 Bedrock Converse 替身服务和百度地图 MCP 替身服务，按 main 的方式创建模型客户端
+（src/agent/template.py 的 create_model，非流式）和工具列表，逐会话回放 all_scenarios，
+从替身服务收到的请求体检查：
+- 工具定义和系统提示词之后是否都有 cachePoint
+- 可缓存前缀是否逐字节稳定（工具目录顺序打乱后仍是同一个前缀）
+并统计 usage 中的缓存读取/写入 token 数。对比：
+- no cache:             不插入 cachePoint
+- cache:                缓存工具定义和系统提示词（每次发送全部工具）
+- cache + tool routing: 同时启用工具子集路由（每个工具子集是一个独立的前缀）
+
+替身服务按请求体估算 token 数，前缀低于 --min-cache-tokens 时不缓存（模拟模型的最小缓存长度）。
+
+Usage:
+    python benchmarks/bench_prompt_cache.py [--min-cache-tokens 0] [--scenarios 基础场景,🚗智能导航]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stubs import StubBaiduMCPServer, StubBedrockServer
+from clients.boto3_client import all_scenarios
+
+
+async def replay(template, questions, router, usage):
+    """回放一个会话的问题，按 main 的方式累计 metadata 事件中的 token 用量"""
+    from src.agent.tool_router import TOOL_SELECTION
+
+    agent = template.bind(None, callback_handler=None)
+    history = []
+    for prompt in questions:
+        selection = router.route(prompt, history, template.tool_names, template.tool_spec_tokens) if router else None
+        async for event in agent.stream_async(prompt, invocation_state={TOOL_SELECTION: selection}):
+            if isinstance(event, dict) and "metadata" in event.get("event", {}):
+                usage.record(event["event"]["metadata"].get("usage", {}))
+        history += [{"role": "user", "content": prompt}, {"role": "assistant", "content": ""}]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="提示词前缀缓存基准测试")
+    parser.add_argument("--min-cache-tokens", type=int, default=0, help="替身服务的最小缓存前缀 token 数")
+    parser.add_argument("--scenarios", default="", help="逗号分隔的场景名，默认全部场景")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    names = [name for name in args.scenarios.split(",") if name] or list(all_scenarios)
+    sessions = [all_scenarios[name] for name in names]
+
+    with StubBaiduMCPServer(latency="0") as mcp_server:
+        os.environ["BAIDU_MAPS_API_KEY"] = "bench"
+        os.environ["BAIDU_MCP_SSE_URL"] = mcp_server.sse_url
+        os.environ["PREWARM_ON_STARTUP"] = "false"
+        os.environ.setdefault("AWS_ACCESS_KEY_ID", "bench")
+        os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "bench")
+
+        from src.agent import main as agent_main
+        from src.agent.template import AgentTemplate, create_model
+        from src.agent.tool_router import ToolRouter
+        from src.utils.metrics import ModelTokenUsage
+
+        tools = agent_main._load_tools(agent_main._get_tool_catalog())
+
+    print("=" * 100)
+    print(f"提示词前缀缓存 (sessions={len(sessions)}, turns={sum(len(questions) for questions in sessions)}, "
+          f"tools={len(tools)}, min cache tokens={args.min_cache_tokens})")
+    print("=" * 100)
+    for label, cache, routing in (("no cache", False, False), ("cache", True, False), ("cache + tool routing", True, True)):
+        with StubBedrockServer(min_cache_tokens=args.min_cache_tokens) as bedrock_server:
+            model_config = {"streaming": False, "endpoint_url": bedrock_server.base_url}
+            if not cache:
+                model_config["cache_config"] = None
+            model = create_model(**model_config)
+
+            router = ToolRouter() if routing else None
+            usage = ModelTokenUsage()
+            rng = random.Random(0)
+            for questions in sessions:
+                # 每个会话打乱工具顺序，模拟工具目录刷新
+                shuffled = list(tools)
+                rng.shuffle(shuffled)
+                asyncio.run(replay(AgentTemplate(shuffled, model=model), questions, router, usage))
+            server_stats = bedrock_server.stats()
+
+        stats = usage.stats()
+        print(f"{label:22s} calls={stats['model_calls']:4d}  input={stats['input_tokens']:7d}  "
+              f"cache read={stats['cache_read_input_tokens']:7d}  cache write={stats['cache_write_input_tokens']:6d}  "
+              f"cached={stats['cache_read_ratio']:5.1%}  prefixes={server_stats['prefixes']}  "
+              f"missing cachePoint={server_stats['missing_cache_points']}/{server_stats['requests']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+客户端 SSE 解析基准测试
+
+录制一段真实编码的流式响应（真实 strands Agent + 逐字符输出的假模型，按 BedrockAgentCoreApp
+的 SSE 编码），重复拼接到数 MB 后从内存回放，对比：
+- before: StreamingBody.iter_lines(chunk_size=10) 逐行 decode + startswith + json.loads
+- after:  clients.sse.iter_sse_json，64KiB 大块读取 + 增量解析
+
+也可以用 --input 回放从 AgentCore Runtime 保存的真实响应体，--save 保存录制的数据。
+
+Usage:
+    python benchmarks/bench_sse_parser.py [--size-mb 8] [--chars 2000] [--rounds 3] [--input stream.sse] [--save stream.sse]
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bedrock_agentcore.runtime import BedrockAgentCoreApp
+from botocore.response import StreamingBody
+from strands import Agent
+
+from benchmarks.bench_stream_coalescing import PacedModel
+from clients.sse import DEFAULT_CHUNK_SIZE, iter_sse_json
+
+
+async def record(chars: int) -> bytes:
+    """录制一次完整响应的 SSE 字节流"""
+    app = BedrockAgentCoreApp()
+    agent = Agent(model=PacedModel(chars, 0), callback_handler=None)
+    frames = []
+    async for event in agent.stream_async("从我家到机场怎么走"):
+        if isinstance(event, dict) and "event" in event:
+            frames.append(app._convert_to_sse({"event": event["event"]}))
+    return b"".join(frames)
+
+
+def parse_iter_lines(data: bytes) -> int:
+    """原实现：botocore iter_lines 逐行解析"""
+    events = 0
+    for line in StreamingBody(io.BytesIO(data), len(data)).iter_lines(chunk_size=10):
+        if line:
+            line = line.decode("utf-8")
+            if line.startswith("data: "):
+                try:
+                    json.loads(line[6:])
+                    events += 1
+                except json.JSONDecodeError:
+                    pass
+    return events
+
+
+def parse_incremental(data: bytes) -> int:
+    """增量解析：从 StreamingBody 底层流大块读取"""
+    events = 0
+    for _ in iter_sse_json(StreamingBody(io.BytesIO(data), len(data)), DEFAULT_CHUNK_SIZE):
+        events += 1
+    return events
+
+
+def measure(parse, data: bytes, rounds: int):
+    """返回 (事件数, 最快一轮的秒数)"""
+    best, events = float("inf"), 0
+    for _ in range(rounds):
+        start = time.perf_counter()
+        events = parse(data)
+        best = min(best, time.perf_counter() - start)
+    return events, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="客户端 SSE 解析基准测试")
+    parser.add_argument("--size-mb", type=float, default=8, help="回放数据的大小")
+    parser.add_argument("--chars", type=int, default=2000, help="录制的响应字符数")
+    parser.add_argument("--rounds", type=int, default=3, help="每种实现的运行轮数（取最快一轮）")
+    parser.add_argument("--input", help="回放已保存的 SSE 响应体（不再录制）")
+    parser.add_argument("--save", help="保存回放数据到文件")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+
+    if args.input:
+        with open(args.input, "rb") as f:
+            recording = f.read()
+    else:
+        recording = asyncio.run(record(args.chars))
+    data = recording * max(1, int(args.size_mb * 1024 * 1024 / len(recording)))
+    if args.save:
+        with open(args.save, "wb") as f:
+            f.write(data)
+
+    megabytes = len(data) / 1024 / 1024
+    print("=" * 100)
+    print(f"SSE 解析 (stream={megabytes:.1f}MB, recording={len(recording)} bytes, rounds={args.rounds})")
+    print("=" * 100)
+    counts = []
+    for label, parse in (("before: iter_lines(chunk_size=10)", parse_iter_lines),
+                         (f"after: incremental ({DEFAULT_CHUNK_SIZE // 1024}KiB reads)", parse_incremental)):
+        events, elapsed = measure(parse, data, args.rounds)
+        counts.append(events)
+        print(f"{label:40s} {megabytes / elapsed:8.1f} MB/s  {events / elapsed:11.0f} events/s  "
+              f"events={events}  time={elapsed * 1000:8.1f}ms")
+    if counts[0] != counts[1]:
+        print(f"事件数不一致: {counts}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+流式输出文本增量合并基准测试
+
+使用本地假模型（按固定间隔输出 1~4 个字符的文本增量）驱动真实的 strands Agent，
+对比 invoke 流式输出在合并前后的：
+- 每个响应的 SSE 帧数
+- 线上字节数（按 BedrockAgentCoreApp 的 SSE 编码计算）
+- 首 token 延迟和总耗时
+
+Usage:
+    python benchmarks/bench_stream_coalescing.py [--chars 600] [--interval-ms 10] [--window-ms 30] [--max-bytes 256]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bedrock_agentcore.runtime import BedrockAgentCoreApp
+from strands import Agent
+from strands.models.model import Model
+
+from src.utils.streaming import coalesce_text_deltas
+
+SAMPLE_TEXT = "从海淀区上地十街10号到北京首都国际机场，推荐走北五环转机场高速，全程约35公里，预计用时45分钟。当前北五环西段有轻微拥堵，建议提前出发。"
+
+
+class PacedModel(Model):
+    """按固定间隔输出文本增量的假模型"""
+
+    def __init__(self, chars: int, interval_ms: float, seed: int = 7):
+        self.chars = chars
+        self.interval = interval_ms / 1000
+        self.seed = seed
+
+    def update_config(self, **model_config):
+        pass
+
+    def get_config(self):
+        return {}
+
+    async def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        yield {}
+
+    async def stream(self, messages, tool_specs=None, system_prompt=None, **kwargs):
+        rng = random.Random(self.seed)
+        text = (SAMPLE_TEXT * (self.chars // len(SAMPLE_TEXT) + 1))[:self.chars]
+        yield {"messageStart": {"role": "assistant"}}
+        yield {"contentBlockStart": {"start": {}}}
+        position = 0
+        while position < len(text):
+            size = rng.randint(1, 4)
+            await asyncio.sleep(self.interval)
+            yield {"contentBlockDelta": {"delta": {"text": text[position:position + size]}}}
+            position += size
+        yield {"contentBlockStop": {}}
+        yield {"messageStop": {"stopReason": "end_turn"}}
+        yield {"metadata": {"usage": {"inputTokens": 1, "outputTokens": 1, "totalTokens": 2}, "metrics": {"latencyMs": 1}}}
+
+
+async def run(args, window_ms: float):
+    """模拟 invoke 的输出循环，返回 (帧数, 字节数, 首 token 毫秒, 总毫秒)"""
+    app = BedrockAgentCoreApp()
+    agent = Agent(model=PacedModel(args.chars, args.interval_ms), callback_handler=None)
+    frames, wire_bytes, first_token = 0, 0, None
+    start = time.perf_counter()
+    async for event in coalesce_text_deltas(agent.stream_async("从我家到机场怎么走"), window_ms, args.max_bytes):
+        if isinstance(event, dict) and "event" in event and "contentBlockDelta" in event["event"]:
+            if first_token is None:
+                first_token = (time.perf_counter() - start) * 1000
+            frames += 1
+            wire_bytes += len(app._convert_to_sse({"event": event["event"]}))
+    return frames, wire_bytes, first_token, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="流式输出文本增量合并基准测试")
+    parser.add_argument("--chars", type=int, default=600, help="每个响应的字符数")
+    parser.add_argument("--interval-ms", type=float, default=10, help="模型输出增量的间隔")
+    parser.add_argument("--window-ms", type=float, default=30, help="合并时间窗口")
+    parser.add_argument("--max-bytes", type=int, default=256, help="单帧最大文本字节数")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+
+    print("=" * 100)
+    print(f"流式输出合并 (chars={args.chars}, delta interval={args.interval_ms}ms, "
+          f"window={args.window_ms}ms, max bytes={args.max_bytes})")
+    print("=" * 100)
+    for label, window_ms in (("before: one frame per delta", 0), ("after: coalesced", args.window_ms)):
+        frames, wire_bytes, first_token, total = asyncio.run(run(args, window_ms))
+        print(f"{label:30s} frames={frames:5d}  bytes={wire_bytes:7d}  "
+              f"first_token={first_token:6.1f}ms  total={total:7.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
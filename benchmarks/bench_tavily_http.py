@@ -0,0 +1,105 @@
+"""
+Tavily 搜索吞吐基准测试
+
+在本地替身服务上对比：
+- 改造前：每次搜索调用 requests.post（无 Session，无 keep-alive），在线程池中并发执行
+- 改造后：TavilyClient 共享 httpx.AsyncClient 连接池，在事件循环中并发执行
+
+Usage:
+    python benchmarks/bench_tavily_http.py [--concurrency 50] [--requests 500] [--latency-ms 50]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+
+from benchmarks.stubs import StubTavilyServer
+from src.tools.tavily_search import TavilyClient, search_tavily
+
+
+def _percentile(samples, pct):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * pct))]
+
+
+def _report(name, latencies, elapsed, server, connections_before):
+    print(
+        f"{name:32s} {len(latencies) / elapsed:9.1f} req/s  "
+        f"p50={statistics.median(latencies):7.1f}ms  p99={_percentile(latencies, 0.99):7.1f}ms  "
+        f"connections={server.stats()['connections'] - connections_before}"
+    )
+
+
+def run_blocking(server, total, concurrency):
+    """改造前：requests.post，每次新建连接"""
+    def search(i):
+        start = time.perf_counter()
+        response = requests.post(
+            server.url,
+            json={"api_key": "bench", "query": f"查询amazon最新的股价 {i}", "max_results": 5},
+            timeout=30
+        )
+        response.raise_for_status()
+        response.json()
+        return (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(search, range(total)))
+    return latencies, time.perf_counter() - start
+
+
+async def run_pooled(server, total, concurrency):
+    """改造后：共享连接池的异步客户端"""
+    client = TavilyClient(api_url=server.url, api_key="bench")
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def search(i):
+        async with semaphore:
+            start = time.perf_counter()
+            result = await search_tavily(f"查询amazon最新的股价 {i}", 5, client=client)
+            assert result["status"] == "success", result
+            return (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*(search(i) for i in range(total)))
+    elapsed = time.perf_counter() - start
+    await client.aclose()
+    return latencies, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tavily 搜索吞吐基准测试")
+    parser.add_argument("--concurrency", type=int, default=50, help="并发搜索数")
+    parser.add_argument("--requests", type=int, default=500, help="总搜索次数")
+    parser.add_argument("--latency-ms", type=float, default=50, help="替身服务响应延迟")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+
+    with StubTavilyServer(latency_ms=args.latency_ms) as server:
+        print("=" * 100)
+        print(f"Tavily 搜索吞吐 (concurrency={args.concurrency}, requests={args.requests}, "
+              f"stub latency={args.latency_ms}ms)")
+        print("=" * 100)
+
+        before = server.stats()['connections']
+        latencies, elapsed = run_blocking(server, args.requests, args.concurrency)
+        _report("before: requests.post + threads", latencies, elapsed, server, before)
+
+        before = server.stats()['connections']
+        latencies, elapsed = asyncio.run(run_pooled(server, args.requests, args.concurrency))
+        _report("after: pooled async client", latencies, elapsed, server, before)
+
+
+if __name__ == "__main__":
+    main()
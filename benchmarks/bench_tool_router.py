@@ -0,0 +1,90 @@
+"""
+工具子集路由基准测试
+
+启动百度地图 MCP 替身服务，按 main 的方式加载工具（Tavily 搜索 + MCP 工具），按会话顺序回放
+clients/boto3_client.py 中 all_scenarios 的问题（上一轮问题作为对话状态），对比：
+- before: 每次模型调用发送全部工具规格
+- after:  src/agent/tool_router.py 选择的工具子集
+统计每个请求发送的工具规格 token 数、节省比例、回退到全部工具的请求数和路由耗时；
+并用替身模型（ScriptedModel）的工具规则检查路由是否漏掉了需要调用的工具。
+
+替身服务的工具 Schema 比真实的百度地图 MCP 服务精简，真实环境中节省的绝对 token 数更多。
+
+Usage:
+    python benchmarks/bench_tool_router.py [--rounds 20]
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stubs import ScriptedModel, StubBaiduMCPServer
+from clients.boto3_client import all_scenarios
+
+
+def main():
+    parser = argparse.ArgumentParser(description="工具子集路由基准测试")
+    parser.add_argument("--rounds", type=int, default=20, help="路由耗时的测量轮数")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+
+    with StubBaiduMCPServer(latency="0") as mcp_server:
+        os.environ["BAIDU_MAPS_API_KEY"] = "bench"
+        os.environ["BAIDU_MCP_SSE_URL"] = mcp_server.sse_url
+        os.environ["PREWARM_ON_STARTUP"] = "false"
+
+        from src.agent import main as agent_main
+        from src.agent.template import AgentTemplate
+        from src.agent.tool_router import ToolRouter
+
+        template = AgentTemplate(agent_main._load_tools(agent_main._get_tool_catalog()), model=ScriptedModel())
+
+    router = ToolRouter()
+    planner = ScriptedModel()
+    all_names = set(template.tool_names)
+    requests, missed = [], []
+    for questions in all_scenarios.values():
+        history = []
+        for prompt in questions:
+            selection = router.route(prompt, history, template.tool_names, template.tool_spec_tokens)
+            sent = selection.filter(list(template.tool_specs))
+            router.record(selection)
+            requests.append((prompt, selection, len(sent)))
+
+            message = [{"role": "user", "content": [{"text": prompt}]}]
+            needed = {name for name, _ in planner._plan_tools(message, all_names)}
+            available = {name for name, _ in planner._plan_tools(message, {spec["name"] for spec in sent})}
+            if needed != available:
+                missed.append((prompt, sorted(needed - available)))
+            history += [{"role": "user", "content": prompt}, {"role": "assistant", "content": ""}]
+
+    start = time.perf_counter()
+    for _ in range(args.rounds):
+        for prompt, _, _ in requests:
+            router.route(prompt, None, template.tool_names, template.tool_spec_tokens)
+    route_us = (time.perf_counter() - start) / (args.rounds * len(requests)) * 1e6
+
+    full = sum(template.tool_spec_tokens.values())
+    sent_tokens = [selection.tokens_sent for _, selection, _ in requests]
+    fallbacks = sum(1 for _, selection, _ in requests if selection.fallback)
+    print("=" * 100)
+    print(f"工具子集路由 (requests={len(requests)}, tools={len(template.tool_specs)}, full spec≈{full} tokens)")
+    print("=" * 100)
+    print(f"{'before: all tools':28s} {full:6d} tokens/model call  {len(template.tool_specs):3d} tools")
+    print(f"{'after: routed subset':28s} {sum(sent_tokens) / len(requests):6.0f} tokens/model call  "
+          f"{sum(count for *_, count in requests) / len(requests):5.1f} tools  "
+          f"saved {1 - sum(sent_tokens) / (full * len(requests)):.0%}")
+    print(f"{'fallback to all tools':28s} {fallbacks}/{len(requests)} requests")
+    print(f"{'route':28s} {route_us:6.1f}µs/request")
+    print(f"{'missed tool (stub model)':28s} {len(missed)}/{len(requests)} requests")
+    for prompt, names in missed:
+        print(f"  missed: {prompt}  {names}")
+
+
+if __name__ == "__main__":
+    main()
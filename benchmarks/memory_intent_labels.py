@@ -0,0 +1,126 @@
+"""
+长期记忆检索意图标注集
+
+覆盖 clients/boto3_client.py 中 all_scenarios 的全部问题，每个问题标注回答时需要检索的命名空间：
+- locations: 提到用户保存的地点（家、公司、学校等）
+- facts: 依赖用户本人、家人或车辆的信息（车型、驾龄、同行人员、限行等）
+- preferences: 需要按用户口味/偏好挑选（推荐餐厅、景点、路线偏好、价格偏好等）
+指代上文（"那里"、"导航过去"）和实时信息查询（路况、天气、股价）不需要长期记忆。
+"""
+
+F, P, L = "facts", "preferences", "locations"
+
+LABELS = {
+    # 基础场景
+    "我家的地址是:北京海淀区上地十街10号，我的办公室在:北京朝阳区人寿保险大厦，我的爱好是出门赏花，我喜欢吃海鲜": {F, P, L},
+    "我住在北京海淀区附近，我想早上8点出门，中午顺路找个地方吃饭，下午继续玩，帮我根据我的爱好规划一个一天游玩的规划": {P, L},
+    "帮我查看这条路线的目前的交通状况？": set(),
+    "查询amazon最新的股价是多少": set(),
+    # 智能导航
+    "从我的住址导航到我的办公室": {L},
+    "前方路况怎么样？": set(),
+    "有没有更快的路线避开拥堵？": {P},
+    "预计什么时候到达？": set(),
+    "途中帮我找个加油站": {F},
+    "最近的加油站在哪里？": {F},
+    "导航过去": set(),
+    # 沿途服务
+    "我准备从我家去首都机场": {L},
+    "路上想吃点东西，推荐顺路的餐厅": {P},
+    "那家店有停车位吗？": set(),
+    "停车方便吗？": set(),
+    "现在路况如何？": set(),
+    # 停车
+    "我从我家去三里屯太古里购物": {L},
+    "那里有停车场吗？": set(),
+    "停车费怎么收？": set(),
+    "现在有空位吗？": set(),
+    "导航到停车场入口": set(),
+    "如果那里停满了，附近还有其他停车场吗？": set(),
+    "哪个更便宜？": {P},
+    # 自驾游
+    "这个周末想自驾去郊区玩，推荐一下北京周边的景点": {P},
+    "古北水镇怎么样？": {P},
+    "从市区开车过去要多久？": set(),
+    "路上有服务区吗？": set(),
+    "那边有什么好吃的？": {P},
+    "附近有住宿的地方吗？": {P},
+    "规划一个两天一夜的自驾路线": {P},
+    # 接送人
+    "我要从我家去首都机场T3航站楼接人": {L},
+    "现在出发来得及吗？": set(),
+    "走哪条路最快？": set(),
+    "机场停车怎么收费？": set(),
+    "有免费等待时间吗？": set(),
+    "如果航班延误了，附近有什么地方可以等？": {P},
+    "返程的时候想顺路吃个饭，推荐一下": {P},
+    # 充电加油
+    "油快没了，帮我找最近的加油站": {F},
+    "哪家油价便宜？": {P},
+    "导航到那个加油站": set(),
+    "还有多远？": set(),
+    "如果是电动车，附近有充电桩吗？": {F},
+    "充电桩现在有空位吗？": set(),
+    "充满电大概需要多久？": {F},
+    # 实时路况
+    "查询一下前方路况": set(),
+    "有事故吗？": set(),
+    "拥堵严重吗？大概堵多久？": set(),
+    "推荐一条避开拥堵的路线": {P},
+    "新路线会多花多少时间？": set(),
+    "沿途有限行吗？": {F},
+    "今天我的车能进五环吗？": {F},
+    # 多目的地
+    "我今天要去三个地方：先去公司，然后去客户那里开会，最后去接孩子放学": {F, L},
+    "帮我规划一个最优路线": set(),
+    "第一站到第二站要多久？": set(),
+    "中午能在客户附近吃饭吗？推荐一下": {P},
+    "下午3点必须到学校，来得及吗？": {L},
+    "如果来不及，调整一下顺序": set(),
+    "全程需要多长时间？": set(),
+    # 天气路况
+    "查一下今天的天气": set(),
+    "会下雨吗？": set(),
+    "雨天开车要注意什么？": set(),
+    "高速路况怎么样？": set(),
+    "有团雾预警吗？": set(),
+    "推荐一条更安全的路线": {P},
+    "预计什么时候天气转好？": set(),
+    # 车辆维护
+    "我的车是特斯拉": {F},
+    "我的车该保养了，附近有4S店吗？": {F},
+    "哪家评价好？": {P},
+    "营业时间是什么？": set(),
+    "需要预约吗？": set(),
+    "保养大概需要多久？": {F},
+    "等待的时候附近有什么地方可以逛？": {P},
+    # 新手司机
+    "我是新手，想去颐和园，帮我规划一条简单好走的路线": {F, P},
+    "避开复杂路口和立交桥": {P},
+    "这条路线有几个红绿灯？": set(),
+    "有没有难走的地方？": set(),
+    "那里好停车吗？": set(),
+    # 商务出行
+    "我10点有个会议在国贸，现在在酒店": set(),
+    "最快多久能到？": set(),
+    "规划最快路线": set(),
+    "会迟到吗？": set(),
+    "如果打车呢？": set(),
+    "附近有地铁吗？哪个更快？": set(),
+    # 家庭出游
+    "带着老人和孩子去动物园，帮我规划一条舒适的路线": {F, P},
+    "避开颠簸路段": {P},
+    "路上有休息区吗？": set(),
+    "那里有母婴室吗？": set(),
+    "停车场离入口近吗？": set(),
+    "园区里有轮椅租赁吗？": set(),
+    "玩完了推荐一个适合家庭聚餐的餐厅": {P},
+    # 夜间驾驶
+    "晚上要开车回家，从CBD到通州": {L},
+    "夜间这条路安全吗？": set(),
+    "路灯照明好吗？": set(),
+    "有没有更明亮的路线？": {P},
+    "途中有24小时便利店吗？": set(),
+    "如果困了，附近有安全的休息区吗？": set(),
+    "预计几点能到家？": {L},
+}
@@ -0,0 +1,551 @@
+"""
+本地替身服务（用于离线基准测试）
+
+替身服务运行在独立子进程中，避免与被测代码争抢 GIL；
+请求数、TCP 连接数等统计通过 GET /_stats 读取。
+
+- StubTavilyServer: 模拟 Tavily 搜索 HTTP 接口
+- StubBaiduMCPServer: 模拟百度地图 MCP SSE 服务
+- StubBedrockServer: 模拟 Bedrock Runtime Converse 接口（记录请求体，模拟提示词前缀缓存）
+
+进程内替身：
+- ScriptedModel: 按问题关键词调用工具、按延迟分布输出文本的假模型
+- FakeMemorySessionManager: 内存中的 AgentCore Memory 会话管理器
+
+延迟均可用 Latency 规格字符串配置，如 "50"、"20-80"、"lognormal:50:200"。
+"""
+
+import asyncio
+import json
+import math
+import multiprocessing
+import random
+import socket
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+from strands.models.model import Model
+from strands.session.repository_session_manager import RepositorySessionManager
+from strands.session.session_repository import SessionRepository
+
+
+def find_free_port() -> int:
+    """获取一个可用的本地端口"""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class Latency:
+    """延迟分布（毫秒）
+
+    规格字符串：
+    - "50": 固定 50ms
+    - "20-80": 20~80ms 均匀分布
+    - "lognormal:50:200": 对数正态分布，中位数 50ms、p99 200ms（长尾）
+    """
+
+    # 标准正态分布的 99 分位点
+    _Z99 = 2.3263
+
+    def __init__(self, spec: str = "0"):
+        self.spec = spec
+        if spec.startswith("lognormal:"):
+            median, p99 = (float(value) for value in spec.split(":")[1:])
+            self.kind = "lognormal"
+            self.mu = math.log(max(median, 1e-3))
+            self.sigma = max(0.0, math.log(max(p99, median) / max(median, 1e-3)) / self._Z99)
+        elif "-" in spec.strip("-"):
+            low, high = (float(value) for value in spec.split("-"))
+            self.kind, self.low, self.high = "uniform", low, high
+        else:
+            self.kind, self.low, self.high = "uniform", float(spec), float(spec)
+
+    @classmethod
+    def uniform(cls, latency_ms: float, jitter_ms: float = 0) -> "Latency":
+        """latency_ms ± jitter_ms 的均匀分布"""
+        return cls(f"{max(0.0, latency_ms - jitter_ms)}-{latency_ms + jitter_ms}")
+
+    def sample(self, rng: Optional[random.Random] = None) -> float:
+        """采样一次延迟（毫秒）"""
+        rng = rng or random
+        if self.kind == "lognormal":
+            return rng.lognormvariate(self.mu, self.sigma)
+        return rng.uniform(self.low, self.high)
+
+    def sleep(self, rng: Optional[random.Random] = None):
+        """异步等待一次采样的延迟"""
+        return asyncio.sleep(max(0.0, self.sample(rng)) / 1000)
+
+    def __repr__(self) -> str:
+        return self.spec
+
+
+def _tavily_app(latency_ms: float, jitter_ms: float, latency: Optional[str] = None):
+    from starlette.applications import Starlette
+    from starlette.requests import Request
+    from starlette.responses import JSONResponse
+    from starlette.routing import Route
+
+    delay = Latency(latency) if latency else Latency.uniform(latency_ms, jitter_ms)
+    stats = {"requests": 0, "connections": set()}
+
+    async def search(request: Request) -> JSONResponse:
+        body = await request.json()
+        stats["requests"] += 1
+        stats["connections"].add(tuple(request.scope.get("client") or ()))
+        await delay.sleep()
+
+        query = body.get("query", "")
+        max_results = body.get("max_results", 5)
+        return JSONResponse({
+            "query": query,
+            "answer": f"关于「{query}」的摘要",
+            "results": [
+                {"title": f"{query} - 结果{i}", "url": f"https://example.com/{i}", "content": "示例内容" * 20}
+                for i in range(max_results)
+            ]
+        })
+
+    async def get_stats(request: Request) -> JSONResponse:
+        return JSONResponse({"requests": stats["requests"], "connections": len(stats["connections"])})
+
+    return Starlette(routes=[
+        Route("/search", search, methods=["POST"]),
+        Route("/_stats", get_stats, methods=["GET"])
+    ])
+
+
+def _serve(app_factory, port: int, kwargs: Dict[str, Any], log_level: str = "warning") -> None:
+    import uvicorn
+    uvicorn.run(app_factory(**kwargs), host="127.0.0.1", port=port, log_level=log_level, lifespan="off")
+
+
+class _StubServer:
+    """在子进程中运行 uvicorn 替身服务"""
+
+    app_factory = None
+    log_level = "warning"
+
+    def __init__(self, port: Optional[int] = None, **kwargs):
+        self.port = port or find_free_port()
+        self._kwargs = kwargs
+        self._process: Optional[multiprocessing.Process] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self):
+        self._process = multiprocessing.get_context("spawn").Process(
+            target=_serve,
+            args=(type(self).app_factory, self.port, self._kwargs, self.log_level),
+            daemon=True
+        )
+        self._process.start()
+        deadline = time.monotonic() + 20
+        while True:
+            try:
+                httpx.get(f"{self.base_url}/_stats", timeout=1)
+                return self
+            except httpx.HTTPError:
+                if time.monotonic() > deadline or not self._process.is_alive():
+                    raise RuntimeError(f"{type(self).__name__} failed to start")
+                time.sleep(0.05)
+
+    def stop(self):
+        if self._process is not None:
+            self._process.terminate()
+            self._process.join(timeout=5)
+
+    def stats(self) -> Dict[str, Any]:
+        """读取替身服务的统计信息"""
+        return httpx.get(f"{self.base_url}/_stats", timeout=5).json()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+
+class StubTavilyServer(_StubServer):
+    """模拟 Tavily 搜索接口
+
+    Args:
+        latency_ms: 每次搜索的平均延迟（毫秒）
+        jitter_ms: 延迟抖动（均匀分布，毫秒）
+        latency: Latency 规格字符串，指定时代替 latency_ms / jitter_ms
+    """
+
+    app_factory = staticmethod(_tavily_app)
+
+    def __init__(self, latency_ms: float = 50, jitter_ms: float = 0, port: Optional[int] = None, latency: Optional[str] = None):
+        super().__init__(port, latency_ms=latency_ms, jitter_ms=jitter_ms, latency=latency)
+
+    @property
+    def url(self) -> str:
+        return f"{self.base_url}/search"
+
+
+# 北京市中心（天安门）坐标，替身服务返回的点都分布在附近
+BEIJING = (39.908823, 116.397470)
+
+
+def _baidu_mcp_app(latency: str):
+    from mcp.server.mcpserver import MCPServer
+    from starlette.requests import Request
+    from starlette.responses import JSONResponse
+
+    delay = Latency(latency)
+    stats: Dict[str, Any] = {"calls": {}}
+    server = MCPServer("baidu-map-stub")
+
+    def point(seed: str, spread: float = 0.05):
+        rng = random.Random(seed)
+        return {"lat": round(BEIJING[0] + rng.uniform(-spread, spread), 6), "lng": round(BEIJING[1] + rng.uniform(-spread, spread), 6)}
+
+    async def respond(name: str, data: Dict[str, Any]) -> str:
+        stats["calls"][name] = stats["calls"].get(name, 0) + 1
+        await delay.sleep()
+        return json.dumps({"status": 0, "message": "ok", **data}, ensure_ascii=False)
+
+    @server.tool(structured_output=False)
+    async def map_geocode(address: str, city: str = "") -> str:
+        """地理编码：地址转经纬度"""
+        return await respond("map_geocode", {"result": {"location": point(address), "precise": 1}})
+
+    @server.tool(structured_output=False)
+    async def map_reverse_geocode(latitude: float, longitude: float) -> str:
+        """逆地理编码：经纬度转地址"""
+        return await respond("map_reverse_geocode", {"result": {"formatted_address": "北京市东城区东长安街", "location": {"lat": latitude, "lng": longitude}}})
+
+    @server.tool(structured_output=False)
+    async def map_search_places(query: str, location: str = "", radius: int = 1000, region: str = "", tag: str = "", page_size: int = 10) -> str:
+        """地点检索：按关键词检索周边或城市内的 POI"""
+        results = [
+            {"uid": f"{query}-{i}", "name": f"{query}{i + 1}号店", "location": point(f"{query}-{i}", 0.02), "address": f"北京市朝阳区示例路{i + 1}号"}
+            for i in range(page_size)
+        ]
+        return await respond("map_search_places", {"total": len(results), "results": results})
+
+    @server.tool(structured_output=False)
+    async def map_place_details(uid: str) -> str:
+        """地点详情"""
+        return await respond("map_place_details", {"result": {"uid": uid, "name": uid, "location": point(uid), "detail_info": {"shop_hours": "09:00-22:00", "overall_rating": "4.5"}}})
+
+    @server.tool(structured_output=False)
+    async def map_directions(origin: str, destination: str, model: str = "driving") -> str:
+        """路线规划"""
+        rng = random.Random(f"{origin}->{destination}")
+        distance = rng.randint(3000, 60000)
+        return await respond("map_directions", {"result": {"routes": [{"distance": distance, "duration": distance // 8, "steps": [{"instruction": f"沿示例路行驶{distance // 4}米"}] * 4}]}})
+
+    @server.tool(structured_output=False)
+    async def map_road_traffic(road_name: str = "", city: str = "", center: str = "", radius: int = 0) -> str:
+        """实时路况"""
+        return await respond("map_road_traffic", {"description": f"{road_name or '周边道路'}：轻度拥堵，平均车速 25km/h", "evaluation": {"status": 2}})
+
+    @server.tool(structured_output=False)
+    async def map_weather(location: str = "", district_id: str = "") -> str:
+        """天气查询"""
+        return await respond("map_weather", {"result": {"now": {"text": "多云", "temp": 18, "wind_dir": "北风", "wind_class": "2级"}}})
+
+    app = server.sse_app()
+
+    async def get_stats(request: Request) -> JSONResponse:
+        return JSONResponse({**stats, "requests": sum(stats["calls"].values())})
+
+    app.add_route("/_stats", get_stats, methods=["GET"])
+    return app
+
+
+class StubBaiduMCPServer(_StubServer):
+    """模拟百度地图 MCP SSE 服务（工具名和参数与百度地图 MCP 一致，返回固定格式的示例数据）
+
+    Args:
+        latency: 每次工具调用的延迟，Latency 规格字符串
+    """
+
+    app_factory = staticmethod(_baidu_mcp_app)
+    # 客户端断开 SSE 连接时 mcp 的 SSE 端点会记录一条无害的 ASGI 异常
+    log_level = "critical"
+
+    def __init__(self, latency: str = "50", port: Optional[int] = None):
+        super().__init__(port, latency=latency)
+
+    @property
+    def sse_url(self) -> str:
+        return f"{self.base_url}/sse"
+
+
+def _estimate_tokens(text: str) -> int:
+    cjk = sum(1 for char in text if "\u4e00" <= char <= "\u9fff")
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def _bedrock_app(latency: str, min_cache_tokens: int):
+    from starlette.applications import Starlette
+    from starlette.requests import Request
+    from starlette.responses import JSONResponse
+    from starlette.routing import Route
+
+    delay = Latency(latency)
+    cache: Dict[str, float] = {}
+    stats: Dict[str, Any] = {"requests": 0, "missing_cache_points": 0, "cache_reads": 0, "cache_writes": 0, "prefixes": set()}
+
+    def cacheable_prefix(body: Dict[str, Any]) -> str:
+        """工具定义和系统提示词中最后一个 cachePoint 之前的部分（Bedrock 按 toolConfig、system 的顺序计算前缀）"""
+        blocks = [("tool", block) for block in (body.get("toolConfig") or {}).get("tools", [])]
+        blocks += [("system", block) for block in body.get("system", [])]
+        last = max((i for i, (_, block) in enumerate(blocks) if "cachePoint" in block), default=-1)
+        return json.dumps(blocks[:last + 1], ensure_ascii=False) if last >= 0 else ""
+
+    async def converse(request: Request) -> JSONResponse:
+        body = json.loads(await request.body())
+        stats["requests"] += 1
+        await delay.sleep()
+
+        prefix = cacheable_prefix(body)
+        prefix_tokens = _estimate_tokens(prefix)
+        total_tokens = _estimate_tokens(json.dumps([body.get("toolConfig"), body.get("system"), body.get("messages")], ensure_ascii=False))
+        usage = {"inputTokens": total_tokens, "outputTokens": 20}
+        sections = [(body.get("toolConfig") or {}).get("tools", []), body.get("system", [])]
+        if not all(any("cachePoint" in block for block in section) for section in sections):
+            stats["missing_cache_points"] += 1
+        if prefix and prefix_tokens >= min_cache_tokens:
+            stats["prefixes"].add(prefix)
+            key = "read" if prefix in cache else "write"
+            cache[prefix] = time.monotonic()
+            usage["inputTokens"] -= prefix_tokens
+            usage[f"cache{key.capitalize()}InputTokens"] = prefix_tokens
+            stats[f"cache_{key}s"] += 1
+        usage["totalTokens"] = sum(usage.values())
+        return JSONResponse({
+            "output": {"message": {"role": "assistant", "content": [{"text": "好的，已为您查询。"}]}},
+            "stopReason": "end_turn",
+            "usage": usage,
+            "metrics": {"latencyMs": 1}
+        })
+
+    async def get_stats(request: Request) -> JSONResponse:
+        return JSONResponse({**stats, "prefixes": len(stats["prefixes"])})
+
+    return Starlette(routes=[
+        Route("/model/{model_id:path}/converse", converse, methods=["POST"]),
+        Route("/_stats", get_stats, methods=["GET"])
+    ])
+
+
+class StubBedrockServer(_StubServer):
+    """模拟 Bedrock Runtime Converse 接口（非流式，BedrockModel(streaming=False)，请求体与流式接口相同）
+
+    按请求体中工具定义和系统提示词的 cachePoint 计算可缓存前缀：同一前缀第一次出现记为缓存写入，
+    之后记为缓存读取，在 usage 中返回 cacheWriteInputTokens / cacheReadInputTokens。
+    /_stats 返回请求数、工具定义或系统提示词缺少 cachePoint 的请求数、缓存读写次数和不同前缀的个数。
+
+    Args:
+        latency: 每次调用的延迟，Latency 规格字符串
+        min_cache_tokens: 前缀低于该 token 数时不缓存（模拟模型的最小缓存长度）
+    """
+
+    app_factory = staticmethod(_bedrock_app)
+
+    def __init__(self, latency: str = "0", min_cache_tokens: int = 0, port: Optional[int] = None):
+        super().__init__(port, latency=latency, min_cache_tokens=min_cache_tokens)
+
+
+def _current_question(text: str) -> str:
+    # build_context_aware_prompt 增强过的提示词只取当前问题
+    return text.rsplit("[当前问题]:\n", 1)[-1]
+
+
+def _location_arg(seed: str) -> str:
+    rng = random.Random(seed)
+    return f"{BEIJING[0] + rng.uniform(-0.05, 0.05):.6f},{BEIJING[1] + rng.uniform(-0.05, 0.05):.6f}"
+
+
+# 问题关键词 -> 工具调用，按顺序匹配，每个问题最多调用 max_tool_calls 个工具
+_PLACE_KEYWORDS = ("餐厅", "加油站", "停车场", "充电桩", "4S店", "便利店", "休息区", "住宿", "服务区", "景点", "地铁")
+_TOOL_RULES = (
+    (("股价", "新闻", "评价", "营业时间", "预约", "限行", "油价", "收费"), "tavily_search", lambda q: {"query": q, "max_results": 5}),
+    (("路况", "拥堵", "堵", "事故"), "map_road_traffic", lambda q: {"road_name": "北五环", "city": "北京"}),
+    (("天气", "下雨", "团雾"), "map_weather", lambda q: {"location": _location_arg("weather")}),
+    (_PLACE_KEYWORDS + ("附近", "找"), "map_search_places", lambda q: {
+        "query": next((keyword for keyword in _PLACE_KEYWORDS if keyword in q), "美食"),
+        "location": _location_arg("home"),
+        "radius": 2000
+    }),
+    (("导航", "路线", "多久", "怎么走", "到达", "出发", "去"), "map_directions", lambda q: {"origin": "北京市海淀区上地十街10号", "destination": q[:20]}),
+)
+
+
+class ScriptedModel(Model):
+    """按问题关键词调用工具的假模型
+
+    - 用户问题命中 _TOOL_RULES 时先输出工具调用，拿到工具结果后再输出回答
+    - 每次模型调用先等待 first_token 延迟，之后每个 1~4 字符的文本增量间隔 delta 延迟
+
+    Args:
+        first_token: 每次模型调用的首 token 延迟，Latency 规格字符串
+        delta: 文本增量间隔，Latency 规格字符串
+        answer_chars: 每个回答的字符数
+        max_tool_calls: 每个问题最多调用的工具数
+        seed: 随机种子
+    """
+
+    def __init__(self, first_token: str = "300", delta: str = "15", answer_chars: int = 200, max_tool_calls: int = 2, seed: int = 7):
+        self.first_token = Latency(first_token)
+        self.delta = Latency(delta)
+        self.answer_chars = answer_chars
+        self.max_tool_calls = max_tool_calls
+        self.rng = random.Random(seed)
+        self.calls = 0
+        self.tool_calls: Dict[str, int] = {}
+
+    def update_config(self, **model_config):
+        pass
+
+    def get_config(self):
+        return {}
+
+    async def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        yield {}
+
+    def _plan_tools(self, messages: List[Dict[str, Any]], tool_names: set) -> List[tuple]:
+        last = messages[-1] if messages else {}
+        if last.get("role") != "user" or any("toolResult" in block for block in last.get("content", [])):
+            return []
+        question = _current_question("".join(block.get("text", "") for block in last.get("content", [])))
+        planned = []
+        for keywords, name, build_arguments in _TOOL_RULES:
+            if name in tool_names and any(keyword in question for keyword in keywords):
+                planned.append((name, build_arguments(question)))
+            if len(planned) >= self.max_tool_calls:
+                break
+        return planned
+
+    async def stream(self, messages, tool_specs=None, system_prompt=None, **kwargs):
+        self.calls += 1
+        tool_names = {spec["name"] for spec in tool_specs or []}
+        planned = self._plan_tools(messages, tool_names)
+        await self.first_token.sleep(self.rng)
+        yield {"messageStart": {"role": "assistant"}}
+
+        if planned:
+            for index, (name, arguments) in enumerate(planned):
+                self.tool_calls[name] = self.tool_calls.get(name, 0) + 1
+                tool_use_id = f"tooluse_{self.calls}_{index}"
+                yield {"contentBlockStart": {"start": {"toolUse": {"toolUseId": tool_use_id, "name": name}}, "contentBlockIndex": index}}
+                yield {"contentBlockDelta": {"delta": {"toolUse": {"input": json.dumps(arguments, ensure_ascii=False)}}, "contentBlockIndex": index}}
+                yield {"contentBlockStop": {"contentBlockIndex": index}}
+            yield {"messageStop": {"stopReason": "tool_use"}}
+        else:
+            text = ("根据查询结果，推荐您走北五环转京承高速，全程约35公里，预计45分钟到达，沿途有多个加油站和服务区。" * (self.answer_chars // 40 + 1))[:self.answer_chars]
+            yield {"contentBlockStart": {"start": {}}}
+            position = 0
+            while position < len(text):
+                size = self.rng.randint(1, 4)
+                yield {"contentBlockDelta": {"delta": {"text": text[position:position + size]}}}
+                position += size
+                if position < len(text):
+                    await self.delta.sleep(self.rng)
+            yield {"contentBlockStop": {}}
+            yield {"messageStop": {"stopReason": "end_turn"}}
+        yield {"metadata": {"usage": {"inputTokens": 1, "outputTokens": 1, "totalTokens": 2}, "metrics": {"latencyMs": 1}}}
+
+
+class FakeMemoryStore:
+    """FakeMemorySessionManager 共享的内存存储（模拟 AgentCore Memory 服务端）
+
+    与真实的会话管理器一样，读写都是阻塞调用：
+    读（会话/Agent/消息/最近 k 轮）等待 read 延迟，写（创建会话/事件等）等待 write 延迟。
+
+    Args:
+        read: 读延迟，Latency 规格字符串
+        write: 写延迟，Latency 规格字符串
+    """
+
+    def __init__(self, read: str = "0", write: str = "0"):
+        self.read_latency = Latency(read)
+        self.write_latency = Latency(write)
+        self.sessions: Dict[str, Any] = {}
+        self.agents: Dict[tuple, Any] = {}
+        self.messages: Dict[tuple, List[Any]] = {}
+        self.lock = threading.Lock()
+        self.stats = {"reads": 0, "writes": 0}
+
+    def _wait(self, latency: Latency, counter: str) -> None:
+        with self.lock:
+            self.stats[counter] += 1
+        time.sleep(max(0.0, latency.sample()) / 1000)
+
+    def read(self) -> None:
+        self._wait(self.read_latency, "reads")
+
+    def write(self) -> None:
+        self._wait(self.write_latency, "writes")
+
+
+class FakeMemorySessionManager(RepositorySessionManager, SessionRepository):
+    """内存中的 AgentCore Memory 会话管理器
+
+    接口与 AgentCoreMemorySessionManager 一致（包括 list_messages 的 limit 语义），
+    数据保存在共享的 FakeMemoryStore 中，同一会话跨请求可恢复。
+    """
+
+    def __init__(self, session_id: str, store: FakeMemoryStore, actor_id: str = "user"):
+        self.store = store
+        self.actor_id = actor_id
+        super().__init__(session_id=session_id, session_repository=self)
+
+    def create_session(self, session, **kwargs):
+        self.store.write()
+        self.store.sessions[session.session_id] = session
+        return session
+
+    def read_session(self, session_id, **kwargs):
+        self.store.read()
+        return self.store.sessions.get(session_id)
+
+    def create_agent(self, session_id, session_agent, **kwargs):
+        self.store.write()
+        self.store.agents[(session_id, session_agent.agent_id)] = session_agent
+
+    def read_agent(self, session_id, agent_id, **kwargs):
+        self.store.read()
+        return self.store.agents.get((session_id, agent_id))
+
+    def update_agent(self, session_id, session_agent, **kwargs):
+        self.store.write()
+        self.store.agents[(session_id, session_agent.agent_id)] = session_agent
+
+    def create_message(self, session_id, agent_id, session_message, **kwargs):
+        self.store.write()
+        with self.store.lock:
+            self.store.messages.setdefault((session_id, agent_id), []).append(session_message)
+
+    def read_message(self, session_id, agent_id, message_id, **kwargs):
+        self.store.read()
+        for message in self.store.messages.get((session_id, agent_id), []):
+            if message.message_id == message_id:
+                return message
+        return None
+
+    def update_message(self, session_id, agent_id, session_message, **kwargs):
+        self.store.write()
+        messages = self.store.messages.get((session_id, agent_id), [])
+        for i, message in enumerate(messages):
+            if message.message_id == session_message.message_id:
+                messages[i] = session_message
+
+    def list_messages(self, session_id, agent_id, limit=None, offset=0, **kwargs):
+        """与 AgentCoreMemorySessionManager 一致：指定 limit 时返回最近的 limit 条消息（按时间顺序）"""
+        self.store.read()
+        with self.store.lock:
+            messages = list(self.store.messages.get((session_id, agent_id), []))
+        if limit is None:
+            return messages[offset:]
+        return messages[-(limit + offset):][offset:offset + limit]
@@ -40,13 +40,32 @@ Usage:
     
     # Run with custom question
     python clients/boto3_client.py "你的问题"
+    
+    # Headless load run: 32 sessions, 8 in parallel, 2s think-time, per-turn results to JSONL
+    python clients/boto3_client.py --headless --sessions 32 --concurrency 8 --think-time 2 --output results.jsonl
 """
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
 import boto3
 import json
+from botocore.config import Config
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from clients.sse import iter_sse_json
 
 # Initialize the bedrock-agentcore client
 agent_core_client = boto3.client('bedrock-agentcore', region_name='us-west-2')
 
+DEFAULT_AGENT_RUNTIME_ARN = 'arn:aws:bedrock-agentcore:us-west-2:741040131740:runtime/agentcore_baidu_map_agent-JWw0Aw8Cn1'
+
 # Example questions to test - 多场景对话测试集
 test_questions = [
     
@@ -295,29 +314,18 @@ def invoke_agent(prompt: str, agent_runtime_arn: str, session_id: str = None, st
             print("-" * 60)
             accumulated_text = []
             
-            for line in response["response"].iter_lines(chunk_size=10):
-                if line:
-                    line = line.decode("utf-8")
-                    if line.startswith("data: "):
-                        data_str = line[6:]  # Remove "data: " prefix
-                        
-                        try:
-                            data = json.loads(data_str)
-                            
-                            # 只提取和显示 contentBlockDelta 中的文本
-                            if isinstance(data, dict):
-                                if 'event' in data and 'contentBlockDelta' in data['event']:
-                                    delta = data['event']['contentBlockDelta'].get('delta', {})
-                                    if 'text' in delta:
-                                        text_chunk = delta['text']
-                                        # 实时打印文本块
-                                        print(text_chunk, end='', flush=True)
-                                        accumulated_text.append(text_chunk)
-                                elif 'error' in data:
-                                    print(f"\n错误: {data['error']}", flush=True)
-                        except json.JSONDecodeError:
-                            # 如果不是 JSON，跳过
-                            pass
+            for data in iter_sse_json(response["response"]):
+                # 只提取和显示 contentBlockDelta 中的文本
+                if isinstance(data, dict):
+                    if 'event' in data and 'contentBlockDelta' in data['event']:
+                        delta = data['event']['contentBlockDelta'].get('delta', {})
+                        if 'text' in delta:
+                            text_chunk = delta['text']
+                            # 实时打印文本块
+                            print(text_chunk, end='', flush=True)
+                            accumulated_text.append(text_chunk)
+                    elif 'error' in data:
+                        print(f"\n错误: {data['error']}", flush=True)
             
             print("\n" + "=" * 60)
             full_response = "".join(accumulated_text)
@@ -354,7 +362,7 @@ def main():
     """
     # TODO: Replace with your actual AgentCore runtime ARN
     # You can get this ARN after deploying with: agentcore deploy
-    agent_runtime_arn = 'arn:aws:bedrock-agentcore:us-west-2:741040131740:runtime/agentcore_baidu_map_agent-JWw0Aw8Cn1'
+    agent_runtime_arn = DEFAULT_AGENT_RUNTIME_ARN
     
     # Generate a single session ID for all questions to maintain conversation context
     import uuid
@@ -493,15 +501,177 @@ def run_scenario(questions, agent_runtime_arn, session_id, scenario_name):
                 break
 
 
+def invoke_agent_timed(prompt: str, agent_runtime_arn: str, session_id: str, client=None):
+    """
+    Invoke the AgentCore runtime once without printing and measure the response
+    
+    Args:
+        prompt: User question/prompt
+        agent_runtime_arn: ARN of the deployed AgentCore runtime
+        session_id: Session ID (33+ chars)
+        client: bedrock-agentcore client (default: module client)
+    
+    Returns:
+        Dict with ttfb_ms (first response line), first_token_ms (first text chunk),
+        total_ms, chunks (text chunk count), chars and error (None on success)
+    """
+    client = client or agent_core_client
+    result = {"ttfb_ms": None, "first_token_ms": None, "total_ms": None, "chunks": 0, "chars": 0, "error": None}
+    start = time.perf_counter()
+    try:
+        response = client.invoke_agent_runtime(
+            agentRuntimeArn=agent_runtime_arn,
+            runtimeSessionId=session_id,
+            payload=json.dumps({"prompt": prompt}).encode(),
+            qualifier="DEFAULT"
+        )
+        if "text/event-stream" in response.get("contentType", ""):
+            for data in iter_sse_json(response["response"]):
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                if result["ttfb_ms"] is None:
+                    result["ttfb_ms"] = elapsed_ms
+                if not isinstance(data, dict):
+                    continue
+                if 'error' in data:
+                    result["error"] = data['error']
+                text = data.get('event', {}).get('contentBlockDelta', {}).get('delta', {}).get('text')
+                if text:
+                    if result["first_token_ms"] is None:
+                        result["first_token_ms"] = elapsed_ms
+                    result["chunks"] += 1
+                    result["chars"] += len(text)
+        else:
+            response["response"].read()
+            result["ttfb_ms"] = (time.perf_counter() - start) * 1000
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["total_ms"] = (time.perf_counter() - start) * 1000
+    return result
+
+
+def _percentile(samples, pct):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * pct))] if samples else None
+
+
+def _format_ms(value):
+    return f"{value:8.0f}" if value is not None else f"{'-':>8s}"
+
+
+def print_summary(results, elapsed):
+    """
+    Print a per-scenario summary table of headless run results
+    
+    Args:
+        results: Per-turn result dicts from run_headless
+        elapsed: Wall-clock duration of the run in seconds
+    """
+    groups = {}
+    for result in results:
+        groups.setdefault(result["scenario"], []).append(result)
+    groups["全部"] = results
+    
+    print(f"\n{'场景':12s} {'轮数':>6s} {'错误':>6s} {'TTFB p50':>9s} {'TTFB p95':>9s} "
+          f"{'首字 p50':>9s} {'总耗时 p50':>10s} {'总耗时 p95':>10s} {'平均块数':>8s}")
+    print("-" * 100)
+    for scenario, rows in groups.items():
+        ok = [row for row in rows if not row["error"]]
+        ttfb = [row["ttfb_ms"] for row in ok if row["ttfb_ms"] is not None]
+        first_token = [row["first_token_ms"] for row in ok if row["first_token_ms"] is not None]
+        total = [row["total_ms"] for row in ok]
+        chunks = sum(row["chunks"] for row in ok) / len(ok) if ok else 0
+        print(f"{scenario:12s} {len(rows):6d} {len(rows) - len(ok):6d} {_format_ms(_percentile(ttfb, 0.5))} "
+              f" {_format_ms(_percentile(ttfb, 0.95))}  {_format_ms(_percentile(first_token, 0.5))} "
+              f"  {_format_ms(_percentile(total, 0.5))}   {_format_ms(_percentile(total, 0.95))}  {chunks:8.1f}")
+    print("-" * 100)
+    print(f"耗时单位 ms；{len(results)} 轮 / {elapsed:.1f}s = {len(results) / elapsed if elapsed else 0:.2f} 轮/秒")
+
+
+def run_headless(agent_runtime_arn, scenario_names=None, sessions=None, concurrency=4, think_time=0.0, output=None, client=None):
+    """
+    Replay scenarios in parallel sessions without prompting (load generation)
+    
+    Each session gets its own session ID and replays one scenario (assigned round-robin)
+    question by question, sleeping a randomized think-time (0.5x-1.5x) between questions.
+    
+    Args:
+        agent_runtime_arn: ARN of the deployed AgentCore runtime
+        scenario_names: Scenarios to replay (default: all scenarios)
+        sessions: Number of sessions (default: one per scenario)
+        concurrency: Number of sessions running in parallel
+        think_time: Mean pause between questions of a session, in seconds
+        output: Optional JSONL path; one line per turn is appended as it completes
+        client: bedrock-agentcore client (default: a client sized for `concurrency`)
+    
+    Returns:
+        List of per-turn result dicts
+    """
+    scenario_names = scenario_names or list(all_scenarios)
+    sessions = sessions or len(scenario_names)
+    # One connection per parallel session, and no client-side retries skewing timings
+    client = client or boto3.client(
+        'bedrock-agentcore',
+        region_name='us-west-2',
+        config=Config(max_pool_connections=max(10, concurrency), read_timeout=300, retries={'max_attempts': 1})
+    )
+    results = []
+    lock = threading.Lock()
+    output_file = open(output, "a", encoding="utf-8") if output else None
+    
+    def run_session(index):
+        scenario_name = scenario_names[index % len(scenario_names)]
+        session_id = f"session_{uuid.uuid4().hex}"
+        for turn, question in enumerate(all_scenarios[scenario_name], 1):
+            if turn > 1 and think_time > 0:
+                time.sleep(think_time * random.uniform(0.5, 1.5))
+            result = {
+                "scenario": scenario_name,
+                "session_id": session_id,
+                "turn": turn,
+                "question": question,
+                "started_at": time.time(),
+                **invoke_agent_timed(question, agent_runtime_arn, session_id, client)
+            }
+            with lock:
+                results.append(result)
+                if output_file:
+                    output_file.write(json.dumps(result, ensure_ascii=False) + "\n")
+                    output_file.flush()
+                status = f"错误: {result['error']}" if result["error"] else f"{result['total_ms']:.0f}ms"
+                print(f"[{len(results)}] {scenario_name} 会话 {index + 1} 问题 {turn}: {status}", flush=True)
+    
+    start = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(run_session, range(sessions)))
+    finally:
+        if output_file:
+            output_file.close()
+    print_summary(results, time.perf_counter() - start)
+    return results
+
+
 if __name__ == "__main__":
-    # You can also test with a single custom question
-    import sys
+    parser = argparse.ArgumentParser(description="AgentCore Baidu Map Agent - Boto3 Client")
+    parser.add_argument("question", nargs="*", help="Custom question (default: interactive scenario selection)")
+    parser.add_argument("--arn", default=DEFAULT_AGENT_RUNTIME_ARN, help="AgentCore runtime ARN")
+    parser.add_argument("--headless", action="store_true", help="Replay scenarios in parallel sessions without prompting")
+    parser.add_argument("--scenarios", default="", help="Comma-separated scenario names (default: all)")
+    parser.add_argument("--sessions", type=int, default=None, help="Number of sessions (default: one per scenario)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Sessions running in parallel")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Mean pause between questions, in seconds")
+    parser.add_argument("--output", default=None, help="JSONL file for per-turn results")
+    args = parser.parse_args()
     
-    if len(sys.argv) > 1:
+    if args.headless:
+        names = [name for name in args.scenarios.split(",") if name] or None
+        unknown = [name for name in names or [] if name not in all_scenarios]
+        if unknown:
+            parser.error(f"unknown scenarios: {', '.join(unknown)}")
+        run_headless(args.arn, names, args.sessions, args.concurrency, args.think_time, args.output)
+    elif args.question:
         # Custom question from command line
-        custom_question = " ".join(sys.argv[1:])
-        agent_runtime_arn = 'arn:aws:bedrock-agentcore:us-west-2:741040131740:runtime/agentcore_baidu_map_agent-JWw0Aw8Cn1'
-        invoke_agent(custom_question, agent_runtime_arn, streaming=True)
+        invoke_agent(" ".join(args.question), args.arn, streaming=True)
     else:
         # Run all test questions
         main()
@@ -0,0 +1,197 @@
+"""
+Incremental Server-Sent Events (SSE) decoder
+
+The streaming response is read in large chunks and complete events are split out
+of a single growing buffer: each chunk is scanned once for the blank-line event
+separator and consumed bytes are dropped once per chunk, not once per event.
+Events are parsed lazily as they complete.
+
+Supports the full event-stream format (HTML Living Standard, "Server-sent events"):
+multi-line `data:` fields, `event:`, `id:`, `retry:`, comment lines, and LF, CRLF
+or CR line endings (including a CRLF split across two chunks).
+
+Usage:
+    from clients.sse import iter_sse_json
+
+    for payload in iter_sse_json(response["response"]):
+        ...
+"""
+import json
+from typing import Any, Iterator, List, Optional
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+_BOM = b"\xef\xbb\xbf"
+
+
+class SSEEvent:
+    """A dispatched SSE event"""
+
+    __slots__ = ("event", "data", "id", "retry")
+
+    def __init__(self, data: str, event: str = "message", id: Optional[str] = None, retry: Optional[int] = None):
+        self.data = data
+        self.event = event
+        self.id = id
+        self.retry = retry
+
+    def json(self) -> Any:
+        """Parse the event data as JSON"""
+        return json.loads(self.data)
+
+    def __repr__(self) -> str:
+        return f"SSEEvent(event={self.event!r}, id={self.id!r}, data={self.data[:60]!r})"
+
+
+class SSEDecoder:
+    """
+    Incremental SSE decoder
+
+    Feed raw bytes in chunks of any size with feed(); it returns the events completed
+    by that chunk. A trailing event without its terminating blank line is kept until
+    more data arrives (and discarded at end of stream, as the spec requires).
+    """
+
+    def __init__(self):
+        self._buffer = bytearray()
+        # The event separator search resumes here instead of rescanning the buffer
+        self._scan_from = 0
+        self._pending_cr = False
+        self._started = False
+        self.last_event_id: Optional[str] = None
+        self.retry: Optional[int] = None
+
+    def _normalize(self, chunk: bytes) -> bytes:
+        # A CR ending the previous chunk was already turned into LF: drop the LF of a split CRLF
+        if self._pending_cr and chunk[:1] == b"\n":
+            chunk = chunk[1:]
+        self._pending_cr = chunk[-1:] == b"\r"
+        return chunk.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+
+    def _parse(self, frame: bytes) -> Optional[SSEEvent]:
+        # Fast path: the common single-line `data: ...` event
+        if frame[:6] == b"data: " and b"\n" not in frame:
+            return SSEEvent(frame[6:].decode("utf-8"), "message", self.last_event_id, self.retry)
+
+        data: List[bytes] = []
+        event = "message"
+        for line in frame.split(b"\n"):
+            if not line or line[:1] == b":":
+                continue
+            field, colon, value = line.partition(b":")
+            if colon and value[:1] == b" ":
+                value = value[1:]
+            if field == b"data":
+                data.append(value)
+            elif field == b"event":
+                event = value.decode("utf-8") or "message"
+            elif field == b"id":
+                if b"\0" not in value:
+                    self.last_event_id = value.decode("utf-8")
+            elif field == b"retry":
+                if value.isdigit():
+                    self.retry = int(value)
+        if not data:
+            return None
+        return SSEEvent(b"\n".join(data).decode("utf-8"), event, self.last_event_id, self.retry)
+
+    def feed(self, chunk: bytes) -> List[SSEEvent]:
+        """
+        Add raw bytes and return the events they complete
+
+        Args:
+            chunk: Next piece of the response body
+
+        Returns:
+            Completed events, in stream order
+        """
+        if not self._started and chunk:
+            self._started = True
+            if chunk.startswith(_BOM):
+                chunk = chunk[len(_BOM):]
+        if self._pending_cr or b"\r" in chunk:
+            chunk = self._normalize(chunk)
+        if not chunk:
+            return []
+
+        buffer = self._buffer
+        buffer += chunk
+        events = []
+        start = 0
+        scan = self._scan_from
+        find = buffer.find
+        while True:
+            end = find(b"\n\n", scan)
+            if end < 0:
+                break
+            event = self._parse(bytes(buffer[start:end]))
+            if event is not None:
+                events.append(event)
+            start = scan = end + 2
+        if start:
+            del buffer[:start]
+        # A separator may straddle this chunk and the next one
+        self._scan_from = max(0, len(buffer) - 1)
+        return events
+
+
+def iter_chunks(source: Any, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Iterate over the raw chunks of a response body
+
+    For a botocore StreamingBody, reads from the underlying urllib3 response with
+    read1(), which returns whatever has arrived (up to chunk_size) instead of
+    blocking until chunk_size bytes are available, so large reads do not delay
+    the first event.
+
+    Args:
+        source: bytes, a file-like object (read1/read) or an iterable of byte chunks
+        chunk_size: Maximum bytes per read
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        yield bytes(source)
+        return
+    raw = getattr(source, "_raw_stream", source)
+    read = getattr(raw, "read1", None) or getattr(raw, "read", None)
+    if read is None:
+        yield from source
+        return
+    while True:
+        chunk = read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def iter_sse_events(source: Any, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[SSEEvent]:
+    """
+    Lazily decode SSE events from a response body
+
+    Args:
+        source: bytes, a file-like object or an iterable of byte chunks (see iter_chunks)
+        chunk_size: Maximum bytes per read
+
+    Yields:
+        SSEEvent objects as soon as each event is complete
+    """
+    decoder = SSEDecoder()
+    for chunk in iter_chunks(source, chunk_size):
+        yield from decoder.feed(chunk)
+
+
+def iter_sse_json(source: Any, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Any]:
+    """
+    Lazily decode SSE events and parse their data as JSON (non-JSON events are skipped)
+
+    Args:
+        source: bytes, a file-like object or an iterable of byte chunks (see iter_chunks)
+        chunk_size: Maximum bytes per read
+
+    Yields:
+        Parsed JSON payloads
+    """
+    for event in iter_sse_events(source, chunk_size):
+        try:
+            yield json.loads(event.data)
+        except json.JSONDecodeError:
+            continue
@@ -10,22 +10,38 @@
 - 集成 AgentCore Memory 进行会话管理
 """
 
+import asyncio
 import logging
+import threading
 from typing import Dict, Any, List
-from strands import Agent
 from bedrock_agentcore.runtime import BedrockAgentCoreApp
-from bedrock_agentcore.memory.integrations.strands.session_manager import AgentCoreMemorySessionManager
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse
 
-from src.config import MEMORY_ID, REGION, MODEL_ID
-from src.tools.baidu_maps import initialize_baidu_mcp_client
+from src.agent.template import get_agent_template
+from src.agent.tool_executor import get_tool_executor
+from src.agent.tool_router import TOOL_SELECTION, get_tool_router
+from src.config import MEMORY_ID, REGION, PREWARM_ON_STARTUP, PREFETCH_ENABLED, TOOL_ROUTING
+from src.tools.baidu_maps import BYPASS_TOOL_CACHE, SPECULATIVE_PREFETCH, get_baidu_tool_catalog
+from src.tools.prefetch import get_speculative_prefetcher
 from src.tools.tavily_search import tavily_search
 from src.utils.memory import (
+    RecentTurnsBuffer,
+    SessionManagerCache,
     get_actor_and_session_id,
-    create_memory_config,
+    get_memory_retrieval_cache,
     build_context_aware_prompt,
     get_conversation_context
 )
-from src.utils.prompts import SYSTEM_PROMPT
+from src.utils.history import get_history_compactor
+from src.utils.intent import get_memory_intent_classifier
+from src.utils.metrics import get_metrics_registry, get_model_token_usage, record_stage_timings
+from src.utils.places import get_known_places
+from src.utils.singleflight import get_single_flight
+from src.utils.summary import SessionSummaryStore, create_summarizer
+from src.utils.streaming import coalesce_text_deltas
+from src.utils.timing import StageTimer
+from src.utils.tracing import configure_tracing, extract_trace_context, mark_error, start_span
 
 # 配置日志
 logging.basicConfig(level=logging.INFO)
@@ -34,20 +50,161 @@ logger = logging.getLogger(__name__)
 # 初始化 AgentCore App
 app = BedrockAgentCoreApp()
 
+# 按配置启用链路追踪导出
+configure_tracing()
 
-def _get_mcp_client():
-    """获取 MCP 客户端实例
+# 进程级会话管理器缓存，按 (actor_id, session_id) 复用
+session_cache = SessionManagerCache(MEMORY_ID, REGION)
+
+# 进程内最近对话缓冲，粘性会话无需每轮从 Memory 拉取历史
+turn_buffer = RecentTurnsBuffer()
+
+# 会话滚动摘要：较早的对话在后台折叠进摘要，请求时用摘要代替这些对话（SESSION_SUMMARY_MODE=off 时关闭）
+_summarizer = create_summarizer()
+session_summaries = SessionSummaryStore(_summarizer) if _summarizer is not None else None
+
+# 指标：各阶段/工具耗时直方图 + 各组件计数器
+metrics = get_metrics_registry()
+metrics.register_stats("session_cache", session_cache.stats)
+metrics.register_stats("recent_turns", turn_buffer.stats)
+metrics.register_stats("single_flight", get_single_flight().stats)
+metrics.register_stats("history_compaction", get_history_compactor().stats)
+metrics.register_stats("memory_retrieval_cache", get_memory_retrieval_cache().stats)
+metrics.register_stats("memory_intent", get_memory_intent_classifier().stats)
+metrics.register_stats("tool_router", get_tool_router().stats)
+metrics.register_stats("tool_executor", get_tool_executor().stats)
+metrics.register_stats("model_tokens", get_model_token_usage().stats)
+metrics.register_stats("prefetch", get_speculative_prefetcher().stats)
+metrics.register_stats("known_places", get_known_places().stats)
+if session_summaries is not None:
+    metrics.register_stats("session_summary", session_summaries.stats)
+
+
+async def metrics_endpoint(request: Request) -> PlainTextResponse:
+    """Prometheus 文本格式的指标"""
+    return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+async def metrics_json_endpoint(request: Request) -> JSONResponse:
+    """JSON 格式的指标快照"""
+    return JSONResponse(metrics.snapshot())
+
+
+app.add_route("/metrics", metrics_endpoint, methods=["GET"])
+app.add_route("/metrics.json", metrics_json_endpoint, methods=["GET"])
+
+
+def _get_tool_catalog():
+    """获取进程级共享的百度地图工具目录（包含 MCP 会话池）
     
     Returns:
-        MCPClient 实例或 None
+        BaiduToolCatalog 实例或 None
     """
     try:
-        return initialize_baidu_mcp_client()
+        return get_baidu_tool_catalog()
     except Exception as e:
-        logger.warning(f"Failed to initialize Baidu MCP client: {e}")
+        logger.warning(f"Failed to initialize Baidu tool catalog: {e}")
         return None
 
 
+def _load_tools(tool_catalog) -> List[Any]:
+    """组装本次请求的工具列表
+    
+    Args:
+        tool_catalog: 百度地图工具目录或 None
+    
+    Returns:
+        Tavily 搜索 + 百度地图工具
+    """
+    tools = [tavily_search]
+    if tool_catalog:
+        tools.extend(tool_catalog.get_tools())
+    return tools
+
+
+async def _load_tools_async() -> List[Any]:
+    """在线程池中获取工具目录并组装工具列表（目录已加载时直接读内存）"""
+    tool_catalog = await asyncio.to_thread(_get_tool_catalog)
+    if tool_catalog and tool_catalog.loaded:
+        tools = _load_tools(tool_catalog)
+    else:
+        tools = await asyncio.to_thread(_load_tools, tool_catalog)
+    
+    if len(tools) == 1:
+        # 没有百度地图工具，只使用 Tavily 搜索
+        logger.info("Running without Baidu Maps tools")
+    else:
+        logger.info(f"Loaded {len(tools) - 1} Baidu Maps tools (catalog: {tool_catalog.stats()})")
+    return tools
+
+
+async def _prepare_session(actor_id: str, session_id: str, use_conversation_history: bool, timer: StageTimer):
+    """获取会话条目并拉取对话历史
+    
+    Returns:
+        (entry, conversation_history) 元组
+    """
+    entry = await timer.measure(
+        "session_manager",
+        asyncio.to_thread(session_cache.acquire, actor_id, session_id)
+    )
+    
+    conversation_history = []
+    if use_conversation_history:
+        try:
+            conversation_history = await timer.measure(
+                "history",
+                get_conversation_context(
+                    entry.session_manager,
+                    max_turns=10,
+                    turn_buffer=turn_buffer,
+                    session_key=(actor_id, session_id)
+                )
+            )
+        except BaseException:
+            session_cache.release(entry)
+            raise
+    return entry, conversation_history
+
+
+def _prewarm():
+    """预热 MCP 会话池、工具目录和 Agent 模板"""
+    try:
+        get_agent_template(_load_tools(_get_tool_catalog()))
+    except Exception as e:
+        logger.warning(f"Prewarm failed: {e}")
+
+
+def _bind_agent(entry, template, actor_id: str, session_id: str):
+    """获取绑定到会话条目的 Agent
+    
+    会话管理器只能绑定一个同 agent_id 的 Agent，因此缓存条目复用已绑定的 Agent；
+    Agent 模板变化（工具目录更新）时重建会话条目。
+    
+    Args:
+        entry: 会话缓存条目
+        template: 本次请求的 Agent 模板
+        actor_id: 用户标识
+        session_id: 会话标识
+    
+    Returns:
+        (entry, agent) 元组
+    """
+    if entry.agent is not None and entry.agent_template is not template:
+        session_cache.release(entry, discard=True)
+        entry = session_cache.acquire(actor_id, session_id)
+    
+    if entry.agent is None:
+        entry.agent = template.bind(entry.session_manager)
+        entry.agent_template = template
+    return entry, entry.agent
+
+
+# 启动时在后台预热，避免首个请求承担建连和模型客户端构建开销
+if PREWARM_ON_STARTUP:
+    threading.Thread(target=_prewarm, name="agent-prewarm", daemon=True).start()
+
+
 @app.entrypoint
 async def invoke(payload: Dict[str, Any], context):
     """
@@ -60,6 +217,14 @@ async def invoke(payload: Dict[str, Any], context):
     Yields:
         流式响应事件
     """
+    # 链路追踪：延续请求头中的上游 trace 上下文
+    with start_span("invoke", parent=extract_trace_context(context)) as span:
+        async for event in _invoke(payload, context, span):
+            yield event
+
+
+async def _invoke(payload: Dict[str, Any], context, span):
+    """处理一次请求，span 为本次请求的根 span"""
     # 验证 Memory 配置
     if not MEMORY_ID:
         logger.error("Memory not configured")
@@ -76,82 +241,143 @@ async def invoke(payload: Dict[str, Any], context):
     # 是否启用对话历史增强（默认启用）
     use_conversation_history = payload.get("use_history", True)
     
+    # 是否跳过工具结果缓存（默认不跳过）
+    bypass_tool_cache = payload.get("bypass_cache", False)
+    
+    timer = StageTimer()
+    entry = None
+    tool_selection = None
+    prefetch_batch = None
+    completed = False
     try:
         # 获取用户和会话信息
         actor_id, session_id = get_actor_and_session_id(context)
+        span.set_attribute("agentcore.actor_id", actor_id)
+        span.set_attribute("agentcore.session_id", session_id)
         logger.info(f"Processing request for actor: {actor_id}, session: {session_id}")
         
-        # 配置 Memory
-        memory_config = create_memory_config(MEMORY_ID, actor_id, session_id)
+        # 并发准备：会话管理器 + 对话历史（短期记忆） 与 MCP 会话 + 工具目录 同时进行
+        session_result, tools_result = await asyncio.gather(
+            _prepare_session(actor_id, session_id, use_conversation_history, timer),
+            timer.measure("tools", _load_tools_async()),
+            return_exceptions=True
+        )
+        if isinstance(session_result, BaseException):
+            raise session_result
+        entry, conversation_history = session_result
+        if isinstance(tools_result, BaseException):
+            raise tools_result
+        tools = tools_result
         
-        # 创建会话管理器
-        session_manager = AgentCoreMemorySessionManager(memory_config, REGION)
-        
-        # 获取对话历史（短期记忆）
-        conversation_history = []
-        if use_conversation_history:
-            conversation_history = await get_conversation_context(session_manager, max_turns=10)
+        # 已折叠进会话摘要的较早对话用摘要代替（只读取最新摘要，不等待摘要生成）
+        summary = ""
+        prompt_history = conversation_history
+        if use_conversation_history and session_summaries is not None:
+            snapshot = session_summaries.get((actor_id, session_id))
+            if snapshot is not None:
+                summary, prompt_history = snapshot.text, snapshot.turns
+                span.set_attribute("session_summary.folded_turns", snapshot.folded_turns)
         
         # 如果有对话历史，增强提示词
         enhanced_prompt = prompt
-        if conversation_history:
-            enhanced_prompt = build_context_aware_prompt(prompt, conversation_history)
+        if prompt_history or summary:
+            enhanced_prompt = build_context_aware_prompt(prompt, prompt_history, summary=summary)
             logger.info("Enhanced prompt with conversation history")
         
-        # 获取 MCP 客户端
-        mcp_client = _get_mcp_client()
+        # 从进程级模板获取 Agent（复用模型客户端和工具规格）
+        # 新建 Agent 时会话管理器会从 Memory 恢复会话（阻塞调用），因此放到线程池中执行
+        template = get_agent_template(tools)
+        if entry.agent is not None and entry.agent_template is template:
+            agent = entry.agent
+        else:
+            entry, agent = await timer.measure(
+                "agent",
+                asyncio.to_thread(_bind_agent, entry, template, actor_id, session_id)
+            )
+        
+        # 按问题和上一轮问题选择发给模型的工具子集（无法判断时提供全部工具）
+        if TOOL_ROUTING:
+            tool_selection = get_tool_router().route(
+                prompt, conversation_history, template.tool_names, template.tool_spec_tokens
+            )
+            span.set_attribute("tools.routes", tool_selection.routes)
         
-        # 准备基础工具
-        tools = [tavily_search]
+        # 问题提到已知地点时，与首次模型调用并行预取地理编码/路线规划，结果写入工具结果缓存
+        if PREFETCH_ENABLED and not bypass_tool_cache:
+            prefetch_batch = get_speculative_prefetcher().start(actor_id, prompt, conversation_history, tools)
+            if prefetch_batch is not None:
+                span.set_attribute("prefetch.calls", len(prefetch_batch.calls))
+        timer.mark("setup")
         
-        # 如果有 MCP 客户端，在其上下文中运行 Agent
-        if mcp_client:
-            with mcp_client:
-                # 在 MCP 上下文中加载百度地图工具
-                baidu_map_tools = mcp_client.list_tools_sync()
-                tools.extend(baidu_map_tools)
-                logger.info(f"Loaded {len(baidu_map_tools)} Baidu Maps tools")
-                
-                # 创建 Agent（在 MCP 上下文中）
-                agent = Agent(
-                    model=MODEL_ID,
-                    session_manager=session_manager,
-                    system_prompt=SYSTEM_PROMPT,
-                    tools=tools
-                )
-                
-                # 流式输出
-                stream = agent.stream_async(enhanced_prompt)
-                
-                async for event in stream:
-                    if isinstance(event, dict) and 'event' in event:
-                        event_data = event['event']
-                        if 'contentBlockDelta' in event_data:
-                            yield {"event": event_data}
-        else:
-            # 没有 MCP 客户端，只使用 Tavily 搜索
-            logger.info("Running without Baidu Maps tools")
-            agent = Agent(
-                model=MODEL_ID,
-                session_manager=session_manager,
-                system_prompt=SYSTEM_PROMPT,
-                tools=tools
+        # 流式输出（连续的文本增量合并为更大的帧，首个 token 立即输出）
+        stream = coalesce_text_deltas(agent.stream_async(
+            enhanced_prompt,
+            invocation_state={
+                BYPASS_TOOL_CACHE: bypass_tool_cache,
+                TOOL_SELECTION: tool_selection,
+                SPECULATIVE_PREFETCH: prefetch_batch
+            }
+        ))
+        response_chunks = []
+        cache_read_tokens = cache_write_tokens = 0
+        
+        async for event in stream:
+            if isinstance(event, dict) and 'event' in event:
+                event_data = event['event']
+                if 'contentBlockDelta' in event_data:
+                    if "first_token" not in timer.durations:
+                        timer.mark("first_token")
+                    text = event_data['contentBlockDelta'].get('delta', {}).get('text')
+                    if text:
+                        response_chunks.append(text)
+                    yield {"event": event_data}
+                elif 'metadata' in event_data:
+                    # 每次模型调用结束时的 token 用量（含提示词缓存读取/写入）
+                    usage = event_data['metadata'].get('usage', {})
+                    get_model_token_usage().record(usage)
+                    cache_read_tokens += usage.get('cacheReadInputTokens', 0)
+                    cache_write_tokens += usage.get('cacheWriteInputTokens', 0)
+        span.set_attribute("model.cache_read_input_tokens", cache_read_tokens)
+        span.set_attribute("model.cache_write_input_tokens", cache_write_tokens)
+        
+        # 写穿：把本轮对话追加到进程内缓冲，供下一轮直接使用（会话首轮完成时填充缓冲）
+        turn_buffer.record(
+            (actor_id, session_id),
+            [{'role': 'user', 'content': prompt}, {'role': 'assistant', 'content': ''.join(response_chunks)}],
+            history=conversation_history if use_conversation_history else None
+        )
+        
+        # 更新会话摘要（在后台线程中折叠，不阻塞本次响应）
+        if session_summaries is not None:
+            session_summaries.record(
+                (actor_id, session_id),
+                [{'role': 'user', 'content': prompt}, {'role': 'assistant', 'content': ''.join(response_chunks)}],
+                history=conversation_history
             )
-            
-            # 流式输出
-            stream = agent.stream_async(enhanced_prompt)
-            
-            async for event in stream:
-                if isinstance(event, dict) and 'event' in event:
-                    event_data = event['event']
-                    if 'contentBlockDelta' in event_data:
-                        yield {"event": event_data}
         
-        logger.info("Request completed successfully")
+        completed = True
+        timer.mark("total")
+        logger.info(f"Request completed successfully (session cache: {session_cache.stats()})")
+        logger.info(f"Request timings: {timer.summary()}")
         
     except Exception as e:
+        mark_error(span, e)
         logger.exception(f"Agent execution failed: {e}")
         yield {"error": f"Agent execution failed: {str(e)}"}
+    finally:
+        record_stage_timings(timer.durations, outcome="success" if completed else "error")
+        if tool_selection is not None:
+            get_tool_router().record(tool_selection)
+            span.set_attribute("tools.spec_tokens_saved", tool_selection.tokens_saved)
+            logger.info(f"Tool specs: routes={tool_selection.routes or 'all'}, "
+                        f"tokens sent={tool_selection.tokens_sent}, saved={tool_selection.tokens_saved}")
+        if prefetch_batch is not None:
+            get_speculative_prefetcher().finish(prefetch_batch)
+            span.set_attribute("prefetch.used", prefetch_batch.used)
+            logger.info(f"Prefetch: used={prefetch_batch.used}, wasted={prefetch_batch.wasted}")
+        if entry is not None:
+            # 未正常完成的请求不再复用该会话的 Agent
+            session_cache.release(entry, discard=not completed)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,126 @@
+"""
+Agent 模板
+
+每次请求都用模型 ID 字符串构建 Agent 时，strands 会重新创建 BedrockModel
+（boto3 会话、凭证解析、客户端构建），并重新校验工具规格。模板在进程内只构建一次
+模型客户端和工具列表，请求时只需绑定会话管理器即可得到一个新的 Agent。
+"""
+
+import json
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+from strands import Agent
+from strands.models import BedrockModel, CacheConfig
+
+from src.agent.tool_executor import get_tool_executor
+from src.agent.tool_router import ToolRoutingModel, spec_tokens
+from src.config import BEDROCK_ENDPOINT_URL, MODEL_ID, PROMPT_CACHE, PROMPT_CACHE_TTL, REGION
+from src.utils.metrics import tool_metrics_hook
+from src.utils.prompts import SYSTEM_PROMPT
+
+logger = logging.getLogger(__name__)
+
+
+def create_model(**kwargs: Any) -> BedrockModel:
+    """按配置创建 Bedrock 模型客户端
+
+    PROMPT_CACHE 开启时在工具定义和系统提示词之后插入 cachePoint，两者作为可缓存的前缀；
+    前缀低于模型的最小缓存 token 数时 Bedrock 不会缓存（缓存读取/写入的 token 数为 0）。
+    """
+    if PROMPT_CACHE:
+        kwargs.setdefault("cache_config", CacheConfig(
+            strategy="auto", ttl=PROMPT_CACHE_TTL or None, system_prompt_ttl=True, tools_ttl=True
+        ))
+    kwargs.setdefault("endpoint_url", BEDROCK_ENDPOINT_URL or None)
+    return BedrockModel(model_id=MODEL_ID, region_name=REGION, **kwargs)
+
+
+class AgentTemplate:
+    """预构建的 Agent 模板（模型客户端 + 工具列表 + 序列化的工具规格）
+
+    绑定的 Agent 使用 ToolRoutingModel 包装的模型，按请求的 ToolSelection 只发送部分工具规格；
+    同一轮的多个工具调用由 BoundedToolExecutor 按后端限制并发执行。
+    """
+
+    def __init__(
+        self,
+        tools: List[Any],
+        model: Optional[BedrockModel] = None,
+        system_prompt: str = SYSTEM_PROMPT
+    ):
+        """
+        Args:
+            tools: Agent 可用的工具列表
+            model: 共享的模型客户端，默认按 MODEL_ID 新建
+            system_prompt: 系统提示词
+        """
+        self.model = model or create_model()
+        self.system_prompt = system_prompt
+        # 按工具名排序：MCP 工具目录刷新后顺序不变，工具定义（可缓存前缀的一部分）逐字节一致
+        self.tools = sorted(tools, key=lambda tool: tool.tool_name)
+        self.tool_specs: List[Dict[str, Any]] = [tool.tool_spec for tool in self.tools]
+        self.serialized_tool_specs = json.dumps(self.tool_specs, sort_keys=True, ensure_ascii=False, default=str)
+        self.tool_names = [spec["name"] for spec in self.tool_specs]
+        self.tool_spec_tokens: Dict[str, int] = {spec["name"]: spec_tokens(spec) for spec in self.tool_specs}
+        self._routed_model = ToolRoutingModel(self.model)
+        self._tool_ids = tuple(id(tool) for tool in tools)
+
+    def matches(self, tools: List[Any]) -> bool:
+        """判断模板是否由同一组工具对象构建"""
+        return self._tool_ids == tuple(id(tool) for tool in tools)
+
+    def with_tools(self, tools: List[Any]) -> "AgentTemplate":
+        """基于同一个模型客户端构建使用另一组工具的模板"""
+        return AgentTemplate(tools, model=self.model, system_prompt=self.system_prompt)
+
+    def bind(self, session_manager=None, **kwargs: Any) -> Agent:
+        """把模板绑定到本次请求的会话管理器，返回新的 Agent
+
+        Args:
+            session_manager: AgentCore Memory 会话管理器
+            **kwargs: 透传给 Agent 的其他参数
+
+        Returns:
+            Agent 实例
+        """
+        hooks = [tool_metrics_hook, *kwargs.pop("hooks", [])]
+        kwargs.setdefault("tool_executor", get_tool_executor())
+        return Agent(
+            model=self._routed_model,
+            session_manager=session_manager,
+            system_prompt=self.system_prompt,
+            tools=self.tools,
+            hooks=hooks,
+            **kwargs
+        )
+
+
+_template: Optional[AgentTemplate] = None
+_template_lock = threading.Lock()
+
+
+def get_agent_template(tools: List[Any]) -> AgentTemplate:
+    """获取进程级共享的 Agent 模板
+
+    工具目录未变化时（工具对象相同）直接复用；变化时复用模型客户端，只重建工具部分。
+
+    Args:
+        tools: 本次请求的工具列表
+
+    Returns:
+        AgentTemplate 实例
+    """
+    global _template
+    template = _template
+    if template is not None and template.matches(tools):
+        return template
+
+    with _template_lock:
+        if _template is None:
+            _template = AgentTemplate(tools)
+            logger.info(f"Built agent template with {len(tools)} tools")
+        elif not _template.matches(tools):
+            _template = _template.with_tools(tools)
+            logger.info(f"Rebuilt agent template tools ({len(tools)} tools)")
+        return _template
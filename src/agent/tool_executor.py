@@ -0,0 +1,110 @@
+"""
+同一轮模型输出中多个工具调用的并发执行
+
+模型在一轮输出中请求多个相互独立的工具调用时（多个目的地的路线、多个地点检索），
+这些调用并发执行，每个后端（百度地图 MCP、Tavily）同时进行的调用数有上限，
+工具结果按模型请求的顺序返回给模型。上限按请求计算（同一个请求的多轮工具调用共享），
+不同请求之间互不影响。
+"""
+
+import asyncio
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from strands.tools.executors import ConcurrentToolExecutor
+
+from src.config import TOOL_PARALLELISM
+from src.tools.baidu_maps import PooledMCPTool
+
+# invocation_state 中的键：本次请求各后端的并发限制（信号量）
+_BACKEND_LIMITS = "tool_backend_limits"
+
+
+def tool_backend(tool: Any) -> Optional[str]:
+    """工具所属的后端，不限制并发的工具返回 None"""
+    if isinstance(tool, PooledMCPTool):
+        return "baidu_maps"
+    if getattr(tool, "tool_name", None) == "tavily_search":
+        return "tavily"
+    return None
+
+
+class BoundedToolExecutor(ConcurrentToolExecutor):
+    """按后端限制并发数的并发工具执行器
+
+    在 strands 的 ConcurrentToolExecutor 之上，为每个工具调用先取得所属后端的信号量；
+    结果顺序由 ConcurrentToolExecutor 保证（按 toolUse 的顺序汇总）。
+    """
+
+    def __init__(self, limits: Optional[Dict[str, int]] = None):
+        """
+        Args:
+            limits: 后端 -> 每个请求同时进行的最大调用数，默认使用 TOOL_PARALLELISM
+        """
+        super().__init__()
+        self.limits = dict(TOOL_PARALLELISM if limits is None else limits)
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, Any]] = {}
+
+    def _semaphore(self, invocation_state: Dict[str, Any], backend: str) -> Optional[asyncio.Semaphore]:
+        limit = self.limits.get(backend, 0)
+        if limit <= 0:
+            return None
+        semaphores = invocation_state.setdefault(_BACKEND_LIMITS, {})
+        if backend not in semaphores:
+            semaphores[backend] = asyncio.Semaphore(limit)
+        return semaphores[backend]
+
+    def _record(self, backend: str, queued_ms: float) -> None:
+        with self._lock:
+            counters = self._stats.setdefault(backend, {"calls": 0, "queued": 0, "queued_ms": 0.0})
+            counters["calls"] += 1
+            if queued_ms > 0:
+                counters["queued"] += 1
+                counters["queued_ms"] += queued_ms
+
+    async def _task(
+        self,
+        agent,
+        tool_use,
+        tool_results,
+        cycle_trace,
+        cycle_span,
+        invocation_state,
+        task_id,
+        task_queue,
+        task_event,
+        stop_event,
+        structured_output_context
+    ) -> None:
+        """取得后端的信号量后执行单个工具调用"""
+        args = (agent, tool_use, tool_results, cycle_trace, cycle_span, invocation_state,
+                task_id, task_queue, task_event, stop_event, structured_output_context)
+        backend = tool_backend(agent.tool_registry.registry.get(tool_use["name"]))
+        semaphore = self._semaphore(invocation_state, backend) if backend else None
+        if semaphore is None:
+            await super()._task(*args)
+            return
+
+        queued = semaphore.locked()
+        start = time.perf_counter()
+        async with semaphore:
+            self._record(backend, (time.perf_counter() - start) * 1000 if queued else 0.0)
+            await super()._task(*args)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """按后端统计工具调用数、因并发上限排队的调用数和排队耗时"""
+        with self._lock:
+            return {
+                backend: {**counters, "limit": self.limits.get(backend, 0)}
+                for backend, counters in self._stats.items()
+            }
+
+
+_executor = BoundedToolExecutor()
+
+
+def get_tool_executor() -> BoundedToolExecutor:
+    """获取进程级工具执行器"""
+    return _executor
@@ -0,0 +1,195 @@
+"""
+按用户问题选择本次请求提供给模型的工具子集
+
+每次模型调用都会把全部工具（Tavily 搜索 + 百度地图 MCP 工具）的 JSON Schema 作为输入 token
+发给模型。路由器按用户问题（追问时结合上一轮问题）匹配工具分组，例如导航问题只提供路线和
+路况工具，"附近…"只提供地点检索工具，股价只提供搜索；无法判断时提供全部工具。
+
+Agent 的工具注册表不变（模型仍可调用任何已注册的工具），只过滤发给模型的工具规格：
+ToolRoutingModel 从 invocation_state 读取本次请求的 ToolSelection 并过滤 tool_specs。
+"""
+
+import json
+import re
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from strands.models.model import Model
+
+from src.utils.history import estimate_tokens
+from src.utils.memory import current_question
+
+# invocation_state 中的键：本次请求的 ToolSelection
+TOOL_SELECTION = "tool_selection"
+
+# 工具分组：(名称, 正则, 工具名)
+ROUTES: List[Tuple[str, "re.Pattern", Tuple[str, ...]]] = [
+    ("navigation", re.compile(r"导航|路线|怎么走|走哪|多久|多远|多长时间|到达|到家|出发|过去|去|回家|来得及|迟到|顺序|第.站|全程|打车|开车|自驾"),
+     ("map_directions", "map_directions_matrix", "map_geocode")),
+    ("traffic", re.compile(r"路况|拥堵|堵|事故|限行|红绿灯|施工|封路|团雾|交通"),
+     ("map_road_traffic", "map_geocode")),
+    ("places", re.compile(r"附近|周边|沿途|途中|顺路|找|推荐|哪家|餐厅|吃|加油站|充电桩|停车|4S|便利店|服务区|休息区|住宿|景点|地铁|母婴室|轮椅|酒店"),
+     ("map_search_places", "map_place_details", "map_geocode", "map_reverse_geocode")),
+    ("weather", re.compile(r"天气|下雨|雨天|下雪|雾|气温|温度"),
+     ("map_weather",)),
+    ("location", re.compile(r"我在哪|当前位置|现在在哪|这是哪"),
+     ("map_ip_location", "map_reverse_geocode")),
+    ("search", re.compile(r"股价|新闻|汇率|最新|油价|价格|收费|费用|评价|营业时间|预约|限行|政策|航班|延误", re.IGNORECASE),
+     ("tavily_search",)),
+]
+
+# 指代上文的追问：结合上一轮问题选择工具
+_FOLLOW_UP = re.compile(r"那个|那家|那里|那边|这条|这个|如果|哪个|还有|换")
+
+# 分组中出现过的工具；其他工具（如 MCP 服务新增的工具）始终提供
+KNOWN_TOOLS = frozenset(name for _, _, names in ROUTES for name in names)
+
+
+def spec_tokens(tool_spec: Dict[str, Any]) -> int:
+    """估算一个工具规格的输入 token 数"""
+    return estimate_tokens(json.dumps(tool_spec, ensure_ascii=False, default=str))
+
+
+class ToolSelection:
+    """一次请求的工具子集，以及实际发给模型的工具规格 token 数
+
+    names 为 None 时提供全部工具。
+    """
+
+    def __init__(self, names: Optional[frozenset], routes: List[str], spec_token_counts: Optional[Dict[str, int]] = None):
+        self.names = names
+        self.routes = routes
+        self.spec_token_counts = spec_token_counts or {}
+        self.model_calls = 0
+        self.tokens_full = 0
+        self.tokens_sent = 0
+        self._lock = threading.Lock()
+
+    @property
+    def fallback(self) -> bool:
+        return self.names is None
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_full - self.tokens_sent
+
+    def _tokens(self, tool_spec: Dict[str, Any]) -> int:
+        name = tool_spec.get("name")
+        if name not in self.spec_token_counts:
+            self.spec_token_counts[name] = spec_tokens(tool_spec)
+        return self.spec_token_counts[name]
+
+    def filter(self, tool_specs: Optional[List[Dict[str, Any]]]) -> Optional[List[Dict[str, Any]]]:
+        """过滤一次模型调用的工具规格（过滤后为空时保留全部），并累计 token 数"""
+        if not tool_specs:
+            return tool_specs
+        selected = tool_specs
+        if self.names is not None:
+            selected = [spec for spec in tool_specs if spec.get("name") in self.names] or tool_specs
+        with self._lock:
+            self.model_calls += 1
+            self.tokens_full += sum(self._tokens(spec) for spec in tool_specs)
+            self.tokens_sent += sum(self._tokens(spec) for spec in selected)
+        return selected
+
+
+class ToolRouter:
+    """按问题和对话状态选择工具子集"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "routed": 0, "fallbacks": 0, "model_calls": 0, "spec_tokens_sent": 0, "spec_tokens_saved": 0}
+
+    @staticmethod
+    def _match(text: str) -> List[str]:
+        return [name for name, pattern, _ in ROUTES if pattern.search(text)]
+
+    def route(
+        self,
+        prompt: str,
+        history: Optional[List[Dict[str, Any]]] = None,
+        tool_names: Optional[List[str]] = None,
+        spec_token_counts: Optional[Dict[str, int]] = None
+    ) -> ToolSelection:
+        """选择本次请求的工具子集
+
+        追问（"那里有停车场吗"）或问题本身匹配不到分组时，结合上一轮用户问题；仍匹配不到时提供全部工具。
+
+        Args:
+            prompt: 用户输入
+            history: 对话历史（role/content 字典列表）
+            tool_names: 已注册的工具名，用于保留分组之外的工具
+            spec_token_counts: 工具名 -> 工具规格 token 数（预先计算，可选）
+
+        Returns:
+            ToolSelection
+        """
+        routes = self._match(prompt)
+        if not routes or _FOLLOW_UP.search(prompt):
+            previous = next((turn.get("content") or "" for turn in reversed(history or []) if turn.get("role") == "user"), "")
+            routes += [name for name in self._match(current_question(previous)) if name not in routes]
+
+        if not routes:
+            return ToolSelection(None, [], spec_token_counts)
+        names = {name for route, _, tools in ROUTES if route in routes for name in tools}
+        names.update(name for name in tool_names or [] if name not in KNOWN_TOOLS)
+        return ToolSelection(frozenset(names), routes, spec_token_counts)
+
+    def record(self, selection: ToolSelection) -> None:
+        """请求结束后累计该请求的工具规格 token 数"""
+        with self._lock:
+            self._stats["requests"] += 1
+            self._stats["fallbacks" if selection.fallback else "routed"] += 1
+            self._stats["model_calls"] += selection.model_calls
+            self._stats["spec_tokens_sent"] += selection.tokens_sent
+            self._stats["spec_tokens_saved"] += selection.tokens_saved
+
+    def stats(self) -> Dict[str, Any]:
+        """返回路由计数器快照"""
+        with self._lock:
+            return dict(self._stats)
+
+
+class ToolRoutingModel(Model):
+    """包装模型：按 invocation_state 中的 ToolSelection 过滤发给模型的工具规格"""
+
+    def __init__(self, model: Model):
+        self.model = model
+
+    @property
+    def stateful(self) -> bool:
+        return self.model.stateful
+
+    @property
+    def context_window_limit(self) -> Optional[int]:
+        return self.model.context_window_limit
+
+    def __getattr__(self, name: str) -> Any:
+        # config 等模型自身的属性
+        return getattr(self.model, name)
+
+    def update_config(self, **model_config: Any) -> None:
+        self.model.update_config(**model_config)
+
+    def get_config(self) -> Any:
+        return self.model.get_config()
+
+    def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        return self.model.structured_output(output_model, prompt, system_prompt=system_prompt, **kwargs)
+
+    async def count_tokens(self, messages, tool_specs=None, system_prompt=None, system_prompt_content=None) -> int:
+        return await self.model.count_tokens(messages, tool_specs, system_prompt, system_prompt_content)
+
+    def stream(self, messages, tool_specs=None, system_prompt=None, **kwargs):
+        selection = (kwargs.get("invocation_state") or {}).get(TOOL_SELECTION)
+        if selection is not None:
+            tool_specs = selection.filter(tool_specs)
+        return self.model.stream(messages, tool_specs, system_prompt, **kwargs)
+
+
+_router = ToolRouter()
+
+
+def get_tool_router() -> ToolRouter:
+    """获取进程级工具路由器"""
+    return _router
@@ -1,4 +1,5 @@
 """配置管理"""
+import json
 import os
 from dotenv import load_dotenv
 
@@ -15,5 +16,117 @@ BAIDU_API_KEY = os.getenv("BAIDU_MAPS_API_KEY","baidu-key")
 TAVILY_API_KEY = os.getenv("TAVILY_API_KEY","tavily-key")
 
 # API 配置
-TAVILY_API_URL = "https://api.tavily.com/search"
+TAVILY_API_URL = os.getenv("TAVILY_API_URL", "https://api.tavily.com/search")
 REQUEST_TIMEOUT = 30
+
+# 百度地图 MCP 会话池配置
+BAIDU_MCP_SSE_URL = os.getenv("BAIDU_MCP_SSE_URL", "https://mcp.map.baidu.com/sse")
+BAIDU_MCP_POOL_SIZE = int(os.getenv("BAIDU_MCP_POOL_SIZE", "2"))
+BAIDU_MCP_HEALTH_CHECK_INTERVAL = float(os.getenv("BAIDU_MCP_HEALTH_CHECK_INTERVAL", "30"))
+BAIDU_TOOL_CATALOG_TTL = float(os.getenv("BAIDU_TOOL_CATALOG_TTL", "600"))
+
+# 百度地图工具结果缓存有效期（秒），按工具名配置，0 表示不缓存
+# 可通过 BAIDU_TOOL_CACHE_TTLS 环境变量（JSON）覆盖，如 {"map_search_places": 120}
+BAIDU_TOOL_CACHE_TTLS = {
+    "map_geocode": 6 * 3600,
+    "map_reverse_geocode": 6 * 3600,
+    "map_place_details": 3600,
+    "map_ip_location": 600,
+    "map_search_places": 300,
+    "map_directions": 60,
+    "map_directions_matrix": 60,
+    "map_weather": 60,
+    "map_road_traffic": 0,
+}
+BAIDU_TOOL_CACHE_TTLS.update(json.loads(os.getenv("BAIDU_TOOL_CACHE_TTLS", "{}")))
+# 未在上表中列出的工具的缓存有效期（秒）
+BAIDU_TOOL_CACHE_DEFAULT_TTL = float(os.getenv("BAIDU_TOOL_CACHE_DEFAULT_TTL", "0"))
+# 每个工具的结果缓存最大占用字节数
+BAIDU_TOOL_CACHE_MAX_BYTES = int(os.getenv("BAIDU_TOOL_CACHE_MAX_BYTES", str(8 * 1024 * 1024)))
+
+# 附近 POI 空间索引：最多保留的 POI 数、POI 和已检索区域的有效期（秒）、网格单元边长（度）
+POI_INDEX_MAX_POINTS = int(os.getenv("POI_INDEX_MAX_POINTS", "100000"))
+POI_INDEX_MAX_AGE = float(os.getenv("POI_INDEX_MAX_AGE", "900"))
+POI_INDEX_CELL_DEGREES = float(os.getenv("POI_INDEX_CELL_DEGREES", "0.01"))
+
+# 按用户问题只向模型提供相关的工具子集（false 时始终提供全部工具）
+TOOL_ROUTING = os.getenv("TOOL_ROUTING", "true").lower() == "true"
+
+# 推测性预取：问题提到已知地点（家、公司等）时，在首次模型调用的同时预先调用地理编码/路线工具并写入工具结果缓存。
+# 每个请求最多预取的调用数、进程内同时进行的预取调用上限、最多记住已知地点的用户数
+PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "true").lower() == "true"
+PREFETCH_MAX_CALLS_PER_REQUEST = int(os.getenv("PREFETCH_MAX_CALLS_PER_REQUEST", "3"))
+PREFETCH_MAX_IN_FLIGHT = int(os.getenv("PREFETCH_MAX_IN_FLIGHT", "16"))
+KNOWN_PLACES_MAX_ACTORS = int(os.getenv("KNOWN_PLACES_MAX_ACTORS", "10000"))
+
+# 同一轮模型输出中的多个工具调用并发执行，每个请求各后端同时进行的最大调用数（0 表示不限制）
+# 可通过 TOOL_PARALLELISM 环境变量（JSON）覆盖，如 {"baidu_maps": 8}
+TOOL_PARALLELISM = {"baidu_maps": 4, "tavily": 4}
+TOOL_PARALLELISM.update(json.loads(os.getenv("TOOL_PARALLELISM", "{}")))
+
+# 提示词前缀缓存：在工具定义和系统提示词之后插入 Bedrock cachePoint，缓存有效期（如 5m、1h，为空时使用默认值）
+PROMPT_CACHE = os.getenv("PROMPT_CACHE", "true").lower() == "true"
+PROMPT_CACHE_TTL = os.getenv("PROMPT_CACHE_TTL", "")
+# Bedrock Runtime 自定义端点（VPC 端点或本地替身服务），为空时使用默认端点
+BEDROCK_ENDPOINT_URL = os.getenv("BEDROCK_ENDPOINT_URL", "")
+
+# 启动时预热百度地图会话池和工具目录
+PREWARM_ON_STARTUP = os.getenv("PREWARM_ON_STARTUP", "true").lower() == "true"
+
+# 会话管理器缓存配置
+SESSION_CACHE_MAX_SIZE = int(os.getenv("SESSION_CACHE_MAX_SIZE", "256"))
+SESSION_CACHE_IDLE_TTL = float(os.getenv("SESSION_CACHE_IDLE_TTL", "900"))
+
+# 进程内最近对话缓冲配置
+RECENT_TURNS_MAX_TURNS = int(os.getenv("RECENT_TURNS_MAX_TURNS", "10"))
+RECENT_TURNS_MAX_SESSIONS = int(os.getenv("RECENT_TURNS_MAX_SESSIONS", "1024"))
+
+# 长期记忆检索缓存：有效期（秒）、最大占用字节数；写入新的对话事件后，该用户的缓存最迟在
+# MEMORY_EXTRACTION_DELAY 秒后失效（长期记忆由对话事件异步抽取，0 表示写入后立即失效）
+MEMORY_RETRIEVAL_CACHE_TTL = float(os.getenv("MEMORY_RETRIEVAL_CACHE_TTL", "300"))
+MEMORY_RETRIEVAL_CACHE_MAX_BYTES = int(os.getenv("MEMORY_RETRIEVAL_CACHE_MAX_BYTES", str(8 * 1024 * 1024)))
+MEMORY_EXTRACTION_DELAY = float(os.getenv("MEMORY_EXTRACTION_DELAY", "60"))
+# 并发检索各命名空间的线程数（进程内共享）
+MEMORY_RETRIEVAL_WORKERS = int(os.getenv("MEMORY_RETRIEVAL_WORKERS", "16"))
+
+# 按用户输入选择检索的长期记忆命名空间（本地意图分类器），以及检索某个命名空间的最低概率
+MEMORY_INTENT_ROUTING = os.getenv("MEMORY_INTENT_ROUTING", "true").lower() == "true"
+MEMORY_INTENT_THRESHOLD = float(os.getenv("MEMORY_INTENT_THRESHOLD", "0.5"))
+
+# 对话历史压缩：注入提示词的对话历史 token 预算、保留原文的最近对话条数、较早的每条对话压缩后的最大 token 数
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "600"))
+HISTORY_KEEP_RECENT_TURNS = int(os.getenv("HISTORY_KEEP_RECENT_TURNS", "2"))
+HISTORY_OLDER_TURN_MAX_TOKENS = int(os.getenv("HISTORY_OLDER_TURN_MAX_TOKENS", "80"))
+
+# 会话滚动摘要：摘要方式（extractive 抽取式 / model 调用模型 / off 关闭）、保留原文的最近对话条数、
+# 摘要最大 token 数、最多保留的会话数、后台折叠线程数
+SESSION_SUMMARY_MODE = os.getenv("SESSION_SUMMARY_MODE", "extractive")
+SESSION_SUMMARY_KEEP_TURNS = int(os.getenv("SESSION_SUMMARY_KEEP_TURNS", "6"))
+SESSION_SUMMARY_MAX_TOKENS = int(os.getenv("SESSION_SUMMARY_MAX_TOKENS", "300"))
+SESSION_SUMMARY_MAX_SESSIONS = int(os.getenv("SESSION_SUMMARY_MAX_SESSIONS", "1024"))
+SESSION_SUMMARY_WORKERS = int(os.getenv("SESSION_SUMMARY_WORKERS", "2"))
+
+# Tavily HTTP 连接池配置
+# 连接池拆分为多个分片（每个分片一个 httpx.AsyncClient），避免单个连接池在高并发下调度开销过大
+TAVILY_MAX_CONNECTIONS = int(os.getenv("TAVILY_MAX_CONNECTIONS", "64"))
+TAVILY_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("TAVILY_MAX_KEEPALIVE_CONNECTIONS", "64"))
+TAVILY_KEEPALIVE_EXPIRY = float(os.getenv("TAVILY_KEEPALIVE_EXPIRY", "60"))
+TAVILY_MAX_PER_HOST = int(os.getenv("TAVILY_MAX_PER_HOST", "64"))
+TAVILY_POOL_SHARDS = int(os.getenv("TAVILY_POOL_SHARDS", "8"))
+
+# Tavily 搜索结果缓存
+# 有效期（秒）、过期后仍可提供旧值并后台刷新的窗口（秒）、错误结果缓存时间（秒）、最大占用字节数
+TAVILY_CACHE_TTL = float(os.getenv("TAVILY_CACHE_TTL", "300"))
+TAVILY_CACHE_STALE_TTL = float(os.getenv("TAVILY_CACHE_STALE_TTL", "600"))
+TAVILY_CACHE_NEGATIVE_TTL = float(os.getenv("TAVILY_CACHE_NEGATIVE_TTL", "30"))
+TAVILY_CACHE_MAX_BYTES = int(os.getenv("TAVILY_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+
+# 流式输出文本增量合并：合并时间窗口（毫秒，0 表示不合并）与单帧最大字节数
+STREAM_COALESCE_WINDOW_MS = float(os.getenv("STREAM_COALESCE_WINDOW_MS", "30"))
+STREAM_COALESCE_MAX_BYTES = int(os.getenv("STREAM_COALESCE_MAX_BYTES", "256"))
+# 合并时读取上游事件的队列上限（事件数，至少为 1）：队列满时模型流等待下游消费，避免慢速客户端导致整段响应堆积在内存中
+STREAM_COALESCE_QUEUE_SIZE = int(os.getenv("STREAM_COALESCE_QUEUE_SIZE", "64"))
+
+# 链路追踪导出方式（逗号分隔）：console、file、otlp；为空时不导出
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "")
+TRACING_FILE = os.getenv("TRACING_FILE", "traces.jsonl")
@@ -1,26 +1,791 @@
 """百度地图 MCP 工具"""
+import asyncio
+import hashlib
+import itertools
+import json
 import logging
-from typing import Optional
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from mcp.client.sse import sse_client
-from strands.tools.mcp import MCPClient
-from src.config import BAIDU_API_KEY
+from strands.tools.mcp import MCPAgentTool, MCPClient
+from strands.types._events import ToolResultEvent
+from strands.types.exceptions import MCPClientInitializationError
+from src.config import (
+    BAIDU_API_KEY,
+    BAIDU_MCP_SSE_URL,
+    BAIDU_MCP_POOL_SIZE,
+    BAIDU_MCP_HEALTH_CHECK_INTERVAL,
+    BAIDU_TOOL_CATALOG_TTL,
+    BAIDU_TOOL_CACHE_TTLS,
+    BAIDU_TOOL_CACHE_DEFAULT_TTL,
+    BAIDU_TOOL_CACHE_MAX_BYTES,
+    POI_INDEX_MAX_POINTS,
+    POI_INDEX_MAX_AGE,
+    POI_INDEX_CELL_DEGREES
+)
+from src.utils.cache import MISS, TTLCache
+from src.utils.metrics import get_metrics_registry, observe_stage
+from src.utils.spatial_index import SpatialIndex
+from src.utils.singleflight import SingleFlight, get_single_flight
+from src.utils.tracing import start_span
 
 logger = logging.getLogger(__name__)
 
 
 def initialize_baidu_mcp_client() -> Optional[MCPClient]:
     """初始化百度地图 MCP 客户端
-    
+
     Returns:
         MCPClient 实例或 None（如果初始化失败）
     """
     if not BAIDU_API_KEY:
         logger.warning("BAIDU_MAPS_API_KEY not set, Baidu Maps features unavailable")
         return None
-    
+
     try:
-        baidu_map_sse_url = f"https://mcp.map.baidu.com/sse?ak={BAIDU_API_KEY}"
+        baidu_map_sse_url = f"{BAIDU_MCP_SSE_URL}?ak={BAIDU_API_KEY}"
         return MCPClient(lambda: sse_client(baidu_map_sse_url))
     except Exception as e:
         logger.error(f"Failed to initialize Baidu MCP client: {e}")
         return None
+
+
+# invocation_state 中的键：为 True 时本次请求跳过工具结果缓存（仍会用新结果更新缓存）
+BYPASS_TOOL_CACHE = "bypass_tool_cache"
+# invocation_state 中的键：本次请求的推测性预取批次（src/tools/prefetch.py），工具调用时认领预取结果
+SPECULATIVE_PREFETCH = "speculative_prefetch"
+
+
+def arguments_key(arguments: Dict[str, Any]) -> str:
+    """规范化的工具参数（缓存和 single-flight 的键）"""
+    return json.dumps(arguments, sort_keys=True, ensure_ascii=False, default=str)
+
+
+class BaiduToolResultCache:
+    """百度地图工具结果缓存
+
+    按 (工具名, 规范化参数) 缓存成功的工具结果，每个工具使用独立的有效期和容量：
+    地理编码等确定性结果缓存数小时，POI 搜索缓存数分钟，路况等实时数据不缓存。
+    """
+
+    def __init__(
+        self,
+        ttls: Optional[Dict[str, float]] = None,
+        default_ttl: float = BAIDU_TOOL_CACHE_DEFAULT_TTL,
+        max_bytes: int = BAIDU_TOOL_CACHE_MAX_BYTES
+    ):
+        """
+        Args:
+            ttls: 按工具名的有效期（秒），0 表示不缓存
+            default_ttl: 未列出的工具的有效期（秒）
+            max_bytes: 每个工具的缓存最大占用字节数
+        """
+        self.ttls = dict(BAIDU_TOOL_CACHE_TTLS if ttls is None else ttls)
+        self.default_ttl = default_ttl
+        self.max_bytes = max_bytes
+        self._caches: Dict[str, TTLCache] = {}
+        self._lock = threading.Lock()
+
+    def ttl_for(self, name: str) -> float:
+        """工具结果的缓存有效期（秒）"""
+        return self.ttls.get(name, self.default_ttl)
+
+    def _cache_for(self, name: str) -> Optional[TTLCache]:
+        ttl = self.ttl_for(name)
+        if ttl <= 0:
+            return None
+        cache = self._caches.get(name)
+        if cache is None:
+            with self._lock:
+                cache = self._caches.setdefault(name, TTLCache(ttl=ttl, max_bytes=self.max_bytes))
+        return cache
+
+    def cacheable(self, name: str) -> bool:
+        """该工具的结果是否缓存"""
+        return self.ttl_for(name) > 0
+
+    def contains(self, name: str, arguments_key: str) -> bool:
+        """是否已缓存（不计入命中统计）"""
+        cache = self._cache_for(name)
+        return cache is not None and cache.contains(arguments_key)
+
+    def get(self, name: str, arguments_key: str) -> Optional[Dict[str, Any]]:
+        """查询缓存的工具结果，未命中或该工具不缓存时返回 None"""
+        cache = self._cache_for(name)
+        if cache is None:
+            return None
+        state, result = cache.lookup(arguments_key)
+        return None if state == MISS else result
+
+    def put(self, name: str, arguments_key: str, result: Dict[str, Any], cost_ms: float = 0.0) -> None:
+        """缓存成功的工具结果（失败结果不缓存）"""
+        cache = self._cache_for(name)
+        if cache is not None and result.get("status") == "success":
+            cache.put(arguments_key, result, cost_ms=cost_ms)
+
+    def clear(self) -> None:
+        """清空所有工具的缓存"""
+        for cache in list(self._caches.values()):
+            cache.clear()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """按工具统计命中率、节省的延迟等"""
+        return {name: {**cache.stats(), "ttl": cache.ttl} for name, cache in list(self._caches.items())}
+
+
+_tool_result_cache = BaiduToolResultCache()
+get_metrics_registry().register_stats("baidu_tool_cache", _tool_result_cache.stats)
+
+
+def get_baidu_tool_result_cache() -> BaiduToolResultCache:
+    """获取进程级百度地图工具结果缓存"""
+    return _tool_result_cache
+
+
+# 周边检索工具：结果写入 POI 空间索引，已检索过的区域内的检索可以直接从索引回答
+POI_SEARCH_TOOL = "map_search_places"
+# 从索引回答时，参数未指定 page_size 的默认返回条数
+POI_LOOKUP_DEFAULT_LIMIT = 20
+
+
+def _parse_lat_lng(value: Any) -> Optional[Tuple[float, float]]:
+    """解析 "纬度,经度" 字符串或 {"lat": ..., "lng": ...} 字典"""
+    try:
+        if isinstance(value, dict):
+            return float(value["lat"]), float(value["lng"])
+        if isinstance(value, str):
+            lat, lng = value.split(",")
+            return float(lat), float(lng)
+    except (KeyError, TypeError, ValueError):
+        pass
+    return None
+
+
+def _extract_search_body(result: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """从工具结果中提取周边检索的响应体（百度地图返回的 JSON 在 text 内容中）"""
+    for item in result.get("content", []):
+        data = item.get("json")
+        if data is None and item.get("text"):
+            try:
+                data = json.loads(item["text"])
+            except ValueError:
+                continue
+        if isinstance(data, dict) and ("results" in data or "status" in data):
+            return data
+    return None
+
+
+def _page_num(arguments: Dict[str, Any]) -> int:
+    try:
+        return int(arguments.get("page_num") or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+class BaiduPOIIndex:
+    """由周边检索结果构建的附近 POI 索引
+
+    每次圆形区域检索（location + radius）的结果写入空间索引，并记录该类别
+    （query + tag）在该区域已检索过；之后同类别、查询圆落在已检索区域内的
+    检索直接从索引按距离返回，不再访问百度地图。
+    """
+
+    def __init__(self, index: Optional[SpatialIndex] = None):
+        """
+        Args:
+            index: 空间索引，默认按配置创建
+        """
+        self.index = index or SpatialIndex(
+            max_points=POI_INDEX_MAX_POINTS,
+            max_age=POI_INDEX_MAX_AGE,
+            cell_degrees=POI_INDEX_CELL_DEGREES
+        )
+        self._stats = {"hits": 0, "misses": 0, "ingested": 0}
+
+    @staticmethod
+    def _category(arguments: Dict[str, Any]) -> Optional[str]:
+        query = arguments.get("query")
+        if not query:
+            return None
+        return f"{' '.join(str(query).split()).casefold()}|{arguments.get('tag') or ''}"
+
+    @staticmethod
+    def _area(arguments: Dict[str, Any]) -> Optional[Tuple[float, float, float]]:
+        center = _parse_lat_lng(arguments.get("location"))
+        try:
+            radius = float(arguments["radius"])
+        except (KeyError, TypeError, ValueError):
+            return None
+        if center is None or radius <= 0:
+            return None
+        return center[0], center[1], radius
+
+    def ingest(self, arguments: Dict[str, Any], result: Dict[str, Any]) -> None:
+        """把周边检索的成功结果写入索引
+
+        只有百度地图响应成功（status 为 0）、是第一页且已返回全部结果（total 不超过本页条数）时，
+        才记录该区域已检索过；配额超限等错误响应和只返回了一页的检索不能证明区域内没有其他 POI。
+        """
+        if result.get("status") != "success":
+            return
+        body = _extract_search_body(result)
+        if body is None or body.get("status") != 0:
+            return
+        pois = [poi for poi in body.get("results") or [] if isinstance(poi, dict)]
+        category = self._category(arguments)
+        for poi in pois:
+            location = _parse_lat_lng(poi.get("location"))
+            if location is None:
+                continue
+            uid = poi.get("uid") or f"{poi.get('name')}@{location[0]},{location[1]}"
+            self.index.upsert(uid, location[0], location[1], category, poi)
+            self._stats["ingested"] += 1
+
+        try:
+            complete = int(body["total"]) <= len(pois)
+        except (KeyError, TypeError, ValueError):
+            complete = False
+        area = self._area(arguments)
+        if category and area and complete and _page_num(arguments) == 0:
+            self.index.mark_covered(category, *area)
+
+    def lookup(self, arguments: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """从索引回答周边检索，查询区域未被新鲜的检索覆盖或请求的不是第一页时返回 None"""
+        category = self._category(arguments)
+        area = self._area(arguments)
+        if (not category or not area or _page_num(arguments) > 0
+                or not self.index.is_covered(category, *area)):
+            self._stats["misses"] += 1
+            return None
+
+        try:
+            limit = int(arguments.get("page_size") or POI_LOOKUP_DEFAULT_LIMIT)
+        except (TypeError, ValueError):
+            limit = POI_LOOKUP_DEFAULT_LIMIT
+
+        self._stats["hits"] += 1
+        matches = self.index.query(*area, category=category, limit=limit)
+        results = [{**point.data, "distance": round(distance)} for distance, point in matches]
+        return {
+            "status": "success",
+            "content": [{"text": json.dumps(
+                {"status": 0, "message": "ok", "total": len(results), "results": results},
+                ensure_ascii=False
+            )}]
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """索引命中统计和空间索引统计"""
+        return {**self._stats, **self.index.stats()}
+
+
+_poi_index = BaiduPOIIndex()
+get_metrics_registry().register_stats("poi_index", _poi_index.stats)
+
+
+def get_baidu_poi_index() -> BaiduPOIIndex:
+    """获取进程级附近 POI 索引"""
+    return _poi_index
+
+
+class PooledMCPTool(MCPAgentTool):
+    """绑定到会话池而不是单个 MCPClient 的百度地图工具
+
+    调用时从会话池中取出一个健康的会话，因此底层 SSE 连接重建后，
+    已经交给 Agent 的工具对象仍然可用。结果按工具的缓存策略缓存
+    （invocation_state 中 bypass_tool_cache 为 True 时跳过）；工具名和参数相同的
+    并发调用只发起一次 MCP 请求（single-flight），结果按各自的 toolUseId 复制。
+    周边检索工具的结果写入附近 POI 索引，已检索过的区域内的检索直接由索引回答。
+    推测性预取（prefetch）与模型发起的调用走同一个缓存和 single-flight，
+    模型调用时预取仍在进行则直接等待预取的结果。
+    """
+
+    def __init__(
+        self,
+        mcp_tool: Any,
+        pool: "BaiduMCPSessionPool",
+        single_flight: Optional[SingleFlight] = None,
+        result_cache: Optional[BaiduToolResultCache] = None,
+        poi_index: Optional[BaiduPOIIndex] = None
+    ):
+        super().__init__(mcp_tool, None)
+        self.pool = pool
+        self.single_flight = single_flight or get_single_flight()
+        self.result_cache = result_cache or get_baidu_tool_result_cache()
+        self.poi_index = poi_index or get_baidu_poi_index()
+
+    async def _call(
+        self,
+        tool_use_id: str,
+        arguments: Dict[str, Any],
+        arguments_key: str,
+        cancel_signal: Optional[threading.Event] = None
+    ) -> Dict[str, Any]:
+        start = time.perf_counter()
+        result = await self.pool.call_tool_async(
+            tool_use_id=tool_use_id,
+            name=self.mcp_tool.name,
+            arguments=arguments,
+            read_timeout_seconds=self.timeout,
+            cancel_signal=cancel_signal
+        )
+        self.result_cache.put(self.mcp_tool.name, arguments_key, result, (time.perf_counter() - start) * 1000)
+        if self.mcp_tool.name == POI_SEARCH_TOOL:
+            self.poi_index.ingest(arguments, result)
+        return result
+
+    async def prefetch(self, arguments: Dict[str, Any]) -> bool:
+        """推测性预取：结果不缓存或已缓存时跳过，否则发起调用并写入缓存
+
+        Returns:
+            是否发起（或加入了进行中的）上游调用
+        """
+        name = self.mcp_tool.name
+        key = arguments_key(arguments)
+        if not self.result_cache.cacheable(name) or self.result_cache.contains(name, key):
+            return False
+        await self.single_flight.do(
+            "baidu_maps",
+            (name, key),
+            lambda: self._call(f"prefetch_{name}", arguments, key)
+        )
+        return True
+
+    async def stream(self, tool_use: Dict[str, Any], invocation_state: Dict[str, Any], **kwargs: Any):
+        """通过会话池执行 MCP 工具调用
+
+        与 MCPAgentTool 一样把 Agent 的取消信号传给 MCP 调用，取消本轮对话时中止进行中的调用。
+        """
+        name = self.mcp_tool.name
+        arguments = tool_use["input"]
+        key = arguments_key(arguments)
+        cancel_signal = getattr((invocation_state or {}).get("agent"), "_cancel_signal", None)
+
+        bypass = bool((invocation_state or {}).get(BYPASS_TOOL_CACHE))
+        prefetch_batch = (invocation_state or {}).get(SPECULATIVE_PREFETCH)
+        attributes = {"tool.name": name, "tool.arguments_size": len(key.encode("utf-8"))}
+        with start_span(f"baidu_maps.{name}", **attributes) as span:
+            if prefetch_batch is not None:
+                span.set_attribute("tool.prefetched", prefetch_batch.claim(name, key))
+            result = None
+            if not bypass:
+                result = self.result_cache.get(name, key)
+                source = "cache"
+                if result is None and name == POI_SEARCH_TOOL:
+                    result = self.poi_index.lookup(arguments)
+                    source = "poi_index"
+            if result is None:
+                source = "bypass" if bypass else "miss"
+                result = await self.single_flight.do(
+                    "baidu_maps",
+                    (name, key),
+                    lambda: self._call(tool_use["toolUseId"], arguments, key, cancel_signal)
+                )
+                if result.get("cancelled") and not (cancel_signal is not None and cancel_signal.is_set()):
+                    # 合并到的调用被发起它的请求取消，本请求单独重新调用
+                    result = await self._call(tool_use["toolUseId"], arguments, key, cancel_signal)
+            span.set_attribute("tool.source", source)
+            span.set_attribute("tool.status", result.get("status", "unknown"))
+        yield ToolResultEvent({**result, "toolUseId": tool_use["toolUseId"]})
+
+
+class BaiduMCPSessionPool:
+    """进程级百度地图 MCP 会话池
+
+    维护固定数量的长连接 SSE 会话，在多次请求之间共享：
+    - 每个槽位记录会话是否健康（建连成功为健康，调用发现会话未运行、探活失败为不健康），
+      取用不健康的槽位时透明重建会话
+    - 后台线程定期探活，提前替换失效的会话
+    - 暴露连接数、重连次数等计数器
+    """
+
+    def __init__(
+        self,
+        client_factory: Callable[[], Optional[MCPClient]] = initialize_baidu_mcp_client,
+        size: int = BAIDU_MCP_POOL_SIZE,
+        health_check_interval: float = BAIDU_MCP_HEALTH_CHECK_INTERVAL
+    ):
+        """
+        Args:
+            client_factory: 创建新 MCPClient（未启动）的工厂函数
+            size: 会话池大小
+            health_check_interval: 后台探活间隔（秒），<= 0 表示不启用
+        """
+        self._client_factory = client_factory
+        self.size = max(1, size)
+        self.health_check_interval = health_check_interval
+        self._slots: List[Optional[MCPClient]] = [None] * self.size
+        self._healthy = [False] * self.size
+        self._slot_locks = [threading.Lock() for _ in range(self.size)]
+        self._round_robin = itertools.count()
+        self._closed = threading.Event()
+        self._health_thread: Optional[threading.Thread] = None
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "connects": 0,
+            "reconnects": 0,
+            "connect_failures": 0,
+            "health_checks": 0,
+            "health_check_failures": 0,
+            "checkouts": 0
+        }
+
+    def _incr(self, key: str, amount: int = 1) -> None:
+        with self._stats_lock:
+            self._stats[key] += amount
+
+    def _is_healthy(self, index: int) -> bool:
+        return self._healthy[index] and self._slots[index] is not None
+
+    def _mark_unhealthy(self, index: int, client: MCPClient) -> None:
+        """标记槽位的会话失效（槽位已换成新会话时不处理）"""
+        if self._slots[index] is client:
+            self._healthy[index] = False
+
+    def _probe(self, client: MCPClient) -> bool:
+        """通过 list_tools 探测会话是否可用"""
+        try:
+            client.list_tools_sync()
+            return True
+        except Exception:
+            return False
+
+    def _connect_slot(self, index: int) -> MCPClient:
+        """（重新）建立指定槽位的 SSE 会话，调用方需持有该槽位锁"""
+        old_client = self._slots[index]
+        if self._is_healthy(index):
+            return old_client
+
+        if old_client is not None:
+            self._slots[index] = None
+            self._healthy[index] = False
+            try:
+                old_client.stop(None, None, None)
+            except Exception as e:
+                logger.debug(f"Failed to stop stale MCP session {index}: {e}")
+
+        client = self._client_factory()
+        if client is None:
+            self._incr("connect_failures")
+            raise MCPClientInitializationError("Baidu MCP client unavailable")
+
+        start = time.perf_counter()
+        try:
+            client.start()
+        except Exception:
+            self._incr("connect_failures")
+            observe_stage("mcp_connect", (time.perf_counter() - start) * 1000, outcome="error")
+            raise
+
+        observe_stage("mcp_connect", (time.perf_counter() - start) * 1000)
+        self._slots[index] = client
+        self._healthy[index] = True
+        self._incr("reconnects" if old_client is not None else "connects")
+        logger.info(f"Baidu MCP session {index} connected (reconnect={old_client is not None})")
+        return client
+
+    def _checkout_slot(self) -> int:
+        self._incr("checkouts")
+        return next(self._round_robin) % self.size
+
+    def get_client(self, index: Optional[int] = None) -> MCPClient:
+        """取出一个健康的 MCP 会话（必要时同步重连）
+
+        Args:
+            index: 指定槽位，默认按轮询选择
+
+        Returns:
+            已启动的 MCPClient 实例
+        """
+        if index is None:
+            index = self._checkout_slot()
+        client = self._slots[index]
+        if self._is_healthy(index):
+            return client
+
+        with self._slot_locks[index]:
+            return self._connect_slot(index)
+
+    def start(self) -> "BaiduMCPSessionPool":
+        """预热所有会话并启动后台探活线程"""
+        for index in range(self.size):
+            with self._slot_locks[index]:
+                try:
+                    self._connect_slot(index)
+                except Exception as e:
+                    logger.warning(f"Failed to warm Baidu MCP session {index}: {e}")
+
+        if self.health_check_interval > 0 and self._health_thread is None:
+            self._health_thread = threading.Thread(
+                target=self._health_check_loop,
+                name="baidu-mcp-health",
+                daemon=True
+            )
+            self._health_thread.start()
+        return self
+
+    def health_check(self) -> None:
+        """探测所有会话，对断开或无响应的会话立即重建"""
+        for index in range(self.size):
+            if not self._slot_locks[index].acquire(blocking=False):
+                # 槽位正在重连，跳过本轮
+                continue
+            try:
+                self._incr("health_checks")
+                client = self._slots[index]
+                healthy = self._is_healthy(index)
+                if healthy and not self._probe(client):
+                    logger.warning(f"Baidu MCP session {index} failed health check")
+                    healthy = False
+                    self._healthy[index] = False
+
+                if not healthy:
+                    self._incr("health_check_failures")
+                    self._connect_slot(index)
+            except Exception as e:
+                logger.warning(f"Failed to reconnect Baidu MCP session {index}: {e}")
+            finally:
+                self._slot_locks[index].release()
+
+    def _health_check_loop(self) -> None:
+        while not self._closed.wait(self.health_check_interval):
+            self.health_check()
+
+    def list_tools_sync(self) -> List[PooledMCPTool]:
+        """列出百度地图工具，返回绑定到会话池的工具对象"""
+        client = self.get_client()
+        return [PooledMCPTool(tool.mcp_tool, self) for tool in client.list_tools_sync()]
+
+    async def call_tool_async(
+        self,
+        tool_use_id: str,
+        name: str,
+        arguments: Optional[Dict[str, Any]] = None,
+        read_timeout_seconds: Any = None,
+        cancel_signal: Optional[threading.Event] = None
+    ) -> Dict[str, Any]:
+        """通过池中的会话调用 MCP 工具
+
+        如果会话在调用前后断开（SSE 掉线），会重建会话并重试一次。
+        cancel_signal 被设置时 MCPClient 中止调用并返回 cancelled 的错误结果，不重试。
+        """
+        with start_span("mcp.call_tool", **{"tool.name": name}) as span:
+            for attempt in range(2):
+                index = self._checkout_slot()
+                span.set_attribute("mcp.slot", index)
+                span.set_attribute("mcp.attempts", attempt + 1)
+                client = self._slots[index]
+                if not self._is_healthy(index):
+                    client = await asyncio.to_thread(self.get_client, index)
+
+                try:
+                    result = await client.call_tool_async(
+                        tool_use_id=tool_use_id,
+                        name=name,
+                        arguments=arguments,
+                        read_timeout_seconds=read_timeout_seconds,
+                        cancel_signal=cancel_signal
+                    )
+                except MCPClientInitializationError as e:
+                    logger.warning(f"Baidu MCP session dropped before calling {name}: {e}")
+                    self._mark_unhealthy(index, client)
+                    continue
+
+                if (result.get("status") == "error" and not result.get("cancelled") and attempt == 0
+                        and not await asyncio.to_thread(self._probe, client)):
+                    logger.warning(f"Baidu MCP session dropped while calling {name}, retrying")
+                    self._mark_unhealthy(index, client)
+                    continue
+                span.set_attribute("tool.status", result.get("status", "unknown"))
+                return result
+
+            span.set_attribute("tool.status", "error")
+            return {
+                "toolUseId": tool_use_id,
+                "status": "error",
+                "content": [{"text": "百度地图服务连接失败，请稍后重试"}]
+            }
+
+    def stats(self) -> Dict[str, Any]:
+        """返回会话池计数器快照"""
+        with self._stats_lock:
+            snapshot = dict(self._stats)
+        snapshot["size"] = self.size
+        snapshot["active"] = sum(1 for index in range(self.size) if self._is_healthy(index))
+        return snapshot
+
+    def close(self) -> None:
+        """关闭所有会话并停止探活线程"""
+        self._closed.set()
+        for index in range(self.size):
+            with self._slot_locks[index]:
+                client = self._slots[index]
+                self._slots[index] = None
+                self._healthy[index] = False
+                if client is not None:
+                    try:
+                        client.stop(None, None, None)
+                    except Exception as e:
+                        logger.debug(f"Failed to stop MCP session {index}: {e}")
+
+
+_pool: Optional[BaiduMCPSessionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_baidu_mcp_pool() -> Optional[BaiduMCPSessionPool]:
+    """获取进程级共享的百度地图 MCP 会话池（首次调用时创建）
+
+    Returns:
+        BaiduMCPSessionPool 实例或 None（未配置 API Key 时）
+    """
+    global _pool
+    if not BAIDU_API_KEY:
+        logger.warning("BAIDU_MAPS_API_KEY not set, Baidu Maps features unavailable")
+        return None
+
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = BaiduMCPSessionPool().start()
+                get_metrics_registry().register_stats("baidu_mcp_pool", _pool.stats)
+    return _pool
+
+
+def _hash_tool_specs(tools: List[PooledMCPTool]) -> str:
+    """计算工具规格的内容哈希（与工具顺序无关）"""
+    specs = sorted((tool.tool_spec for tool in tools), key=lambda spec: spec["name"])
+    payload = json.dumps(specs, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class BaiduToolCatalog:
+    """百度地图工具目录缓存
+
+    工具列表几乎不变，因此在启动时加载一次并保存在内存中：
+    - 超过 TTL 后在后台线程刷新，请求继续使用当前目录
+    - 新目录的内容哈希不变时保留原有工具对象
+    - 刷新失败时继续提供旧目录
+    """
+
+    def __init__(self, pool: BaiduMCPSessionPool, ttl: float = BAIDU_TOOL_CATALOG_TTL):
+        """
+        Args:
+            pool: 百度地图 MCP 会话池
+            ttl: 目录有效期（秒）
+        """
+        self.pool = pool
+        self.ttl = ttl
+        self._tools: List[PooledMCPTool] = []
+        self._content_hash: Optional[str] = None
+        self._loaded_at: Optional[float] = None
+        self._load_lock = threading.Lock()
+        self._refreshing = False
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "stale_hits": 0,
+            "refreshes": 0,
+            "refresh_changes": 0,
+            "refresh_failures": 0
+        }
+
+    def _incr(self, key: str) -> None:
+        with self._stats_lock:
+            self._stats[key] += 1
+
+    @property
+    def loaded(self) -> bool:
+        """目录是否已加载过（之后的读取不会阻塞）"""
+        return self._loaded_at is not None
+
+    def refresh(self) -> bool:
+        """从 MCP 服务端重新加载工具目录
+
+        Returns:
+            刷新是否成功；失败时保留旧目录
+        """
+        with self._load_lock:
+            start = time.perf_counter()
+            try:
+                tools = self.pool.list_tools_sync()
+                observe_stage("list_tools", (time.perf_counter() - start) * 1000)
+            except Exception as e:
+                observe_stage("list_tools", (time.perf_counter() - start) * 1000, outcome="error")
+                self._incr("refresh_failures")
+                logger.warning(f"Failed to refresh Baidu tool catalog, serving stale catalog: {e}")
+                return False
+            finally:
+                self._refreshing = False
+
+            content_hash = _hash_tool_specs(tools)
+            if content_hash != self._content_hash:
+                if self._content_hash is not None:
+                    self._incr("refresh_changes")
+                    logger.info(f"Baidu tool catalog changed: {self._content_hash[:12]} -> {content_hash[:12]}")
+                self._tools = tools
+                self._content_hash = content_hash
+
+            self._loaded_at = time.monotonic()
+            self._incr("refreshes")
+            return True
+
+    def _refresh_in_background(self) -> None:
+        with self._stats_lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self.refresh, name="baidu-tool-catalog", daemon=True).start()
+
+    def get_tools(self) -> List[PooledMCPTool]:
+        """从内存返回工具列表
+
+        仅在目录从未加载成功时同步加载；过期时触发后台刷新并返回当前目录。
+        """
+        if not self.loaded:
+            self._incr("misses")
+            if not self.refresh():
+                return []
+            return list(self._tools)
+
+        if time.monotonic() - self._loaded_at > self.ttl:
+            self._incr("stale_hits")
+            self._refresh_in_background()
+        else:
+            self._incr("hits")
+        return list(self._tools)
+
+    def stats(self) -> Dict[str, Any]:
+        """返回目录缓存计数器快照"""
+        with self._stats_lock:
+            snapshot = dict(self._stats)
+        snapshot["tools"] = len(self._tools)
+        snapshot["content_hash"] = self._content_hash
+        snapshot["age"] = None if self._loaded_at is None else time.monotonic() - self._loaded_at
+        return snapshot
+
+
+_catalog: Optional[BaiduToolCatalog] = None
+_catalog_lock = threading.Lock()
+
+
+def get_baidu_tool_catalog() -> Optional[BaiduToolCatalog]:
+    """获取进程级共享的百度地图工具目录（首次调用时加载）
+
+    Returns:
+        BaiduToolCatalog 实例或 None（未配置 API Key 时）
+    """
+    global _catalog
+    if _catalog is None:
+        pool = get_baidu_mcp_pool()
+        if pool is None:
+            return None
+        with _catalog_lock:
+            if _catalog is None:
+                catalog = BaiduToolCatalog(pool)
+                catalog.refresh()
+                get_metrics_registry().register_stats("baidu_tool_catalog", catalog.stats)
+                _catalog = catalog
+    return _catalog
@@ -0,0 +1,204 @@
+"""百度地图工具的推测性预取
+
+问题提到用户的已知地点（家、公司等，来自长期记忆 /users/{actorId}/locations 或最近的对话）时，
+模型下一步几乎总是调用地理编码或路线规划。在首次模型调用的同时预先发起这些调用，
+结果写入工具结果缓存；模型随后发起相同参数的调用时直接命中缓存（或等待进行中的预取）。
+
+每个请求的预取数和进程内同时进行的预取数都有上限；每个预取是否被模型用到都会记录，
+用于在命中率和浪费的上游调用之间调参。
+"""
+import asyncio
+import logging
+import re
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.config import PREFETCH_MAX_CALLS_PER_REQUEST, PREFETCH_MAX_IN_FLIGHT
+from src.tools.baidu_maps import PooledMCPTool, arguments_key
+from src.utils.places import KnownPlaces, extract_places, get_known_places, mentioned_labels
+from src.utils.tracing import start_span
+
+logger = logging.getLogger(__name__)
+
+GEOCODE_TOOL = "map_geocode"
+DIRECTIONS_TOOL = "map_directions"
+
+# 指代上一轮提到的地点
+_REFERENCE = re.compile(r"那里|那边|那儿|那个地方|过去")
+# 两个地点之间的路线
+_NAVIGATION = re.compile(r"导航|路线|怎么走|多久|多远|出发|开车|到达|从.+(?:到|去)")
+
+
+class PrefetchBatch:
+    """一次请求发起的预取，以及每个预取是否被模型的工具调用认领"""
+
+    def __init__(self):
+        self.calls: Dict[Tuple[str, str], bool] = {}
+        self.tasks: List[asyncio.Task] = []
+
+    def claim(self, name: str, key: str) -> bool:
+        """模型调用工具时认领相同参数的预取
+
+        Returns:
+            该调用是否已被预取
+        """
+        if (name, key) not in self.calls:
+            return False
+        self.calls[(name, key)] = True
+        return True
+
+    @property
+    def used(self) -> int:
+        return sum(1 for claimed in self.calls.values() if claimed)
+
+    @property
+    def wasted(self) -> int:
+        return sum(1 for claimed in self.calls.values() if not claimed)
+
+
+class SpeculativePrefetcher:
+    """按问题中提到的已知地点预取地理编码和路线规划
+
+    路况等不缓存的工具不预取（预取结果无法被模型的调用复用）。
+    """
+
+    def __init__(
+        self,
+        max_calls_per_request: int = PREFETCH_MAX_CALLS_PER_REQUEST,
+        max_in_flight: int = PREFETCH_MAX_IN_FLIGHT,
+        known_places: Optional[KnownPlaces] = None
+    ):
+        """
+        Args:
+            max_calls_per_request: 每个请求最多预取的调用数
+            max_in_flight: 进程内同时进行的预取调用上限
+            known_places: 已知地点缓存，默认使用进程级缓存
+        """
+        self.max_calls_per_request = max_calls_per_request
+        self.max_in_flight = max_in_flight
+        self.known_places = known_places or get_known_places()
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            "requests": 0,
+            "planned": 0,
+            "started": 0,
+            "skipped_cached": 0,
+            "skipped_budget": 0,
+            "failed": 0,
+            "used": 0,
+            "wasted": 0,
+        }
+
+    def _incr(self, key: str, amount: int = 1) -> None:
+        with self._lock:
+            self._stats[key] += amount
+
+    def plan(self, actor_id: str, prompt: str, history: Optional[List[Dict[str, Any]]] = None) -> List[Tuple[str, Dict[str, Any]]]:
+        """预测本次请求的模型会发起的地图调用
+
+        Args:
+            actor_id: 用户标识
+            prompt: 用户输入
+            history: 对话历史（[{"role", "content"}]，从旧到新）
+
+        Returns:
+            [(工具名, 参数)]，按价值排序（路线规划优先），最多 max_calls_per_request 个
+        """
+        user_turns = [turn.get("content") or "" for turn in history or [] if turn.get("role") == "user"]
+        for text in user_turns + [prompt]:
+            self.known_places.learn(actor_id, text)
+        known = self.known_places.get(actor_id)
+
+        addresses = [known[label] for label in mentioned_labels(prompt) if label in known]
+        addresses += [address for _, address in extract_places(prompt)]
+        if not addresses and _REFERENCE.search(prompt):
+            recent = [address for text in reversed(user_turns) for _, address in reversed(extract_places(text))]
+            addresses += recent[:1]
+        addresses = list(dict.fromkeys(addresses))
+
+        calls = []
+        if len(addresses) >= 2 and _NAVIGATION.search(prompt):
+            calls.append((DIRECTIONS_TOOL, {"origin": addresses[0], "destination": addresses[1]}))
+        calls += [(GEOCODE_TOOL, {"address": address}) for address in addresses]
+        return calls[:self.max_calls_per_request]
+
+    async def _run(self, batch: PrefetchBatch, tool: PooledMCPTool, key: str, arguments: Dict[str, Any]) -> None:
+        name = tool.tool_name
+        try:
+            with start_span("prefetch", **{"tool.name": name}) as span:
+                issued = await tool.prefetch(arguments)
+                span.set_attribute("prefetch.issued", issued)
+            if issued:
+                self._incr("started")
+            else:
+                # 已缓存：模型的调用本来就会命中缓存，不计入预取
+                batch.calls.pop((name, key), None)
+                self._incr("skipped_cached")
+        except Exception as e:
+            self._incr("failed")
+            logger.warning(f"Prefetch {name} failed: {e}")
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def start(
+        self,
+        actor_id: str,
+        prompt: str,
+        history: Optional[List[Dict[str, Any]]],
+        tools: List[Any]
+    ) -> Optional[PrefetchBatch]:
+        """在后台发起预取（需要在事件循环中调用），不等待结果
+
+        Args:
+            actor_id: 用户标识
+            prompt: 用户输入
+            history: 对话历史
+            tools: 本次请求的工具列表
+
+        Returns:
+            预取批次；没有可预取的调用时返回 None
+        """
+        pooled = {tool.tool_name: tool for tool in tools if isinstance(tool, PooledMCPTool)}
+        calls = [(name, arguments) for name, arguments in self.plan(actor_id, prompt, history)
+                 if name in pooled and pooled[name].result_cache.cacheable(name)]
+        if not calls:
+            return None
+
+        self._incr("requests")
+        self._incr("planned", len(calls))
+        batch = PrefetchBatch()
+        for name, arguments in calls:
+            with self._lock:
+                if self._in_flight >= self.max_in_flight:
+                    self._stats["skipped_budget"] += 1
+                    continue
+                self._in_flight += 1
+            key = arguments_key(arguments)
+            batch.calls[(name, key)] = False
+            batch.tasks.append(asyncio.create_task(self._run(batch, pooled[name], key, arguments)))
+        return batch
+
+    def finish(self, batch: PrefetchBatch) -> None:
+        """请求结束时统计预取是否被用到（仍在进行的预取不取消，结果照常写入缓存）"""
+        with self._lock:
+            self._stats["used"] += batch.used
+            self._stats["wasted"] += batch.wasted
+
+    def stats(self) -> Dict[str, Any]:
+        """返回计数器快照和命中率（被模型用到的预取 / 请求结束时的预取）"""
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot["in_flight"] = self._in_flight
+        finished = snapshot["used"] + snapshot["wasted"]
+        snapshot["hit_rate"] = snapshot["used"] / finished if finished else 0.0
+        return snapshot
+
+
+_prefetcher = SpeculativePrefetcher()
+
+
+def get_speculative_prefetcher() -> SpeculativePrefetcher:
+    """获取进程级推测性预取器"""
+    return _prefetcher
@@ -1,9 +1,32 @@
 """Tavily 搜索工具"""
+import asyncio
+import itertools
 import logging
-import requests
-from typing import Dict, Any
+import threading
+import time
+import weakref
+from typing import Dict, Any, List, Optional, Set, Tuple
+from urllib.parse import urlsplit
+import httpx
 from strands import tool
-from src.config import TAVILY_API_KEY, TAVILY_API_URL, REQUEST_TIMEOUT
+from src.config import (
+    TAVILY_API_KEY,
+    TAVILY_API_URL,
+    REQUEST_TIMEOUT,
+    TAVILY_MAX_CONNECTIONS,
+    TAVILY_MAX_KEEPALIVE_CONNECTIONS,
+    TAVILY_KEEPALIVE_EXPIRY,
+    TAVILY_MAX_PER_HOST,
+    TAVILY_POOL_SHARDS,
+    TAVILY_CACHE_TTL,
+    TAVILY_CACHE_STALE_TTL,
+    TAVILY_CACHE_NEGATIVE_TTL,
+    TAVILY_CACHE_MAX_BYTES
+)
+from src.utils.cache import FRESH, STALE, TTLCache
+from src.utils.metrics import get_metrics_registry
+from src.utils.singleflight import SingleFlight, get_single_flight
+from src.utils.tracing import arguments_size, start_span
 
 logger = logging.getLogger(__name__)
 
@@ -11,54 +34,152 @@ logger = logging.getLogger(__name__)
 def _format_search_results(query: str, data: Dict[str, Any]) -> str:
     """格式化搜索结果为可读文本"""
     results_text = f"搜索查询: {query}\n\n"
-    
+
     if data.get("answer"):
         results_text += f"答案摘要:\n{data['answer']}\n\n"
-    
+
     results_text += "搜索结果:\n"
     for i, result in enumerate(data.get("results", []), 1):
         results_text += f"\n{i}. {result.get('title', '无标题')}\n"
         results_text += f"   URL: {result.get('url', '')}\n"
         results_text += f"   内容: {result.get('content', '')}\n"
-    
+
     return results_text
 
 
-@tool
-def tavily_search(query: str, max_results: int = 5) -> Dict[str, Any]:
-    """使用 Tavily API 搜索网络信息
-    
+class _LoopState:
+    """绑定到单个事件循环的连接池分片和按主机的并发限制"""
+
+    def __init__(self, clients: List[httpx.AsyncClient]):
+        self.clients = clients
+        self.next_client = itertools.cycle(clients)
+        self.host_limits: Dict[str, asyncio.Semaphore] = {}
+
+
+class TavilyClient:
+    """Tavily 异步 HTTP 客户端
+
+    在同一个事件循环内共享连接池（HTTP keep-alive），避免每次搜索都重新建立
+    TCP/TLS 连接，并按主机限制并发请求数。连接池拆分为若干个 httpx.AsyncClient
+    分片轮询使用：单个 httpcore 连接池的调度开销随并发连接数超线性增长，
+    分片后在 50+ 并发下吞吐明显更高。
+    """
+
+    def __init__(
+        self,
+        api_url: str = TAVILY_API_URL,
+        api_key: Optional[str] = TAVILY_API_KEY,
+        timeout: float = REQUEST_TIMEOUT,
+        max_connections: int = TAVILY_MAX_CONNECTIONS,
+        max_keepalive_connections: int = TAVILY_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry: float = TAVILY_KEEPALIVE_EXPIRY,
+        max_per_host: int = TAVILY_MAX_PER_HOST,
+        shards: int = TAVILY_POOL_SHARDS
+    ):
+        """
+        Args:
+            api_url: Tavily 搜索接口地址
+            api_key: Tavily API Key
+            timeout: 单次请求超时（秒）
+            max_connections: 连接池最大连接数
+            max_keepalive_connections: 保持空闲的 keep-alive 连接数
+            keepalive_expiry: 空闲连接保留时间（秒）
+            max_per_host: 单个主机的最大并发请求数
+            shards: 连接池分片数，连接数上限平均分配到各分片
+        """
+        self.api_url = api_url
+        self.api_key = api_key
+        self.timeout = timeout
+        self.shards = max(1, min(shards, max_connections))
+        self.limits = httpx.Limits(
+            max_connections=max(1, max_connections // self.shards),
+            max_keepalive_connections=max(1, max_keepalive_connections // self.shards),
+            keepalive_expiry=keepalive_expiry
+        )
+        self.max_per_host = max(1, max_per_host)
+        self._states: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopState]" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def _get_state(self) -> _LoopState:
+        loop = asyncio.get_running_loop()
+        state = self._states.get(loop)
+        if state is None:
+            with self._lock:
+                state = self._states.get(loop)
+                if state is None:
+                    state = _LoopState([
+                        httpx.AsyncClient(timeout=self.timeout, limits=self.limits)
+                        for _ in range(self.shards)
+                    ])
+                    self._states[loop] = state
+        return state
+
+    def _host_limit(self, state: _LoopState, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc
+        semaphore = state.host_limits.get(host)
+        if semaphore is None:
+            semaphore = state.host_limits.setdefault(host, asyncio.Semaphore(self.max_per_host))
+        return semaphore
+
+    async def search(self, query: str, max_results: int = 5) -> Dict[str, Any]:
+        """调用 Tavily 搜索接口
+
+        Returns:
+            Tavily 返回的原始 JSON
+
+        Raises:
+            httpx.HTTPError: 请求失败或超时
+        """
+        state = self._get_state()
+        with start_span("tavily.request", **{"http.url": self.api_url}) as span:
+            async with self._host_limit(state, self.api_url):
+                response = await next(state.next_client).post(
+                    self.api_url,
+                    json={
+                        "api_key": self.api_key,
+                        "query": query,
+                        "max_results": max_results,
+                        "include_answer": True,
+                        "include_raw_content": False
+                    }
+                )
+            span.set_attribute("http.status_code", response.status_code)
+            response.raise_for_status()
+            return response.json()
+
+    async def aclose(self) -> None:
+        """关闭当前事件循环上的连接池"""
+        state = self._states.pop(asyncio.get_running_loop(), None)
+        if state is not None:
+            await asyncio.gather(*(client.aclose() for client in state.clients))
+
+
+_client = TavilyClient()
+
+
+async def search_tavily(query: str, max_results: int = 5, client: Optional[TavilyClient] = None) -> Dict[str, Any]:
+    """执行 Tavily 搜索并转换为工具结果
+
     Args:
         query: 搜索查询关键词
-        max_results: 返回的最大结果数量，默认为5
-    
+        max_results: 返回的最大结果数量
+        client: Tavily 客户端，默认使用进程级共享客户端
+
     Returns:
         包含搜索结果的字典
     """
-    if not TAVILY_API_KEY:
+    client = client or _client
+    if not client.api_key:
         logger.error("TAVILY_API_KEY not configured")
         return {
             "status": "error",
             "content": [{"text": "错误：未设置 TAVILY_API_KEY 环境变量"}]
         }
-    
+
     try:
-        response = requests.post(
-            TAVILY_API_URL,
-            json={
-                "api_key": TAVILY_API_KEY,
-                "query": query,
-                "max_results": max_results,
-                "include_answer": True,
-                "include_raw_content": False
-            },
-            timeout=REQUEST_TIMEOUT
-        )
-        response.raise_for_status()
-        
-        data = response.json()
+        data = await client.search(query, max_results)
         results_text = _format_search_results(query, data)
-        
+
         return {
             "status": "success",
             "content": [
@@ -66,14 +187,14 @@ def tavily_search(query: str, max_results: int = 5) -> Dict[str, Any]:
                 {"json": data}
             ]
         }
-        
-    except requests.exceptions.Timeout:
+
+    except httpx.TimeoutException:
         logger.error(f"Tavily search timeout for query: {query}")
         return {
             "status": "error",
             "content": [{"text": "搜索请求超时，请稍后重试"}]
         }
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         logger.error(f"Tavily search request failed: {e}")
         return {
             "status": "error",
@@ -85,3 +206,148 @@ def tavily_search(query: str, max_results: int = 5) -> Dict[str, Any]:
             "status": "error",
             "content": [{"text": f"发生错误: {str(e)}"}]
         }
+
+
+def normalize_query(query: str) -> str:
+    """归一化查询：合并空白并忽略大小写"""
+    return " ".join(query.split()).casefold()
+
+
+def _copy_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """复制工具结果（Agent 会在结果字典上写入 toolUseId）"""
+    return {**result, "content": list(result.get("content", []))}
+
+
+class TavilySearchCache:
+    """Tavily 搜索结果缓存
+
+    按 (归一化查询, max_results) 缓存搜索结果：过期后的一段时间内先返回旧结果，
+    同时在后台重新搜索（stale-while-revalidate），热门查询不会阻塞在网络请求上；
+    失败结果短期缓存，避免上游故障时反复重试。未命中的相同查询并发到达时
+    只发起一次上游请求（single-flight）。
+    """
+
+    def __init__(
+        self,
+        ttl: float = TAVILY_CACHE_TTL,
+        stale_ttl: float = TAVILY_CACHE_STALE_TTL,
+        negative_ttl: float = TAVILY_CACHE_NEGATIVE_TTL,
+        max_bytes: int = TAVILY_CACHE_MAX_BYTES,
+        client: Optional[TavilyClient] = None,
+        single_flight: Optional[SingleFlight] = None
+    ):
+        """
+        Args:
+            ttl: 搜索结果有效期（秒），0 表示不缓存
+            stale_ttl: 过期后仍返回旧结果并后台刷新的时间窗口（秒）
+            negative_ttl: 失败结果的缓存时间（秒）
+            max_bytes: 缓存占用的最大字节数
+            client: Tavily 客户端，默认使用进程级共享客户端
+            single_flight: 并发请求合并器，默认使用进程级共享实例
+        """
+        self.cache = TTLCache(ttl=ttl, max_bytes=max_bytes, stale_ttl=stale_ttl, negative_ttl=negative_ttl)
+        self.client = client
+        self.single_flight = single_flight or get_single_flight()
+        self._refreshing: Set[Tuple[str, int]] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self._lock = threading.Lock()
+        self._revalidations = 0
+
+    async def _fetch(self, key: Tuple[str, int], query: str, max_results: int) -> Dict[str, Any]:
+        start = time.perf_counter()
+        result = await search_tavily(query, max_results, client=self.client)
+        cost_ms = (time.perf_counter() - start) * 1000
+        self.cache.put(key, result, cost_ms=cost_ms, negative=result["status"] != "success")
+        return result
+
+    async def _revalidate(self, key: Tuple[str, int], query: str, max_results: int) -> None:
+        try:
+            await self._fetch(key, query, max_results)
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _revalidate_in_background(self, key: Tuple[str, int], query: str, max_results: int) -> None:
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+            self._revalidations += 1
+        task = asyncio.get_running_loop().create_task(self._revalidate(key, query, max_results))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def search(self, query: str, max_results: int = 5) -> Dict[str, Any]:
+        """带缓存的 Tavily 搜索，返回值与 search_tavily 相同"""
+        key = (normalize_query(query), max_results)
+        attributes = {"tool.name": "tavily_search", "tool.arguments_size": arguments_size({"query": query, "max_results": max_results})}
+        with start_span("tavily_search", **attributes) as span:
+            state, result = self.cache.lookup(key)
+            span.set_attribute("tool.source", {FRESH: "cache", STALE: "stale_cache"}.get(state, "miss"))
+            if state == FRESH:
+                logger.debug(f"Tavily cache hit: {query}")
+                return _copy_result(result)
+            if state == STALE:
+                logger.debug(f"Tavily cache stale hit, revalidating: {query}")
+                self._revalidate_in_background(key, query, max_results)
+                return _copy_result(result)
+            result = await self.single_flight.do("tavily", key, lambda: self._fetch(key, query, max_results))
+            span.set_attribute("tool.status", result.get("status", "unknown"))
+            return _copy_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        """缓存统计信息（命中率、节省的上游延迟等）"""
+        return {**self.cache.stats(), "revalidations": self._revalidations}
+
+
+_search_cache = TavilySearchCache()
+get_metrics_registry().register_stats("tavily_cache", _search_cache.stats)
+
+
+def get_tavily_search_cache() -> TavilySearchCache:
+    """获取进程级 Tavily 搜索结果缓存"""
+    return _search_cache
+
+
+@tool
+async def tavily_search(query: str, max_results: int = 5) -> Dict[str, Any]:
+    """使用 Tavily API 搜索网络信息
+
+    Args:
+        query: 搜索查询关键词
+        max_results: 返回的最大结果数量，默认为5
+
+    Returns:
+        包含搜索结果的字典
+    """
+    return await _search_cache.search(query, max_results)
+
+
+_sync_loop: Optional[asyncio.AbstractEventLoop] = None
+_sync_loop_lock = threading.Lock()
+
+
+def _get_sync_loop() -> asyncio.AbstractEventLoop:
+    """获取同步调用共用的后台事件循环（连接池在多次同步调用之间复用）"""
+    global _sync_loop
+    if _sync_loop is None:
+        with _sync_loop_lock:
+            if _sync_loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="tavily-sync", daemon=True).start()
+                _sync_loop = loop
+    return _sync_loop
+
+
+def tavily_search_sync(query: str, max_results: int = 5) -> Dict[str, Any]:
+    """tavily_search 的同步版本，供非异步代码调用
+
+    Args:
+        query: 搜索查询关键词
+        max_results: 返回的最大结果数量，默认为5
+
+    Returns:
+        包含搜索结果的字典
+    """
+    future = asyncio.run_coroutine_threadsafe(_search_cache.search(query, max_results), _get_sync_loop())
+    return future.result()
@@ -0,0 +1,170 @@
+"""进程内结果缓存"""
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+FRESH = "fresh"
+STALE = "stale"
+MISS = "miss"
+
+
+def estimate_size(value: Any) -> int:
+    """估算缓存值占用的字节数（按 JSON 序列化后的长度）"""
+    try:
+        return len(json.dumps(value, ensure_ascii=False, default=str).encode("utf-8"))
+    except (TypeError, ValueError):
+        return len(repr(value).encode("utf-8"))
+
+
+class CacheEntry:
+    """缓存条目"""
+
+    def __init__(self, value: Any, size: int, ttl: float, stale_ttl: float, cost_ms: float, negative: bool):
+        now = time.monotonic()
+        self.value = value
+        self.size = size
+        self.cost_ms = cost_ms
+        self.negative = negative
+        self.expires_at = now + ttl
+        self.stale_until = self.expires_at + stale_ttl
+
+
+class TTLCache:
+    """按 TTL 过期、按总字节数 LRU 淘汰的缓存
+
+    - 新鲜条目（FRESH）直接返回
+    - 过期但仍在 stale_ttl 窗口内的条目（STALE）照常返回，由调用方在后台重新验证
+    - 错误结果按 negative_ttl 短期缓存，过期后不提供旧值
+    - 每次命中累计条目写入时记录的上游耗时，用于统计节省的延迟
+    """
+
+    def __init__(
+        self,
+        ttl: float,
+        max_bytes: int,
+        stale_ttl: float = 0,
+        negative_ttl: float = 0,
+        sizeof: Callable[[Any], int] = estimate_size
+    ):
+        """
+        Args:
+            ttl: 正常结果的有效期（秒）
+            max_bytes: 缓存占用的最大字节数
+            stale_ttl: 过期后仍可提供旧值的时间窗口（秒）
+            negative_ttl: 错误结果的有效期（秒），0 表示不缓存错误
+            sizeof: 估算缓存值大小的函数
+        """
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.stale_ttl = stale_ttl
+        self.negative_ttl = negative_ttl
+        self.sizeof = sizeof
+        self._entries: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "stale_hits": 0,
+            "negative_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "saved_ms": 0.0,
+        }
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+    def lookup(self, key: Hashable) -> Tuple[str, Optional[Any]]:
+        """查询缓存
+
+        Returns:
+            (状态, 缓存值)，状态为 FRESH / STALE / MISS
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return MISS, None
+
+            if now < entry.expires_at:
+                state = FRESH
+            elif now < entry.stale_until and not entry.negative:
+                state = STALE
+            else:
+                self._remove(key)
+                self._stats["misses"] += 1
+                return MISS, None
+
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            self._stats["saved_ms"] += entry.cost_ms
+            if state == STALE:
+                self._stats["stale_hits"] += 1
+            if entry.negative:
+                self._stats["negative_hits"] += 1
+            return state, entry.value
+
+    def contains(self, key: Hashable) -> bool:
+        """是否有新鲜的条目（不计入命中统计，不调整 LRU 顺序）"""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and time.monotonic() < entry.expires_at
+
+    def put(self, key: Hashable, value: Any, cost_ms: float = 0.0, negative: bool = False) -> bool:
+        """写入缓存
+
+        Args:
+            key: 缓存键
+            value: 缓存值
+            cost_ms: 获取该值的上游耗时（毫秒）
+            negative: 是否为错误结果
+
+        Returns:
+            是否写入（错误结果在 negative_ttl 为 0 时、或单个值超过容量时不写入）
+        """
+        ttl = self.negative_ttl if negative else self.ttl
+        if ttl <= 0:
+            return False
+
+        size = self.sizeof(value)
+        if size > self.max_bytes:
+            return False
+
+        entry = CacheEntry(value, size, ttl, 0 if negative else self.stale_ttl, cost_ms, negative)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._stats["evictions"] += 1
+        return True
+
+    def invalidate(self, key: Hashable) -> None:
+        """删除缓存条目"""
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """缓存统计信息"""
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "size": len(self._entries),
+                "bytes": self._bytes,
+                "hit_ratio": self._stats["hits"] / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,198 @@
+"""按 token 预算压缩对话历史"""
+import math
+import re
+import threading
+from typing import Any, Dict, List, Tuple
+
+from src.config import HISTORY_KEEP_RECENT_TURNS, HISTORY_OLDER_TURN_MAX_TOKENS, HISTORY_TOKEN_BUDGET
+
+# 中日韩字符（含全角标点）约 1 个 token，其他字符约 4 个一个 token
+_CJK = re.compile(r"[　-〿㐀-䶿一-鿿＀-￯]")
+
+# 按句末标点和换行切分句子（标点保留在句子末尾）
+_SENTENCE = re.compile(r"[^。！？!?；;\n]+[。！？!?；;]*")
+
+# 地址、地点、时间、距离等实体：包含这些内容的句子优先保留
+_ENTITY = re.compile(
+    r"\d|[零一二三四五六七八九十百两半]+(?:点|个?小时|分钟|公里|站|号|层|楼)"
+    r"|[^\W一][路街巷号区县市省镇村站场馆店厦园桥楼层]|大道|路口"
+    r"|机场|酒店|医院|学校|公司|商场|地铁|高速|环路|停车|充电|加油|服务区|景区|餐厅"
+    r"|今天|明天|后天|昨天|早上|上午|中午|下午|晚上|凌晨|周[一二三四五六日末]|星期"
+    r"|[A-Za-z]{2,}"
+)
+
+# 寒暄、客套和空泛的引导语：压缩较早的对话时直接丢弃
+_PLEASANTRY = re.compile(
+    r"^\W*(?:您好|你好|嗨|哈喽|好的|好呀|好啊|嗯|哦|收到|明白|没问题"
+    r"|谢谢|感谢|多谢|不客气|不用谢|很高兴|希望|祝您?|如果您?还|如有|还有什么|有任何|请随时|欢迎再|请问还有|路上注意|注意安全|一路)"
+)
+
+# 剩余预算低于此值时不再压缩更早的对话（过短的片段没有信息量）
+_MIN_SHRUNK_TOKENS = 16
+
+
+def estimate_tokens(text: str) -> int:
+    """估算文本的 token 数（无需加载分词器）"""
+    if not text:
+        return 0
+    cjk = len(_CJK.findall(text))
+    return cjk + math.ceil((len(text) - cjk) / 4)
+
+
+def _sentence_priority(sentence: str) -> int:
+    """句子优先级：0 寒暄（丢弃），1 普通内容，2 含地址/时间等实体"""
+    if _PLEASANTRY.match(sentence) and not _ENTITY.search(sentence):
+        return 0
+    return 2 if _ENTITY.search(sentence) else 1
+
+
+def _truncate(text: str, max_tokens: int) -> str:
+    """按 token 数截断文本"""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    low, high = 0, len(text)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if estimate_tokens(text[:middle]) + 1 <= max_tokens:
+            low = middle
+        else:
+            high = middle - 1
+    return text[:low] + "…" if low else ""
+
+
+def shrink_text(text: str, max_tokens: int) -> str:
+    """把一条对话压缩到 max_tokens 以内
+
+    丢弃寒暄句和重复句；先按原文顺序保留含实体的句子，预算有余时再保留普通句子，
+    输出保持原文顺序。第一个实体句本身就超出预算时截断它。
+    """
+    sentences, seen = [], set()
+    for match in _SENTENCE.finditer(text):
+        sentence = match.group().strip()
+        if sentence and sentence not in seen:
+            seen.add(sentence)
+            sentences.append(sentence)
+    priorities = [_sentence_priority(sentence) for sentence in sentences]
+
+    selected, used = set(), 0
+    for priority in (2, 1):
+        for index, sentence in enumerate(sentences):
+            if priorities[index] != priority:
+                continue
+            cost = estimate_tokens(sentence)
+            if used + cost > max_tokens:
+                if not selected:
+                    return _truncate(sentence, max_tokens)
+                # 实体句放不下时不再用普通句子填充剩余预算
+                return "".join(sentences[i] for i in sorted(selected))
+            selected.add(index)
+            used += cost
+    return "".join(sentences[i] for i in sorted(selected))
+
+
+class CompactedHistory:
+    """压缩结果"""
+
+    def __init__(self, turns: List[Tuple[str, str]], tokens_before: int, tokens_after: int, dropped: int, shrunk: int):
+        self.turns = turns
+        self.tokens_before = tokens_before
+        self.tokens_after = tokens_after
+        self.dropped = dropped
+        self.shrunk = shrunk
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_before - self.tokens_after
+
+
+class HistoryCompactor:
+    """按 token 预算压缩注入提示词的对话历史
+
+    - 最近 keep_recent_turns 条对话保留原文（超出整个预算时才压缩）
+    - 更早的对话从新到旧依次压缩（保留地址、时间等实体句，丢弃寒暄），
+      每条不超过 older_turn_max_tokens，直到用完预算，更早的对话被丢弃；
+      压缩后为空（只有寒暄）的对话单独丢弃，不影响更早的对话
+    统计每次请求压缩前后的 token 数（压缩前按全部对话原文计算）。
+    """
+
+    def __init__(
+        self,
+        budget_tokens: int = HISTORY_TOKEN_BUDGET,
+        keep_recent_turns: int = HISTORY_KEEP_RECENT_TURNS,
+        older_turn_max_tokens: int = HISTORY_OLDER_TURN_MAX_TOKENS
+    ):
+        """
+        Args:
+            budget_tokens: 对话历史的 token 预算
+            keep_recent_turns: 保留原文的最近对话条数
+            older_turn_max_tokens: 较早的每条对话压缩后的最大 token 数
+        """
+        self.budget_tokens = max(1, budget_tokens)
+        self.keep_recent_turns = max(0, keep_recent_turns)
+        self.older_turn_max_tokens = max(1, older_turn_max_tokens)
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "tokens_before": 0, "tokens_after": 0, "tokens_saved": 0, "dropped_turns": 0, "shrunk_turns": 0}
+
+    def compact(self, conversation_history: List[Dict[str, Any]]) -> CompactedHistory:
+        """压缩对话历史
+
+        Args:
+            conversation_history: 按时间顺序的对话列表（role / content）
+
+        Returns:
+            CompactedHistory，turns 为按时间顺序的 (role, content)
+        """
+        turns = [(turn.get('role', 'unknown'), turn.get('content', '') or '') for turn in conversation_history]
+        turns = [(role, content) for role, content in turns if content.strip()]
+        costs = [estimate_tokens(content) + 2 for _, content in turns]
+        tokens_before = sum(costs)
+
+        kept: List[Tuple[str, str]] = []
+        remaining = self.budget_tokens
+        dropped = shrunk = 0
+        for position, index in enumerate(range(len(turns) - 1, -1, -1)):
+            role, content = turns[index]
+            recent = position < self.keep_recent_turns
+            limit = remaining - 2 if recent else min(remaining - 2, self.older_turn_max_tokens)
+            if costs[index] - 2 <= limit:
+                kept.append((role, content))
+                remaining -= costs[index]
+                continue
+            if limit < _MIN_SHRUNK_TOKENS:
+                # 预算用完，丢弃这条及更早的全部对话
+                dropped += index + 1
+                break
+            compacted = shrink_text(content, limit)
+            if not compacted:
+                # 只有寒暄的对话：只丢弃这一条，继续压缩更早的对话
+                dropped += 1
+                continue
+            kept.append((role, compacted))
+            remaining -= estimate_tokens(compacted) + 2
+            shrunk += 1
+        kept.reverse()
+
+        result = CompactedHistory(kept, tokens_before, self.budget_tokens - remaining, dropped, shrunk)
+        with self._lock:
+            self._stats["requests"] += 1
+            self._stats["tokens_before"] += result.tokens_before
+            self._stats["tokens_after"] += result.tokens_after
+            self._stats["tokens_saved"] += result.tokens_saved
+            self._stats["dropped_turns"] += result.dropped
+            self._stats["shrunk_turns"] += result.shrunk
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """返回压缩计数器快照"""
+        with self._lock:
+            snapshot = dict(self._stats)
+        snapshot["budget_tokens"] = self.budget_tokens
+        return snapshot
+
+
+_compactor = HistoryCompactor()
+
+
+def get_history_compactor() -> HistoryCompactor:
+    """获取进程级对话历史压缩器"""
+    return _compactor
@@ -0,0 +1,126 @@
+"""按用户输入选择需要检索的长期记忆命名空间
+
+本地关键词/正则特征 + 小型线性打分模型（每个命名空间一组权重，sigmoid 输出概率），
+不访问网络，单次分类耗时在微秒级。例如"查询amazon最新的股价是多少"不需要任何记忆，
+"从我的住址导航到我的办公室"只需要 locations。
+"""
+import math
+import re
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.config import MEMORY_INTENT_THRESHOLD
+
+FACTS = "facts"
+PREFERENCES = "preferences"
+LOCATIONS = "locations"
+NAMESPACES = (FACTS, PREFERENCES, LOCATIONS)
+
+# 特征：(名称, 正则, {命名空间: 权重})
+FEATURES: List[Tuple[str, "re.Pattern", Dict[str, float]]] = [
+    # 用户保存的地点：家、公司、学校
+    ("own_place", re.compile(r"我家|我的?住址|我住|回家|到家|家里|办公室|公司|单位|学校|放学"), {LOCATIONS: 4.0}),
+    # 用户本人、家人和车辆的信息
+    ("self", re.compile(r"我是|我的车|新手|老人|孩子|家人|爸妈|老婆|老公"), {FACTS: 3.0}),
+    ("vehicle", re.compile(r"特斯拉|电动车|新能源|保养|4S|加油站|油快|充满电|续航|限行|五环|尾号|车牌"), {FACTS: 3.0}),
+    # 用户陈述自己的信息（"我的车是…"、"我家的地址是…"），检索已有事实以便对照更新
+    ("disclosure", re.compile(r"我(?:的|家的?)\w{0,4}(?:是|在)"), {FACTS: 3.0}),
+    ("schedule", re.compile(r"客户|开会|上班|下班"), {FACTS: 1.0, LOCATIONS: 1.0}),
+    # 需要按口味/偏好挑选的请求
+    ("recommend", re.compile(r"推荐|建议|怎么样[？?]?$|有什么(?:好|地方)|哪家|哪个更?(?:便宜|好|划算|近)"), {PREFERENCES: 3.0}),
+    ("food", re.compile(r"吃|餐厅|美食|聚餐|咖啡|海鲜"), {PREFERENCES: 2.5}),
+    ("leisure", re.compile(r"玩|景点|游览|逛|赏花|住宿|自驾|爱好"), {PREFERENCES: 2.5}),
+    ("route_preference", re.compile(r"避开|舒适|更安全|简单好走|便宜|评价|颠簸|明亮"), {PREFERENCES: 3.5}),
+    # 实时信息查询和耗时/距离估算，通常不依赖记忆
+    ("realtime", re.compile(r"股价|新闻|汇率|天气|下雨|路况|事故|拥堵|红绿灯|营业时间|预约|空位"),
+     {FACTS: -1.5, PREFERENCES: -1.5, LOCATIONS: -1.0}),
+    ("eta", re.compile(r"多久|多远|几点|来得及"), {PREFERENCES: -1.5, LOCATIONS: -1.0}),
+    # 指代上文中的地点（由对话历史提供，不需要长期记忆）
+    ("reference", re.compile(r"那个|那家|那里|那边|过去$"), {FACTS: -2.0, PREFERENCES: -1.0, LOCATIONS: -2.0}),
+]
+
+BIAS: Dict[str, float] = {FACTS: -2.0, PREFERENCES: -2.0, LOCATIONS: -2.0}
+
+# 概率不低于该值时检索完整 top_k，否则只检索一半
+_FULL_TOP_K_PROBABILITY = 0.85
+
+
+def _sigmoid(x: float) -> float:
+    return 1.0 / (1.0 + math.exp(-x))
+
+
+class MemoryIntent:
+    """分类结果：各命名空间的概率、被选中的命名空间和检索条数"""
+
+    def __init__(self, probabilities: Dict[str, float], top_k: Dict[str, int], features: List[str]):
+        self.probabilities = probabilities
+        self.top_k = top_k
+        self.features = features
+
+    @property
+    def namespaces(self) -> List[str]:
+        return list(self.top_k)
+
+
+class MemoryIntentClassifier:
+    """长期记忆检索意图分类器"""
+
+    def __init__(self, threshold: float = MEMORY_INTENT_THRESHOLD, default_top_k: Optional[Dict[str, int]] = None):
+        """
+        Args:
+            threshold: 检索某个命名空间的最低概率
+            default_top_k: 各命名空间的完整检索条数
+        """
+        self.threshold = threshold
+        self.default_top_k = default_top_k or {FACTS: 5, PREFERENCES: 3, LOCATIONS: 5}
+        self._lock = threading.Lock()
+        self._stats = {"prompts": 0, "namespaces_selected": 0, "namespaces_skipped": 0, "records_requested": 0, "records_skipped": 0}
+
+    def classify(self, prompt: str, default_top_k: Optional[Dict[str, int]] = None) -> MemoryIntent:
+        """对用户输入分类
+
+        Args:
+            prompt: 用户输入
+            default_top_k: 各命名空间的完整检索条数，默认使用构造时的配置
+
+        Returns:
+            MemoryIntent；top_k 只包含需要检索的命名空间
+        """
+        default_top_k = default_top_k or self.default_top_k
+        scores = dict(BIAS)
+        matched = []
+        for name, pattern, weights in FEATURES:
+            if pattern.search(prompt):
+                matched.append(name)
+                for namespace, weight in weights.items():
+                    scores[namespace] += weight
+
+        probabilities = {namespace: _sigmoid(score) for namespace, score in scores.items()}
+        top_k = {}
+        for namespace in NAMESPACES:
+            full = default_top_k.get(namespace)
+            if full is None or probabilities[namespace] < self.threshold:
+                continue
+            top_k[namespace] = full if probabilities[namespace] >= _FULL_TOP_K_PROBABILITY else max(1, full // 2)
+
+        full_records = sum(default_top_k.get(namespace, 0) for namespace in NAMESPACES)
+        with self._lock:
+            self._stats["prompts"] += 1
+            self._stats["namespaces_selected"] += len(top_k)
+            self._stats["namespaces_skipped"] += sum(1 for namespace in NAMESPACES if namespace in default_top_k) - len(top_k)
+            self._stats["records_requested"] += sum(top_k.values())
+            self._stats["records_skipped"] += full_records - sum(top_k.values())
+        return MemoryIntent(probabilities, top_k, matched)
+
+    def stats(self) -> Dict[str, Any]:
+        """返回分类计数器快照"""
+        with self._lock:
+            return dict(self._stats)
+
+
+_classifier = MemoryIntentClassifier()
+
+
+def get_memory_intent_classifier() -> MemoryIntentClassifier:
+    """获取进程级记忆检索意图分类器"""
+    return _classifier
@@ -1,10 +1,40 @@
 """Memory 相关工具函数"""
+import asyncio
+import bisect
+import contextvars
 import logging
-from typing import Dict, Any, List
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Callable, Optional, Tuple
+from opentelemetry import trace
 from bedrock_agentcore.memory.integrations.strands.config import AgentCoreMemoryConfig, RetrievalConfig
+from bedrock_agentcore.memory.integrations.strands.session_manager import AgentCoreMemorySessionManager
+
+from src.config import (
+    SESSION_CACHE_MAX_SIZE,
+    SESSION_CACHE_IDLE_TTL,
+    RECENT_TURNS_MAX_TURNS,
+    RECENT_TURNS_MAX_SESSIONS,
+    MEMORY_RETRIEVAL_CACHE_TTL,
+    MEMORY_RETRIEVAL_CACHE_MAX_BYTES,
+    MEMORY_EXTRACTION_DELAY,
+    MEMORY_RETRIEVAL_WORKERS,
+    MEMORY_INTENT_ROUTING
+)
+from src.utils.cache import FRESH, TTLCache
+from src.utils.history import HistoryCompactor, get_history_compactor
+from src.utils.intent import NAMESPACES, MemoryIntentClassifier, get_memory_intent_classifier
+from src.utils.metrics import MEMORY_RETRIEVAL_DURATION
+from src.utils.places import get_known_places
+from src.utils.tracing import mark_error, start_span
 
 logger = logging.getLogger(__name__)
 
+# Agent 模板绑定的 Agent 使用 strands 默认的 agent_id（AgentCore Memory 按 actor_id 存储，不区分 agent_id）
+_AGENT_ID = "default"
+
 
 def get_actor_and_session_id(context) -> tuple[str, str]:
     """从上下文中提取 actor_id 和 session_id
@@ -49,67 +79,666 @@ def create_memory_config(memory_id: str, actor_id: str, session_id: str) -> Agen
     )
 
 
-def build_context_aware_prompt(prompt: str, conversation_history: List[Dict[str, Any]]) -> str:
+class MemoryRetrievalCache:
+    """按用户缓存长期记忆检索结果
+
+    键为 (actor_id, 命名空间, 归一化查询, top_k)，按 TTL 过期、按字节数 LRU 淘汰。
+    长期记忆由对话事件异步抽取：用户写入新事件后，写入前缓存的结果最迟在
+    extraction_delay 秒后失效（抽取出的新记录此时才可能被检索到）。
+    """
+
+    def __init__(
+        self,
+        ttl: float = MEMORY_RETRIEVAL_CACHE_TTL,
+        max_bytes: int = MEMORY_RETRIEVAL_CACHE_MAX_BYTES,
+        extraction_delay: float = MEMORY_EXTRACTION_DELAY
+    ):
+        """
+        Args:
+            ttl: 检索结果有效期（秒），0 表示不缓存
+            max_bytes: 缓存占用的最大字节数
+            extraction_delay: 写入新事件后，旧结果最迟多久（秒）失效
+        """
+        self.cache = TTLCache(ttl=ttl, max_bytes=max_bytes)
+        self.extraction_delay = extraction_delay
+        # actor_id -> 尚未生效的写入的生效时间（写入时间 + 抽取延迟，升序）与最近一次已生效的写入的生效时间
+        self._pending_writes: Dict[str, deque] = {}
+        self._visible_write: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._invalidations = 0
+
+    @staticmethod
+    def _key(actor_id: str, namespace: str, query: str, top_k: int) -> Tuple[str, str, str, int]:
+        return actor_id, namespace, " ".join(query.lower().split()), top_k
+
+    def _last_visible_write(self, actor_id: str, now: float) -> float:
+        """已生效的最近一次写入的生效时间，调用方需持有锁
+
+        在生效时间之前取得的结果可能缺少该写入抽取出的记录，视为过期。
+        """
+        pending = self._pending_writes.get(actor_id)
+        while pending and pending[0] <= now:
+            self._visible_write[actor_id] = pending.popleft()
+        if pending is not None and not pending:
+            del self._pending_writes[actor_id]
+        return self._visible_write.get(actor_id, float("-inf"))
+
+    def get(self, actor_id: str, namespace: str, query: str, top_k: int) -> Optional[List[str]]:
+        """读取缓存的检索结果，未命中或已失效时返回 None"""
+        key = self._key(actor_id, namespace, query, top_k)
+        state, value = self.cache.lookup(key)
+        if state != FRESH:
+            return None
+        fetched_at, items = value
+        with self._lock:
+            stale = fetched_at < self._last_visible_write(actor_id, time.monotonic())
+            if stale:
+                self._invalidations += 1
+        if stale:
+            self.cache.invalidate(key)
+            return None
+        return items
+
+    def put(self, actor_id: str, namespace: str, query: str, top_k: int, items: List[str], cost_ms: float = 0.0) -> None:
+        """写入检索结果"""
+        self.cache.put(self._key(actor_id, namespace, query, top_k), (time.monotonic(), items), cost_ms=cost_ms)
+
+    def invalidate(self, actor_id: str, delay: Optional[float] = None) -> None:
+        """用户写入了新的对话事件或记忆记录
+
+        Args:
+            actor_id: 用户标识
+            delay: 旧结果多久后失效（秒），默认 extraction_delay，0 表示立即失效
+        """
+        delay = self.extraction_delay if delay is None else delay
+        now = time.monotonic()
+        with self._lock:
+            if delay <= 0:
+                self._visible_write[actor_id] = now
+                return
+            # 按生效时间入队（delay 不同时保持有序）
+            pending = self._pending_writes.setdefault(actor_id, deque())
+            visible_at = now + delay
+            if not pending or pending[-1] <= visible_at:
+                pending.append(visible_at)
+            else:
+                bisect.insort(pending, visible_at)
+
+    def stats(self) -> Dict[str, Any]:
+        """返回缓存计数器快照"""
+        snapshot = self.cache.stats()
+        with self._lock:
+            snapshot["invalidations"] = self._invalidations
+            snapshot["actors_pending_extraction"] = len(self._pending_writes)
+        return snapshot
+
+
+_retrieval_cache = MemoryRetrievalCache()
+_retrieval_executor = ThreadPoolExecutor(max_workers=max(1, MEMORY_RETRIEVAL_WORKERS), thread_name_prefix="memory-retrieval")
+
+
+def get_memory_retrieval_cache() -> MemoryRetrievalCache:
+    """获取进程级长期记忆检索缓存"""
+    return _retrieval_cache
+
+
+def _namespace_label(namespace: str) -> str:
+    """指标标签使用命名空间的最后一段（facts / preferences / locations），避免按用户展开"""
+    return namespace.rstrip("/").rsplit("/", 1)[-1] or namespace
+
+
+def _retrieve_namespace(
+    memory_client,
+    memory_id: str,
+    actor_id: str,
+    namespace: str,
+    retrieval_config: RetrievalConfig,
+    query: str,
+    cache: Optional[MemoryRetrievalCache]
+) -> List[str]:
+    """检索一个命名空间（先查缓存），按命名空间记录耗时"""
+    label = _namespace_label(namespace)
+    start = time.perf_counter()
+    with start_span("memory.retrieve", **{"memory.namespace": label, "memory.top_k": retrieval_config.top_k}) as span:
+        if cache is not None:
+            items = cache.get(actor_id, namespace, query, retrieval_config.top_k)
+            if items is not None:
+                span.set_attribute("memory.source", "cache")
+                span.set_attribute("memory.records", len(items))
+                MEMORY_RETRIEVAL_DURATION.observe((time.perf_counter() - start) * 1000, namespace=label, outcome="hit")
+                return items
+
+        span.set_attribute("memory.source", "remote")
+        try:
+            memories = memory_client.retrieve_memories(
+                memory_id=memory_id,
+                namespace_path=namespace,
+                query=query,
+                top_k=retrieval_config.top_k
+            )
+        except Exception as e:
+            mark_error(span, e)
+            MEMORY_RETRIEVAL_DURATION.observe((time.perf_counter() - start) * 1000, namespace=label, outcome="error")
+            raise
+        if retrieval_config.relevance_score:
+            memories = [m for m in memories if m.get("score", 0.0) >= retrieval_config.relevance_score]
+        items = []
+        for memory in memories:
+            content = memory.get("content", {}) if isinstance(memory, dict) else {}
+            text = content.get("text", "").strip() if isinstance(content, dict) else ""
+            if text:
+                items.append(text)
+
+        cost_ms = (time.perf_counter() - start) * 1000
+        span.set_attribute("memory.records", len(items))
+        MEMORY_RETRIEVAL_DURATION.observe(cost_ms, namespace=label, outcome="miss")
+        if cache is not None:
+            cache.put(actor_id, namespace, query, retrieval_config.top_k, items, cost_ms=cost_ms)
+        return items
+
+
+def select_namespaces(
+    retrieval_config: Dict[str, RetrievalConfig],
+    query: str,
+    classifier: Optional[MemoryIntentClassifier] = None
+) -> Dict[str, RetrievalConfig]:
+    """按用户输入的意图选择需要检索的命名空间和检索条数
+
+    分类器不认识的命名空间（不是 facts / preferences / locations）始终检索。
+
+    Args:
+        retrieval_config: 命名空间 -> RetrievalConfig
+        query: 用户输入
+        classifier: 意图分类器，默认使用进程级分类器
+
+    Returns:
+        需要检索的命名空间 -> RetrievalConfig（top_k 按意图调整）
+    """
+    classifier = classifier or get_memory_intent_classifier()
+    labels = {namespace: _namespace_label(namespace) for namespace in retrieval_config}
+    intent = classifier.classify(query, {
+        labels[namespace]: config.top_k for namespace, config in retrieval_config.items() if labels[namespace] in NAMESPACES
+    })
+    selected = {}
+    for namespace, config in retrieval_config.items():
+        label = labels[namespace]
+        if label not in NAMESPACES:
+            selected[namespace] = config
+        elif label in intent.top_k:
+            selected[namespace] = config if intent.top_k[label] == config.top_k else config.model_copy(update={"top_k": intent.top_k[label]})
+    return selected
+
+
+def retrieve_long_term_memories(
+    memory_client,
+    memory_id: str,
+    actor_id: str,
+    retrieval_config: Dict[str, RetrievalConfig],
+    query: str,
+    cache: Optional[MemoryRetrievalCache] = None,
+    executor: Optional[ThreadPoolExecutor] = None
+) -> List[str]:
+    """并发检索所有命名空间的长期记忆
+
+    各命名空间在进程级线程池中并发检索（缓存命中的不发请求），单个命名空间失败不影响其他命名空间。
+
+    Args:
+        memory_client: bedrock_agentcore MemoryClient
+        memory_id: Memory ID
+        actor_id: 用户标识
+        retrieval_config: 命名空间 -> RetrievalConfig（命名空间已包含 actor_id）
+        query: 检索查询（用户输入）
+        cache: 检索结果缓存，None 表示不缓存
+        executor: 线程池，默认使用进程级共享线程池
+
+    Returns:
+        按 retrieval_config 顺序拼接的记忆文本
+    """
+    executor = executor or _retrieval_executor
+    futures = [
+        (namespace, executor.submit(
+            contextvars.copy_context().run,
+            _retrieve_namespace, memory_client, memory_id, actor_id, namespace, config, query, cache
+        ))
+        for namespace, config in retrieval_config.items()
+    ]
+    results: List[str] = []
+    for namespace, future in futures:
+        try:
+            results.extend(future.result())
+        except Exception as e:
+            logger.error(f"Failed to retrieve memories for namespace {namespace}: {e}")
+    return results
+
+
+class CachedMemorySessionManager(AgentCoreMemorySessionManager):
+    """长期记忆检索走共享线程池和按用户的检索缓存；写入对话事件后使该用户的缓存失效"""
+
+    def __init__(self, agentcore_memory_config: AgentCoreMemoryConfig, region_name: Optional[str] = None,
+                 retrieval_cache: Optional[MemoryRetrievalCache] = None, **kwargs: Any):
+        self.retrieval_cache = retrieval_cache or get_memory_retrieval_cache()
+        super().__init__(agentcore_memory_config, region_name, **kwargs)
+
+    def create_message(self, session_id: str, agent_id: str, session_message, **kwargs: Any):
+        event = super().create_message(session_id, agent_id, session_message, **kwargs)
+        if event is not None:
+            self.retrieval_cache.invalidate(self.config.actor_id)
+        return event
+
+    def retrieve_customer_context(self, event) -> None:
+        messages = event.agent.messages
+        if not messages or messages[-1].get("role") != "user" or not self.config.retrieval_config:
+            return None
+        content = messages[-1].get("content")
+        if not content or "text" not in content[0]:
+            return None
+
+        # 只用当前问题判断意图和检索（增强提示词中的对话历史会影响意图判断，且每轮都在变化，使检索缓存无法命中）
+        question = current_question(content[0]["text"])
+        retrieval_config = {
+            namespace.format(
+                actorId=self.config.actor_id,
+                sessionId=self.config.session_id,
+                memoryStrategyId=config.strategy_id or ""
+            ): config
+            for namespace, config in self.config.retrieval_config.items()
+        }
+        try:
+            with start_span("memory.retrieve_customer_context") as span:
+                if MEMORY_INTENT_ROUTING:
+                    retrieval_config = select_namespaces(retrieval_config, question)
+                    span.set_attribute("memory.namespaces", [_namespace_label(namespace) for namespace in retrieval_config])
+                if not retrieval_config:
+                    return None
+                context_items = retrieve_long_term_memories(
+                    self.memory_client,
+                    self.config.memory_id,
+                    self.config.actor_id,
+                    retrieval_config,
+                    question,
+                    cache=self.retrieval_cache
+                )
+                span.set_attribute("memory.records", len(context_items))
+            if context_items:
+                context_text = "\n".join(context_items)
+                messages[-1]["content"].insert(0, {"text": f"<{self.config.context_tag}>{context_text}</{self.config.context_tag}>"})
+                logger.info(f"Retrieved {len(context_items)} customer context items")
+            # 记录中带标签的地点（家、公司等）供之后请求的推测性预取使用
+            for item in context_items:
+                get_known_places().learn(self.config.actor_id, item)
+        except Exception as e:
+            # 与 AgentCoreMemorySessionManager 一致：检索失败不影响本轮对话
+            logger.error(f"Failed to retrieve customer context: {e}")
+
+
+class SessionEntry:
+    """会话缓存条目：会话管理器以及绑定在它上面的 Agent"""
+
+    def __init__(self, key: Tuple[str, str], session_manager, cached: bool = True):
+        self.key = key
+        self.session_manager = session_manager
+        self.cached = cached
+        self.agent = None
+        self.agent_template = None
+        self.in_use = False
+        self.last_used = time.monotonic()
+
+
+class SessionManagerCache:
+    """按 (actor_id, session_id) 缓存 AgentCoreMemorySessionManager 的 LRU
+
+    同一会话的多轮请求复用同一个会话管理器（以及它的 boto3 客户端），
+    按容量和空闲时间淘汰。同一会话的并发请求不会共享条目：
+    条目正在使用时，本次请求使用一个不缓存的临时会话管理器。
+    """
+
+    def __init__(
+        self,
+        memory_id: str,
+        region: str,
+        max_size: int = SESSION_CACHE_MAX_SIZE,
+        idle_ttl: float = SESSION_CACHE_IDLE_TTL,
+        factory: Optional[Callable[[str, str], Any]] = None
+    ):
+        """
+        Args:
+            memory_id: Memory ID
+            region: AWS 区域
+            max_size: 最多缓存的会话数
+            idle_ttl: 空闲多久（秒）后淘汰
+            factory: 创建会话管理器的函数 (actor_id, session_id) -> session_manager
+        """
+        self.memory_id = memory_id
+        self.region = region
+        self.max_size = max(1, max_size)
+        self.idle_ttl = idle_ttl
+        self._factory = factory or self._create_session_manager
+        self._entries: "OrderedDict[Tuple[str, str], SessionEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "busy_bypasses": 0
+        }
+
+    def _create_session_manager(self, actor_id: str, session_id: str):
+        memory_config = create_memory_config(self.memory_id, actor_id, session_id)
+        return CachedMemorySessionManager(memory_config, self.region)
+
+    def _collect_expired(self, now: float) -> List[SessionEntry]:
+        """移除空闲超时的条目，调用方需持有锁"""
+        expired = []
+        for key, entry in list(self._entries.items()):
+            if entry.in_use or now - entry.last_used <= self.idle_ttl:
+                continue
+            del self._entries[key]
+            self._stats["expirations"] += 1
+            expired.append(entry)
+        return expired
+
+    def _collect_overflow(self) -> List[SessionEntry]:
+        """按 LRU 顺序移除超出容量的空闲条目，调用方需持有锁"""
+        evicted = []
+        for key, entry in list(self._entries.items()):
+            if len(self._entries) <= self.max_size:
+                break
+            if entry.in_use:
+                continue
+            del self._entries[key]
+            self._stats["evictions"] += 1
+            evicted.append(entry)
+        return evicted
+
+    @staticmethod
+    def _close(entries: List[SessionEntry]) -> None:
+        for entry in entries:
+            close = getattr(entry.session_manager, "close", None)
+            if close is None:
+                continue
+            try:
+                close()
+            except Exception as e:
+                logger.warning(f"Failed to close session manager for {entry.key}: {e}")
+
+    def acquire(self, actor_id: str, session_id: str) -> SessionEntry:
+        """取出会话条目（未命中时新建），使用完毕后需调用 release()
+
+        Args:
+            actor_id: 用户标识
+            session_id: 会话标识
+
+        Returns:
+            SessionEntry 实例
+        """
+        key = (actor_id, session_id)
+        now = time.monotonic()
+        with self._lock:
+            stale = self._collect_expired(now)
+            entry = self._entries.get(key)
+            hit = entry is not None and not entry.in_use
+            busy = entry is not None and entry.in_use
+            if hit:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                entry.in_use = True
+                entry.last_used = now
+            elif busy:
+                self._stats["busy_bypasses"] += 1
+            else:
+                self._stats["misses"] += 1
+
+        self._close(stale)
+        if hit:
+            return entry
+
+        # 在锁外创建会话管理器（会构建 boto3 客户端）
+        with start_span("memory.create_session_manager", **{"agentcore.actor_id": actor_id, "agentcore.session_id": session_id}):
+            session_manager = self._factory(actor_id, session_id)
+        entry = SessionEntry(key, session_manager, cached=not busy)
+        entry.in_use = True
+        if busy:
+            return entry
+
+        with self._lock:
+            existing = self._entries.get(key)
+            if existing is not None:
+                # 并发未命中时另一个请求已放入条目，本次请求使用临时条目
+                entry.cached = False
+                return entry
+            self._entries[key] = entry
+            evicted = self._collect_overflow()
+        self._close(evicted)
+        return entry
+
+    def release(self, entry: SessionEntry, discard: bool = False) -> None:
+        """归还会话条目；临时条目会被直接关闭
+
+        Args:
+            entry: acquire() 返回的条目
+            discard: 从缓存中移除该条目（例如请求中途失败，Agent 状态不可信）
+        """
+        entry.last_used = time.monotonic()
+        if not entry.cached:
+            self._close([entry])
+            return
+
+        with self._lock:
+            entry.in_use = False
+            if discard and self._entries.get(entry.key) is entry:
+                del self._entries[entry.key]
+                evicted = [entry]
+            else:
+                evicted = self._collect_overflow()
+        self._close(evicted)
+
+    def stats(self) -> Dict[str, Any]:
+        """返回缓存计数器快照"""
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot["size"] = len(self._entries)
+        lookups = snapshot["hits"] + snapshot["misses"]
+        snapshot["hit_ratio"] = snapshot["hits"] / lookups if lookups else 0.0
+        return snapshot
+
+
+class RecentTurnsBuffer:
+    """进程内按会话保存最近对话的环形缓冲（写穿）
+
+    每轮流式响应完成后追加本轮的用户输入和助手回答（会话不在缓冲中时连同本轮读到的历史一起填充）；
+    下一轮请求先查缓冲，未命中（本进程第一次处理该会话）时才从 AgentCore Memory 拉取。
+    缓冲按条计数：用户输入和助手回答各为一条。
+    会话数量有上限，按 LRU 淘汰。
+    """
+
+    def __init__(self, max_turns: int = RECENT_TURNS_MAX_TURNS, max_sessions: int = RECENT_TURNS_MAX_SESSIONS):
+        """
+        Args:
+            max_turns: 每个会话保留的最大对话条数
+            max_sessions: 最多保留的会话数
+        """
+        self.max_turns = max(1, max_turns)
+        self.max_sessions = max(1, max_sessions)
+        self._sessions: "OrderedDict[Tuple[str, str], deque]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "appends": 0}
+
+    def _evict_overflow(self) -> None:
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def get(self, key: Tuple[str, str], max_turns: int) -> Optional[List[Dict[str, Any]]]:
+        """读取会话最近的对话
+
+        Returns:
+            最近 max_turns 条对话；会话不在缓冲中时返回 None
+        """
+        with self._lock:
+            turns = self._sessions.get(key)
+            if turns is None:
+                self._stats["misses"] += 1
+                return None
+            self._sessions.move_to_end(key)
+            self._stats["hits"] += 1
+            return list(turns)[-max_turns:]
+
+    def seed(self, key: Tuple[str, str], turns: List[Dict[str, Any]]) -> None:
+        """用从 Memory 拉取的历史填充会话缓冲"""
+        with self._lock:
+            self._sessions[key] = deque(turns, maxlen=self.max_turns)
+            self._sessions.move_to_end(key)
+            self._evict_overflow()
+
+    def record(self, key: Tuple[str, str], turns: List[Dict[str, Any]], history: Optional[List[Dict[str, Any]]] = None) -> None:
+        """追加一轮完成的对话；会话不在缓冲中时用本轮之前的对话历史填充
+
+        Args:
+            key: (actor_id, session_id)
+            turns: 本轮的用户输入和助手回答
+            history: 本轮之前的对话历史，为 None（本轮未读取历史）时不填充
+        """
+        with self._lock:
+            if key not in self._sessions:
+                if history is None:
+                    return
+                self._sessions[key] = deque(history, maxlen=self.max_turns)
+                self._evict_overflow()
+            self._sessions[key].extend(turns)
+            self._sessions.move_to_end(key)
+            self._stats["appends"] += len(turns)
+
+    def append(self, key: Tuple[str, str], role: str, content: str) -> None:
+        """追加一条对话（仅对已在缓冲中的会话生效，避免缓冲内容缺少更早的历史）"""
+        with self._lock:
+            turns = self._sessions.get(key)
+            if turns is None:
+                return
+            turns.append({'role': role, 'content': content})
+            self._sessions.move_to_end(key)
+            self._stats["appends"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """返回缓冲计数器快照"""
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot["sessions"] = len(self._sessions)
+        return snapshot
+
+
+def build_context_aware_prompt(
+    prompt: str,
+    conversation_history: List[Dict[str, Any]],
+    compactor: Optional[HistoryCompactor] = None,
+    summary: str = ""
+) -> str:
     """构建包含对话历史的上下文感知提示
     
+    对话历史按 token 预算压缩（见 HistoryCompactor），节省的 token 数记录在压缩器计数器和当前 span 上。
+    
     Args:
         prompt: 用户当前输入
         conversation_history: 最近的对话历史
+        compactor: 对话历史压缩器，默认使用进程级压缩器
+        summary: 会话滚动摘要（代替已折叠的较早对话）
     
     Returns:
         增强后的提示词
     """
+    summary_text = f"\n\n[会话摘要]:\n{summary}\n" if summary else ""
     if not conversation_history:
-        return prompt
+        return summary_text + "\n[当前问题]:\n" + prompt if summary_text else prompt
+    
+    compacted = (compactor or get_history_compactor()).compact(conversation_history)
+    span = trace.get_current_span()
+    span.set_attribute("history.tokens_before", compacted.tokens_before)
+    span.set_attribute("history.tokens_saved", compacted.tokens_saved)
+    logger.info(
+        f"Compacted conversation history: {compacted.tokens_before} -> {compacted.tokens_after} tokens "
+        f"({len(compacted.turns)} turns kept, {compacted.shrunk} shrunk, {compacted.dropped} dropped)"
+    )
+    if not compacted.turns:
+        return summary_text + "\n[当前问题]:\n" + prompt if summary_text else prompt
     
     # 构建对话历史摘要
-    history_text = "\n\n[对话历史]:\n"
-    for i, turn in enumerate(conversation_history[-5:], 1):  # 只使用最近5轮对话
-        role = turn.get('role', 'unknown')
-        content = turn.get('content', '')
-        history_text += f"{i}. {role}: {content[:200]}...\n" if len(content) > 200 else f"{i}. {role}: {content}\n"
+    history_text = summary_text + ("\n" if summary_text else "\n\n") + "[对话历史]:\n"
+    for i, (role, content) in enumerate(compacted.turns, 1):
+        history_text += f"{i}. {role}: {content}\n"
     
     history_text += "\n[当前问题]:\n"
     
     return history_text + prompt
 
 
-async def get_conversation_context(session_manager, max_turns: int = 10) -> List[Dict[str, Any]]:
+def current_question(prompt: str) -> str:
+    """取增强提示词中的当前问题（去掉会话摘要和对话历史），未增强的提示词原样返回"""
+    return prompt.rsplit("[当前问题]:\n", 1)[-1]
+
+
+async def get_conversation_context(
+    session_manager,
+    max_turns: int = 10,
+    turn_buffer: Optional[RecentTurnsBuffer] = None,
+    session_key: Optional[Tuple[str, str]] = None
+) -> List[Dict[str, Any]]:
     """获取对话历史上下文
     
     Args:
         session_manager: AgentCore Memory 会话管理器
-        max_turns: 获取的最大对话轮数
+        max_turns: 获取的最大对话条数（用户输入和助手回答各为一条，与 RecentTurnsBuffer 一致）
+        turn_buffer: 进程内最近对话缓冲，命中时不再访问 Memory
+        session_key: (actor_id, session_id)，与 turn_buffer 一起使用
     
     Returns:
         对话历史列表
     """
+    with start_span("memory.get_conversation_context", max_turns=max_turns) as span:
+        history = await _get_conversation_context(session_manager, max_turns, turn_buffer, session_key, span)
+        span.set_attribute("memory.turns", len(history))
+        return history
+
+
+async def _get_conversation_context(session_manager, max_turns, turn_buffer, session_key, span) -> List[Dict[str, Any]]:
+    """get_conversation_context 的实现，结果来源记录在 span 上"""
+    use_buffer = turn_buffer is not None and session_key is not None
+    if use_buffer:
+        cached_turns = turn_buffer.get(session_key, max_turns)
+        if cached_turns is not None:
+            span.set_attribute("memory.source", "buffer")
+            logger.info(f"Retrieved {len(cached_turns)} conversation turns from local buffer")
+            return cached_turns
+    
+    span.set_attribute("memory.source", "remote")
     try:
-        # 获取最近的对话历史
-        turns = session_manager.get_last_k_turns(k=max_turns)
+        # 获取最近的 max_turns 条消息（阻塞的网络调用，放到线程池中执行，避免阻塞事件循环）
+        loop = asyncio.get_running_loop()
+        messages = await loop.run_in_executor(
+            None,
+            lambda: session_manager.list_messages(session_manager.session_id, _AGENT_ID, limit=max_turns)
+        )
         
         conversation_history = []
-        for turn in turns:
-            # 提取角色和内容
-            role = turn.get('role', 'unknown')
-            content = turn.get('content', '')
-            
-            if isinstance(content, list):
-                # 如果内容是列表，提取文本
-                text_content = ' '.join([
-                    item.get('text', '') for item in content 
-                    if isinstance(item, dict) and 'text' in item
-                ])
-                content = text_content
-            
-            conversation_history.append({
-                'role': role,
-                'content': content
-            })
+        for session_message in messages:
+            # 只保留文本（工具调用和工具结果消息不计入对话历史）
+            message = session_message.message
+            text_content = ' '.join([
+                item.get('text', '') for item in message.get('content', [])
+                if isinstance(item, dict) and 'text' in item
+            ])
+            if text_content:
+                conversation_history.append({
+                    'role': message.get('role', 'unknown'),
+                    'content': text_content
+                })
         
         logger.info(f"Retrieved {len(conversation_history)} conversation turns")
+        # list_messages 读取失败时也返回空列表，空结果不填充缓冲（会话首轮完成后由 record 填充）
+        if use_buffer and conversation_history:
+            turn_buffer.seed(session_key, conversation_history)
         return conversation_history
         
     except Exception as e:
+        mark_error(span, e)
         logger.warning(f"Failed to retrieve conversation history: {e}")
         return []
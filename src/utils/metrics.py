@@ -0,0 +1,246 @@
+"""请求阶段和工具调用的耗时指标"""
+import threading
+from bisect import bisect_left
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+from strands.hooks import AfterToolCallEvent, HookProvider, HookRegistry
+
+# 直方图桶上限（毫秒）
+DEFAULT_BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+METRIC_PREFIX = "agentcore"
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Dict[str, Any]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+class Histogram:
+    """固定桶直方图，观测值单位为毫秒
+
+    每个标签组合一组计数器，observe 只做一次二分查找和几次加法，开销在微秒级。
+    """
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str], buckets: Sequence[float] = DEFAULT_BUCKETS_MS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        # 标签值 -> [各桶计数..., +Inf 计数, 总和, 总数]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value_ms: float, **labels: Any) -> None:
+        """记录一次观测（毫秒）"""
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        index = bisect_left(self.buckets, value_ms)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 3)
+            series[index] += 1
+            series[-2] += value_ms
+            series[-1] += 1
+
+    def _quantile(self, counts: List[float], total: float, q: float) -> float:
+        """按桶线性插值估算分位数（毫秒）"""
+        rank = q * total
+        cumulative = 0.0
+        lower = 0.0
+        for upper, count in zip(self.buckets, counts):
+            if count and cumulative + count >= rank:
+                return lower + (upper - lower) * (rank - cumulative) / count
+            cumulative += count
+            lower = upper
+        return self.buckets[-1]
+
+    def series(self) -> List[Tuple[Dict[str, str], List[float]]]:
+        """所有标签组合的计数快照"""
+        with self._lock:
+            return [(dict(zip(self.label_names, key)), list(values)) for key, values in self._series.items()]
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """JSON 友好的快照：次数、平均值和估算分位数（毫秒）"""
+        result = []
+        for labels, values in self.series():
+            total = values[-1]
+            result.append({
+                "labels": labels,
+                "count": int(total),
+                "sum_ms": round(values[-2], 3),
+                "avg_ms": round(values[-2] / total, 3) if total else 0.0,
+                "p50_ms": round(self._quantile(values, total, 0.5), 3),
+                "p95_ms": round(self._quantile(values, total, 0.95), 3),
+                "p99_ms": round(self._quantile(values, total, 0.99), 3),
+            })
+        return result
+
+    def render(self) -> List[str]:
+        """Prometheus 文本格式（按 Prometheus 约定以秒为单位输出）"""
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for labels, values in self.series():
+            cumulative = 0
+            for upper, count in zip(self.buckets, values):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels({**labels, 'le': f'{upper / 1000:g}'})} {int(cumulative)}")
+            lines.append(f"{self.name}_bucket{_format_labels({**labels, 'le': '+Inf'})} {int(values[-1])}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {values[-2] / 1000:.6f}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {int(values[-1])}")
+        return lines
+
+
+class MetricsRegistry:
+    """指标注册表
+
+    包含耗时直方图，以及各组件（会话缓存、工具缓存等）stats() 的计数器快照。
+    """
+
+    def __init__(self):
+        self._histograms: Dict[str, Histogram] = {}
+        self._collectors: Dict[str, Callable[[], Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name: str, help_text: str, label_names: Sequence[str], buckets: Sequence[float] = DEFAULT_BUCKETS_MS) -> Histogram:
+        """获取或创建直方图"""
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram(name, help_text, label_names, buckets)
+            return histogram
+
+    def register_stats(self, name: str, collector: Callable[[], Dict[str, Any]]) -> None:
+        """注册组件的 stats() 函数，导出时调用"""
+        self._collectors[name] = collector
+
+    def _collect(self) -> Dict[str, Dict[str, Any]]:
+        stats = {}
+        for name, collector in list(self._collectors.items()):
+            try:
+                stats[name] = collector()
+            except Exception as e:
+                stats[name] = {"error": str(e)}
+        return stats
+
+    def snapshot(self) -> Dict[str, Any]:
+        """JSON 快照"""
+        return {
+            "histograms": {name: histogram.snapshot() for name, histogram in list(self._histograms.items())},
+            "stats": self._collect(),
+        }
+
+    def render_prometheus(self) -> str:
+        """Prometheus 文本格式"""
+        lines: List[str] = []
+        for histogram in list(self._histograms.values()):
+            lines.extend(histogram.render())
+
+        for component, stats in self._collect().items():
+            for key, value in stats.items():
+                if isinstance(value, dict):
+                    for sub_key, sub_value in value.items():
+                        if isinstance(sub_value, (int, float)) and not isinstance(sub_value, bool):
+                            lines.append(f"{METRIC_PREFIX}_{component}_{sub_key}{_format_labels({'key': key})} {sub_value}")
+                elif isinstance(value, (int, float)) and not isinstance(value, bool):
+                    lines.append(f"{METRIC_PREFIX}_{component}_{key} {value}")
+        return "\n".join(lines) + "\n"
+
+
+_registry = MetricsRegistry()
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    """获取进程级指标注册表"""
+    return _registry
+
+
+STAGE_DURATION = _registry.histogram(
+    f"{METRIC_PREFIX}_stage_duration_seconds",
+    "Duration of invoke stages (session manager, history, tools, agent, first token, total, ...)",
+    ("stage", "outcome")
+)
+TOOL_DURATION = _registry.histogram(
+    f"{METRIC_PREFIX}_tool_duration_seconds",
+    "Duration of tool calls by tool name and outcome",
+    ("tool", "outcome")
+)
+
+MEMORY_RETRIEVAL_DURATION = _registry.histogram(
+    f"{METRIC_PREFIX}_memory_retrieval_duration_seconds",
+    "Duration of long-term memory retrieval by namespace and outcome (hit, miss, error)",
+    ("namespace", "outcome")
+)
+
+
+class ModelTokenUsage:
+    """模型调用的 token 用量，包括提示词缓存读取和写入的 token 数
+
+    Bedrock 的 inputTokens 不包含缓存读取/写入的部分。
+    """
+
+    _FIELDS = (
+        ("inputTokens", "input_tokens"),
+        ("outputTokens", "output_tokens"),
+        ("cacheReadInputTokens", "cache_read_input_tokens"),
+        ("cacheWriteInputTokens", "cache_write_input_tokens"),
+    )
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {"model_calls": 0, **{name: 0 for _, name in self._FIELDS}}
+
+    def record(self, usage: Dict[str, Any]) -> None:
+        """累计一次模型调用的 usage（模型流中 metadata 事件的 usage 字段）"""
+        with self._lock:
+            self._stats["model_calls"] += 1
+            for key, name in self._FIELDS:
+                self._stats[name] += int(usage.get(key) or 0)
+
+    def stats(self) -> Dict[str, Any]:
+        """返回用量快照，cache_read_ratio 为缓存读取占全部输入 token 的比例"""
+        with self._lock:
+            snapshot = dict(self._stats)
+        total_input = snapshot["input_tokens"] + snapshot["cache_read_input_tokens"] + snapshot["cache_write_input_tokens"]
+        snapshot["cache_read_ratio"] = snapshot["cache_read_input_tokens"] / total_input if total_input else 0.0
+        return snapshot
+
+
+_model_token_usage = ModelTokenUsage()
+
+
+def get_model_token_usage() -> ModelTokenUsage:
+    """获取进程级模型 token 用量计数"""
+    return _model_token_usage
+
+
+def observe_stage(stage: str, duration_ms: float, outcome: str = "success") -> None:
+    """记录一个阶段的耗时（毫秒）"""
+    STAGE_DURATION.observe(duration_ms, stage=stage, outcome=outcome)
+
+
+def record_stage_timings(durations: Dict[str, float], outcome: str = "success") -> None:
+    """记录 StageTimer 中的所有阶段耗时"""
+    for stage, duration_ms in durations.items():
+        STAGE_DURATION.observe(duration_ms, stage=stage, outcome=outcome)
+
+
+class ToolMetricsHook(HookProvider):
+    """在每次工具调用结束后按工具名和结果记录耗时"""
+
+    def register_hooks(self, registry: HookRegistry, **kwargs: Any) -> None:
+        registry.add_callback(AfterToolCallEvent, self._after_tool_call)
+
+    def _after_tool_call(self, event: AfterToolCallEvent) -> None:
+        if event.exception is not None:
+            outcome = "exception"
+        else:
+            outcome = (event.result or {}).get("status", "unknown")
+        TOOL_DURATION.observe((event.duration or 0.0) * 1000, tool=event.tool_use.get("name", "unknown"), outcome=outcome)
+
+
+tool_metrics_hook = ToolMetricsHook()
@@ -0,0 +1,108 @@
+"""用户已知地点（家、公司、学校等）的提取和进程内缓存
+
+从长期记忆记录（/users/{actorId}/locations 等）和对话内容中提取带标签的地址，
+例如"我家的地址是:北京海淀区上地十街10号" -> ("家", "北京海淀区上地十街10号")。
+"""
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from src.config import KNOWN_PLACES_MAX_ACTORS
+
+HOME, WORK, SCHOOL = "家", "公司", "学校"
+
+# 地点标签：(标签, 正则)
+PLACE_LABELS: List[Tuple[str, "re.Pattern"]] = [
+    (HOME, re.compile(r"我家|家里|家庭住址|家庭地址|住址|住在|回家|到家|家的地址")),
+    (WORK, re.compile(r"公司|办公室|单位|上班")),
+    (SCHOOL, re.compile(r"学校|放学")),
+]
+
+# 包含区/县的地址，如"北京海淀区上地十街10号"、"北京朝阳区人寿保险大厦"
+# 省/市/区名不含"是、在、位于"等引导词，避免把"住址是北京…"中的引导词算进地址
+_NAME = r"[^\W\dA-Za-z_是在于为到的址户庭住家位用从去回]"
+ADDRESS = re.compile(
+    rf"(?:{_NAME}{{2,3}}(?:省|市))?{_NAME}{{2,4}}(?:区|县)[一-鿿A-Za-z0-9]{{1,20}}?"
+    r"(?:(?:街|路|道|巷)(?:\d+号(?:院|楼)?)?|\d+号(?:院|楼)?|大厦|大楼|中心|广场|商城|商场|医院|酒店|大学|学校|花园|小区|公寓|机场|航站楼|火车站|站|园|村)"
+)
+
+_CLAUSE = re.compile(r"[^，,。；;！!？?\n]+")
+
+
+def extract_places(text: str) -> List[Tuple[Optional[str], str]]:
+    """提取文本中的地址，以及同一分句中的地点标签
+
+    Returns:
+        [(标签或 None, 地址)]，按出现顺序
+    """
+    places = []
+    for clause in _CLAUSE.findall(text or ""):
+        for match in ADDRESS.finditer(clause):
+            # 优先取地址之前的标签（"我家在…"），其次取之后的（"在…上班"）
+            before, after = clause[:match.start()], clause[match.end():]
+            label = next((label for label, pattern in PLACE_LABELS if pattern.search(before)), None)
+            label = label or next((label for label, pattern in PLACE_LABELS if pattern.search(after)), None)
+            places.append((label, match.group()))
+    return places
+
+
+def mentioned_labels(text: str) -> List[str]:
+    """文本中提到的地点标签，按出现位置排序"""
+    positions = []
+    for label, pattern in PLACE_LABELS:
+        match = pattern.search(text or "")
+        if match:
+            positions.append((match.start(), label))
+    return [label for _, label in sorted(positions)]
+
+
+class KnownPlaces:
+    """按 actor_id 保存带标签的已知地点（标签 -> 地址，后出现的覆盖先出现的）
+
+    用户数量有上限，按 LRU 淘汰。
+    """
+
+    def __init__(self, max_actors: int = KNOWN_PLACES_MAX_ACTORS):
+        self.max_actors = max(1, max_actors)
+        self._actors: "OrderedDict[str, Dict[str, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"learned": 0, "evictions": 0}
+
+    def learn(self, actor_id: str, text: str) -> None:
+        """从记忆记录或用户输入中学习带标签的地点"""
+        labeled = [(label, address) for label, address in extract_places(text) if label]
+        if not labeled:
+            return
+        with self._lock:
+            places = self._actors.setdefault(actor_id, {})
+            self._actors.move_to_end(actor_id)
+            for label, address in labeled:
+                if places.get(label) != address:
+                    places[label] = address
+                    self._stats["learned"] += 1
+            while len(self._actors) > self.max_actors:
+                self._actors.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def get(self, actor_id: str) -> Dict[str, str]:
+        """读取用户的已知地点（标签 -> 地址）"""
+        with self._lock:
+            places = self._actors.get(actor_id)
+            if places is None:
+                return {}
+            self._actors.move_to_end(actor_id)
+            return dict(places)
+
+    def stats(self) -> Dict[str, int]:
+        """返回计数器快照"""
+        with self._lock:
+            return {**self._stats, "actors": len(self._actors)}
+
+
+_known_places = KnownPlaces()
+
+
+def get_known_places() -> KnownPlaces:
+    """获取进程级已知地点缓存"""
+    return _known_places
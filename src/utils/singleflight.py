@@ -0,0 +1,74 @@
+"""相同的并发调用合并（single-flight）"""
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """合并进行中的相同调用
+
+    同一事件循环内，key 相同的并发调用只执行一次上游请求，其余调用等待并共享
+    同一个结果（或异常）。上游请求在独立的 Task 中执行，发起者被取消时不会影响
+    其他等待者。共享的结果对象会返回给所有调用方，调用方不应原地修改。
+    """
+
+    def __init__(self):
+        self._calls: Dict[Tuple[asyncio.AbstractEventLoop, str, Hashable], asyncio.Task] = {}
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def _forget(self, flight_key: Tuple[asyncio.AbstractEventLoop, str, Hashable], task: asyncio.Task) -> None:
+        with self._lock:
+            if self._calls.get(flight_key) is task:
+                del self._calls[flight_key]
+        if not task.cancelled():
+            # 所有等待者都已取消时避免 "exception was never retrieved" 警告
+            task.exception()
+
+    async def do(self, group: str, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """执行调用，或加入 key 相同的进行中调用
+
+        Args:
+            group: 调用分组（如 "tavily"、"baidu_maps"），用于分组统计
+            key: 调用的唯一标识
+            fn: 发起上游请求的无参协程函数
+
+        Returns:
+            上游请求的结果
+        """
+        loop = asyncio.get_running_loop()
+        flight_key = (loop, group, key)
+        with self._lock:
+            counters = self._stats.setdefault(group, {"calls": 0, "coalesced": 0})
+            task = self._calls.get(flight_key)
+            if task is None:
+                task = loop.create_task(fn())
+                self._calls[flight_key] = task
+                task.add_done_callback(lambda done: self._forget(flight_key, done))
+                counters["calls"] += 1
+            else:
+                counters["coalesced"] += 1
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """按分组统计上游调用数和被合并的等待者数"""
+        with self._lock:
+            result = {}
+            for group, counters in self._stats.items():
+                total = counters["calls"] + counters["coalesced"]
+                result[group] = {
+                    **counters,
+                    "in_flight": sum(1 for _, g, _ in self._calls if g == group),
+                    "coalesced_ratio": counters["coalesced"] / total if total else 0.0,
+                }
+            return result
+
+
+_single_flight = SingleFlight()
+
+
+def get_single_flight() -> SingleFlight:
+    """获取进程级共享的 single-flight 合并器"""
+    return _single_flight
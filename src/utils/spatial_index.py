@@ -0,0 +1,294 @@
+"""进程内 POI 空间索引"""
+import math
+import threading
+import time
+from array import array
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+
+# 每纬度对应的米数（赤道附近近似值）
+METERS_PER_DEGREE = 111320.0
+
+
+def distance_m(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """两点间距离（米），等距矩形投影近似，城市尺度误差可忽略"""
+    x = math.radians(lng2 - lng1) * math.cos(math.radians((lat1 + lat2) / 2))
+    y = math.radians(lat2 - lat1)
+    return math.hypot(x, y) * 6371000.0
+
+
+class IndexedPOI:
+    """查询返回的 POI"""
+
+    __slots__ = ("uid", "lat", "lng", "categories", "data", "updated_at")
+
+    def __init__(self, uid: str, lat: float, lng: float, categories: Tuple[str, ...], data: Any, updated_at: float):
+        self.uid = uid
+        self.lat = lat
+        self.lng = lng
+        self.categories = categories
+        self.data = data
+        self.updated_at = updated_at
+
+
+class _Cell:
+    """网格单元内的点，按列存储
+
+    经纬度和更新时间存放在 array 中，避免每个点一个 Python 对象：
+    百万级点数时可以显著降低内存占用和垃圾回收停顿。
+    """
+
+    __slots__ = ("positions", "uids", "lats", "lngs", "updated", "categories", "data")
+
+    def __init__(self):
+        self.positions: Dict[str, int] = {}
+        self.uids: List[str] = []
+        self.lats = array("d")
+        self.lngs = array("d")
+        self.updated = array("d")
+        self.categories: List[Tuple[str, ...]] = []
+        self.data: List[Any] = []
+
+    def append(self, uid: str, lat: float, lng: float, updated_at: float, categories: Tuple[str, ...], data: Any) -> None:
+        self.positions[uid] = len(self.uids)
+        self.uids.append(uid)
+        self.lats.append(lat)
+        self.lngs.append(lng)
+        self.updated.append(updated_at)
+        self.categories.append(categories)
+        self.data.append(data)
+
+    def remove(self, uid: str) -> None:
+        # 用最后一个点填补空位，O(1) 删除
+        position = self.positions.pop(uid)
+        last = len(self.uids) - 1
+        if position != last:
+            moved = self.uids[last]
+            self.positions[moved] = position
+            self.uids[position] = moved
+            self.lats[position] = self.lats[last]
+            self.lngs[position] = self.lngs[last]
+            self.updated[position] = self.updated[last]
+            self.categories[position] = self.categories[last]
+            self.data[position] = self.data[last]
+        self.uids.pop()
+        self.lats.pop()
+        self.lngs.pop()
+        self.updated.pop()
+        self.categories.pop()
+        self.data.pop()
+
+
+class _Coverage:
+    """某个类别在一个圆形区域内已完整检索过的记录"""
+
+    __slots__ = ("lat", "lng", "radius_m", "created_at")
+
+    def __init__(self, lat: float, lng: float, radius_m: float, created_at: float):
+        self.lat = lat
+        self.lng = lng
+        self.radius_m = radius_m
+        self.created_at = created_at
+
+
+class SpatialIndex:
+    """按经纬度网格分桶（geohash 式）的 POI 索引
+
+    - 网格单元为 cell_degrees × cell_degrees 的经纬度方格，半径查询只扫描外接矩形覆盖的单元
+    - 点数超过 max_points 时淘汰最久未更新的点，超过 max_age 的点在查询和清理时丢弃
+    - 覆盖记录（coverage）标记"类别 X 在圆形区域内已经检索过"，
+      只有查询圆完全落在新鲜的覆盖区域内时，索引结果才可以代替上游检索
+    """
+
+    def __init__(
+        self,
+        max_points: int,
+        max_age: float,
+        cell_degrees: float = 0.01,
+        max_coverages: int = 64
+    ):
+        """
+        Args:
+            max_points: 最多保留的点数
+            max_age: 点和覆盖记录的最长保留时间（秒）
+            cell_degrees: 网格单元边长（度），0.01 度约 1.1 公里
+            max_coverages: 每个类别最多保留的覆盖记录数
+        """
+        self.max_points = max_points
+        self.max_age = max_age
+        self.cell_degrees = cell_degrees
+        self.max_coverages = max_coverages
+        self._cells: Dict[Tuple[int, int], _Cell] = {}
+        # 点所在的网格单元，按更新时间排序（最旧的在前）
+        self._order: "OrderedDict[str, Tuple[int, int]]" = OrderedDict()
+        # 相同的类别组合共用一个元组
+        self._category_sets: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+        self._coverages: Dict[str, Deque[_Coverage]] = {}
+        self._lock = threading.Lock()
+        self._stats = {"inserts": 0, "updates": 0, "evictions": 0, "expirations": 0, "queries": 0}
+
+    def _cell_key(self, lat: float, lng: float) -> Tuple[int, int]:
+        return int(math.floor(lat / self.cell_degrees)), int(math.floor(lng / self.cell_degrees))
+
+    def _intern(self, categories: Tuple[str, ...]) -> Tuple[str, ...]:
+        return self._category_sets.setdefault(categories, categories)
+
+    def _remove(self, uid: str) -> None:
+        key = self._order.pop(uid)
+        cell = self._cells[key]
+        cell.remove(uid)
+        if not cell.uids:
+            del self._cells[key]
+
+    def _evict_expired(self, now: float) -> None:
+        # _order 按更新时间排序，从最旧的一端清理
+        while self._order:
+            uid, key = next(iter(self._order.items()))
+            cell = self._cells[key]
+            if now - cell.updated[cell.positions[uid]] <= self.max_age:
+                break
+            self._remove(uid)
+            self._stats["expirations"] += 1
+
+    def upsert(self, uid: str, lat: float, lng: float, category: Optional[str] = None, data: Any = None) -> None:
+        """写入或更新一个点
+
+        Args:
+            uid: 点的唯一标识
+            lat: 纬度
+            lng: 经度
+            category: 点所属的类别（同一个点可以属于多个类别）
+            data: 随点保存的原始数据
+        """
+        now = time.monotonic()
+        key = self._cell_key(lat, lng)
+        categories: Tuple[str, ...] = (category,) if category else ()
+        with self._lock:
+            old_key = self._order.get(uid)
+            if old_key is not None:
+                old_cell = self._cells[old_key]
+                position = old_cell.positions[uid]
+                merged = old_cell.categories[position]
+                if category and category not in merged:
+                    merged = merged + (category,)
+                categories = merged
+                if data is None:
+                    data = old_cell.data[position]
+                self._remove(uid)
+                self._stats["updates"] += 1
+            else:
+                self._stats["inserts"] += 1
+
+            cell = self._cells.get(key)
+            if cell is None:
+                cell = self._cells[key] = _Cell()
+            cell.append(uid, lat, lng, now, self._intern(categories), data)
+            self._order[uid] = key
+
+            while len(self._order) > self.max_points:
+                self._remove(next(iter(self._order)))
+                self._stats["evictions"] += 1
+
+    def mark_covered(self, category: str, lat: float, lng: float, radius_m: float) -> None:
+        """记录类别 category 在圆形区域内已经完整检索过"""
+        with self._lock:
+            coverages = self._coverages.setdefault(category, deque(maxlen=self.max_coverages))
+            coverages.append(_Coverage(lat, lng, radius_m, time.monotonic()))
+
+    def is_covered(self, category: str, lat: float, lng: float, radius_m: float, max_age: Optional[float] = None) -> bool:
+        """查询圆是否完全落在某个新鲜的覆盖区域内"""
+        oldest = time.monotonic() - (self.max_age if max_age is None else max_age)
+        with self._lock:
+            for coverage in self._coverages.get(category, ()):
+                if coverage.created_at < oldest:
+                    continue
+                if distance_m(lat, lng, coverage.lat, coverage.lng) + radius_m <= coverage.radius_m:
+                    return True
+        return False
+
+    def _cells_in_radius(self, lat: float, lng: float, radius_m: float) -> Iterable[Tuple[int, int]]:
+        dlat = radius_m / METERS_PER_DEGREE
+        dlng = radius_m / (METERS_PER_DEGREE * max(math.cos(math.radians(lat)), 1e-6))
+        min_i, min_j = self._cell_key(lat - dlat, lng - dlng)
+        max_i, max_j = self._cell_key(lat + dlat, lng + dlng)
+        for i in range(min_i, max_i + 1):
+            for j in range(min_j, max_j + 1):
+                yield i, j
+
+    def query(
+        self,
+        lat: float,
+        lng: float,
+        radius_m: float,
+        category: Optional[str] = None,
+        max_age: Optional[float] = None,
+        limit: Optional[int] = None
+    ) -> List[Tuple[float, IndexedPOI]]:
+        """查询半径范围内的点
+
+        Args:
+            lat: 中心点纬度
+            lng: 中心点经度
+            radius_m: 半径（米）
+            category: 只返回属于该类别的点
+            max_age: 只返回在该时间（秒）内更新过的点，默认使用索引的 max_age
+            limit: 最多返回的点数
+
+        Returns:
+            按距离升序排列的 (距离米数, 点) 列表
+        """
+        now = time.monotonic()
+        oldest = now - (self.max_age if max_age is None else max_age)
+        cos_lat = math.cos(math.radians(lat))
+        scale = math.radians(1) * 6371000.0
+        max_sq = (radius_m / scale) ** 2
+        # 候选点只记录距离平方、所在单元和下标，排序后再为返回的点创建对象，
+        # 大半径查询时避免大量临时对象触发垃圾回收
+        distances: List[float] = []
+        cells: List[_Cell] = []
+        positions: List[int] = []
+        with self._lock:
+            self._stats["queries"] += 1
+            self._evict_expired(now)
+            for key in self._cells_in_radius(lat, lng, radius_m):
+                cell = self._cells.get(key)
+                if cell is None:
+                    continue
+                point_lats, point_lngs, updated, categories = cell.lats, cell.lngs, cell.updated, cell.categories
+                for position in range(len(point_lats)):
+                    dy = point_lats[position] - lat
+                    dx = (point_lngs[position] - lng) * cos_lat
+                    sq = dx * dx + dy * dy
+                    if sq > max_sq or updated[position] < oldest:
+                        continue
+                    if category and category not in categories[position]:
+                        continue
+                    distances.append(sq)
+                    cells.append(cell)
+                    positions.append(position)
+
+            order = sorted(range(len(distances)), key=distances.__getitem__)
+            if limit:
+                order = order[:limit]
+            matches = []
+            for i in order:
+                cell, position = cells[i], positions[i]
+                point = IndexedPOI(
+                    cell.uids[position], cell.lats[position], cell.lngs[position],
+                    cell.categories[position], cell.data[position], cell.updated[position]
+                )
+                matches.append((math.sqrt(distances[i]) * scale, point))
+        return matches
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def stats(self) -> Dict[str, Any]:
+        """索引统计信息"""
+        with self._lock:
+            return {
+                **self._stats,
+                "points": len(self._order),
+                "cells": len(self._cells),
+                "coverages": sum(len(coverages) for coverages in self._coverages.values()),
+            }
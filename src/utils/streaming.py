@@ -0,0 +1,121 @@
+"""流式输出处理"""
+import asyncio
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from src.config import STREAM_COALESCE_WINDOW_MS, STREAM_COALESCE_MAX_BYTES, STREAM_COALESCE_QUEUE_SIZE
+
+_END = object()
+
+
+def _text_delta(event: Any) -> Tuple[Optional[str], Any]:
+    """如果是模型的文本增量事件，返回 (文本, contentBlockIndex)"""
+    if not isinstance(event, dict):
+        return None, None
+    delta_event = event.get("event", {}).get("contentBlockDelta") if isinstance(event.get("event"), dict) else None
+    if not delta_event:
+        return None, None
+    delta = delta_event.get("delta", {})
+    if set(delta) != {"text"}:
+        return None, None
+    return delta["text"], delta_event.get("contentBlockIndex")
+
+
+def _merged_delta(template: Dict[str, Any], texts: List[str]) -> Dict[str, Any]:
+    delta_event = {**template["event"]["contentBlockDelta"], "delta": {"text": "".join(texts)}}
+    return {**template, "event": {**template["event"], "contentBlockDelta": delta_event}}
+
+
+async def coalesce_text_deltas(
+    events: AsyncIterator[Any],
+    window_ms: float = STREAM_COALESCE_WINDOW_MS,
+    max_bytes: int = STREAM_COALESCE_MAX_BYTES,
+    queue_size: int = STREAM_COALESCE_QUEUE_SIZE
+) -> AsyncIterator[Any]:
+    """把连续的模型文本增量合并为更大的帧
+
+    - 第一个文本增量立即输出，不影响首 token 延迟
+    - 之后的文本增量先缓冲，缓冲时间达到 window_ms 或字节数达到 max_bytes 时合并输出
+    - 遇到其他模型事件（工具调用增量、contentBlockStop 等）先输出缓冲的文本，保持顺序
+    - Agent 的回调类事件（非 {"event": ...}）直接透传
+
+    上游事件在独立的 Task 中读取，因此即使上游暂时没有新事件，缓冲的文本也会按时输出。
+    读取队列有上限：下游消费慢时队列写满，读取 Task 等待，模型流随之暂停，不会把整段响应堆积在内存中。
+
+    Args:
+        events: Agent.stream_async 返回的事件流
+        window_ms: 合并时间窗口（毫秒），<= 0 表示不合并
+        max_bytes: 单帧最大文本字节数，<= 0 表示只按时间合并
+        queue_size: 已读取但未处理的上游事件上限（至少为 1）
+    """
+    if window_ms <= 0:
+        async for event in events:
+            yield event
+        return
+
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, queue_size))
+
+    async def produce():
+        try:
+            async for event in events:
+                await queue.put((event, None))
+        except Exception as e:
+            await queue.put((_END, e))
+        else:
+            await queue.put((_END, None))
+
+    producer = loop.create_task(produce())
+    texts: List[str] = []
+    template: Optional[Dict[str, Any]] = None
+    index: Any = None
+    buffered_bytes = 0
+    deadline: Optional[float] = None
+    first_sent = False
+
+    def flush() -> Dict[str, Any]:
+        nonlocal texts, template, buffered_bytes, deadline
+        frame = _merged_delta(template, texts)
+        texts, template, buffered_bytes, deadline = [], None, 0, None
+        return frame
+
+    try:
+        while True:
+            try:
+                if deadline is None:
+                    event, error = await queue.get()
+                else:
+                    event, error = await asyncio.wait_for(queue.get(), max(0.0, deadline - loop.time()))
+            except asyncio.TimeoutError:
+                yield flush()
+                continue
+
+            if event is _END:
+                if texts:
+                    yield flush()
+                if error is not None:
+                    raise error
+                return
+
+            text, block_index = _text_delta(event)
+            if text is None:
+                if texts and isinstance(event, dict) and "event" in event:
+                    yield flush()
+                yield event
+                continue
+
+            if not first_sent:
+                first_sent = True
+                yield event
+                continue
+
+            if texts and block_index != index:
+                yield flush()
+            if not texts:
+                template, index, deadline = event, block_index, loop.time() + window_ms / 1000
+            texts.append(text)
+            buffered_bytes += len(text.encode("utf-8"))
+            if max_bytes > 0 and buffered_bytes >= max_bytes:
+                yield flush()
+    finally:
+        if not producer.done():
+            producer.cancel()
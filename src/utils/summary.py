@@ -0,0 +1,243 @@
+"""会话滚动摘要
+
+长会话（如多目的地行程）中较早的对话会滑出对话历史窗口。每轮响应完成后，
+超出保留条数的最早对话在后台折叠进该会话的滚动摘要；请求路径只读取最新摘要和
+尚未折叠的对话，从不等待摘要生成。
+"""
+import logging
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.config import (
+    MODEL_ID,
+    REGION,
+    SESSION_SUMMARY_KEEP_TURNS,
+    SESSION_SUMMARY_MAX_SESSIONS,
+    SESSION_SUMMARY_MAX_TOKENS,
+    SESSION_SUMMARY_MODE,
+    SESSION_SUMMARY_WORKERS
+)
+from src.utils.history import estimate_tokens, shrink_text
+from src.utils.prompts import SUMMARY_PROMPT
+
+logger = logging.getLogger(__name__)
+
+_ROLE_LABELS = {"user": "用户", "assistant": "助手"}
+
+# (已有摘要, 待折叠的对话, 摘要最大 token 数) -> 新摘要
+Summarizer = Callable[[str, List[Dict[str, Any]], int], str]
+
+
+def _fit_summary(lines: List[str], max_tokens: int) -> str:
+    """从最早的行开始丢弃，直到摘要不超过 max_tokens"""
+    total = sum(estimate_tokens(line) + 1 for line in lines)
+    start = 0
+    while start < len(lines) - 1 and total > max_tokens:
+        total -= estimate_tokens(lines[start]) + 1
+        start += 1
+    return "\n".join(lines[start:])
+
+
+def extractive_summarize(previous: str, turns: List[Dict[str, Any]], max_tokens: int) -> str:
+    """抽取式摘要：每条对话只保留地址、时间等实体句（见 shrink_text），追加到已有摘要后
+
+    不调用模型，开销在毫秒以内；超出 max_tokens 时丢弃最早的摘要行。
+    """
+    lines = previous.splitlines() if previous else []
+    for turn in turns:
+        content = shrink_text(turn.get('content', '') or '', max(1, max_tokens // 4))
+        if content:
+            lines.append(f"{_ROLE_LABELS.get(turn.get('role'), turn.get('role', 'unknown'))}：{content}")
+    return _fit_summary(lines, max_tokens)
+
+
+class ModelSummarizer:
+    """调用模型生成摘要，失败时退回抽取式摘要"""
+
+    def __init__(self, model=None):
+        """
+        Args:
+            model: strands 模型，默认按 MODEL_ID 新建 BedrockModel（首次使用时）
+        """
+        self._model = model
+        self._lock = threading.Lock()
+
+    def _get_model(self):
+        with self._lock:
+            if self._model is None:
+                from strands.models import BedrockModel
+                self._model = BedrockModel(model_id=MODEL_ID, region_name=REGION)
+            return self._model
+
+    def __call__(self, previous: str, turns: List[Dict[str, Any]], max_tokens: int) -> str:
+        from strands import Agent
+
+        dialogue = "\n".join(
+            f"{_ROLE_LABELS.get(turn.get('role'), turn.get('role', 'unknown'))}：{turn.get('content', '')}" for turn in turns
+        )
+        prompt = f"[已有摘要]:\n{previous or '无'}\n\n[新增对话]:\n{dialogue}\n\n请输出更新后的摘要（不超过 {max_tokens} 个字）。"
+        try:
+            agent = Agent(model=self._get_model(), system_prompt=SUMMARY_PROMPT, tools=[], callback_handler=None)
+            summary = str(agent(prompt)).strip()
+        except Exception as e:
+            logger.warning(f"Model summarization failed, falling back to extractive summary: {e}")
+            return extractive_summarize(previous, turns, max_tokens)
+        return _fit_summary(summary.splitlines(), max_tokens)
+
+
+class SessionSummary:
+    """请求路径读取的摘要快照：摘要文本和尚未折叠进摘要的对话"""
+
+    def __init__(self, text: str, turns: List[Dict[str, Any]], folded_turns: int):
+        self.text = text
+        self.turns = turns
+        self.folded_turns = folded_turns
+
+
+class _SessionState:
+    def __init__(self, turns: List[Dict[str, Any]]):
+        self.summary = ""
+        self.pending: deque = deque(turns)
+        self.folded_turns = 0
+        self.folding = False
+
+
+class SessionSummaryStore:
+    """按 (actor_id, session_id) 维护滚动摘要
+
+    - record(): 每轮响应完成后追加本轮对话；未折叠的对话超过 keep_turns 条时，
+      把最早的对话交给后台线程折叠进摘要（同一会话同一时间只有一个折叠任务）
+    - get(): 只读取当前快照，从不等待折叠
+    折叠完成前，正在折叠的对话仍以原文出现在快照中。会话数量有上限，按 LRU 淘汰。
+    """
+
+    def __init__(
+        self,
+        summarizer: Optional[Summarizer] = None,
+        keep_turns: int = SESSION_SUMMARY_KEEP_TURNS,
+        max_tokens: int = SESSION_SUMMARY_MAX_TOKENS,
+        max_sessions: int = SESSION_SUMMARY_MAX_SESSIONS,
+        workers: int = SESSION_SUMMARY_WORKERS
+    ):
+        """
+        Args:
+            summarizer: 摘要函数 (已有摘要, 待折叠对话, 最大 token 数) -> 新摘要，默认抽取式摘要
+            keep_turns: 保留原文（不折叠）的最近对话条数
+            max_tokens: 摘要的最大 token 数
+            max_sessions: 最多保留的会话数
+            workers: 后台折叠线程数
+        """
+        self.summarizer = summarizer or extractive_summarize
+        self.keep_turns = max(1, keep_turns)
+        self.max_tokens = max(1, max_tokens)
+        self.max_sessions = max(1, max_sessions)
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="session-summary")
+        self._sessions: "OrderedDict[Tuple[str, str], _SessionState]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._in_flight = 0
+        self._stats = {"hits": 0, "misses": 0, "folds": 0, "folded_turns": 0, "failures": 0, "evictions": 0}
+
+    def get(self, key: Tuple[str, str]) -> Optional[SessionSummary]:
+        """读取会话的最新摘要快照（会话未记录过时返回 None）"""
+        with self._lock:
+            state = self._sessions.get(key)
+            if state is None:
+                self._stats["misses"] += 1
+                return None
+            self._sessions.move_to_end(key)
+            self._stats["hits"] += 1
+            return SessionSummary(state.summary, list(state.pending), state.folded_turns)
+
+    def record(self, key: Tuple[str, str], turns: List[Dict[str, Any]], history: Optional[List[Dict[str, Any]]] = None) -> None:
+        """追加一轮对话，必要时在后台折叠
+
+        Args:
+            key: (actor_id, session_id)
+            turns: 本轮的用户输入和助手回答
+            history: 本轮之前的对话历史，会话首次记录时用于填充
+        """
+        with self._lock:
+            state = self._sessions.get(key)
+            if state is None:
+                state = self._sessions[key] = _SessionState(history or [])
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+                    self._stats["evictions"] += 1
+            self._sessions.move_to_end(key)
+            state.pending.extend(turns)
+            self._schedule(key, state)
+
+    def _schedule(self, key: Tuple[str, str], state: _SessionState) -> None:
+        """超出保留条数时提交折叠任务，调用方需持有锁"""
+        overflow = len(state.pending) - self.keep_turns
+        if state.folding or overflow <= 0:
+            return
+        state.folding = True
+        batch = [state.pending[i] for i in range(overflow)]
+        self._in_flight += 1
+        self._executor.submit(self._fold, key, state, state.summary, batch)
+
+    def _fold(self, key: Tuple[str, str], state: _SessionState, previous: str, batch: List[Dict[str, Any]]) -> None:
+        try:
+            summary = self.summarizer(previous, batch, self.max_tokens)
+        except Exception as e:
+            logger.warning(f"Failed to update session summary for {key}: {e}")
+            with self._lock:
+                state.folding = False
+                self._stats["failures"] += 1
+                self._done()
+            return
+
+        with self._lock:
+            # 折叠期间只会在队尾追加，队首仍是本批对话
+            for _ in batch:
+                state.pending.popleft()
+            state.summary = summary
+            state.folded_turns += len(batch)
+            state.folding = False
+            self._stats["folds"] += 1
+            self._stats["folded_turns"] += len(batch)
+            if self._sessions.get(key) is state:
+                self._schedule(key, state)
+            self._done()
+
+    def _done(self) -> None:
+        """一个折叠任务结束，调用方需持有锁"""
+        self._in_flight -= 1
+        if not self._in_flight:
+            self._idle.notify_all()
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """等待所有折叠任务完成（用于测试和基准测试），超时返回 False"""
+        with self._idle:
+            return self._idle.wait_for(lambda: not self._in_flight, timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        """返回摘要计数器快照"""
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot["sessions"] = len(self._sessions)
+            snapshot["in_flight"] = self._in_flight
+        return snapshot
+
+
+def create_summarizer(mode: str = SESSION_SUMMARY_MODE) -> Optional[Summarizer]:
+    """按配置创建摘要函数
+
+    Args:
+        mode: extractive（抽取式，默认）、model（调用模型）或 off（不生成摘要）
+
+    Returns:
+        摘要函数；off 时返回 None
+    """
+    mode = mode.strip().lower()
+    if mode == "off":
+        return None
+    if mode == "model":
+        return ModelSummarizer()
+    if mode != "extractive":
+        logger.warning(f"Unknown session summary mode: {mode}, using extractive")
+    return extractive_summarize
@@ -0,0 +1,49 @@
+"""请求阶段耗时统计"""
+import time
+from contextlib import contextmanager
+from typing import Any, Awaitable, Dict
+
+from src.utils.tracing import start_span
+
+
+class StageTimer:
+    """记录单个请求各阶段的耗时（毫秒）
+
+    同步阶段使用 stage() 上下文管理器，并发执行的异步阶段使用 measure()，
+    时间点（如首个 token）使用 mark() 记录相对请求开始的时间。
+    stage() 和 measure() 同时为该阶段创建名为 stage.<name> 的子 span。
+    """
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.durations: Dict[str, float] = {}
+
+    def _elapsed_ms(self, since: float) -> float:
+        return (time.perf_counter() - since) * 1000
+
+    @contextmanager
+    def stage(self, name: str):
+        """统计一个同步阶段的耗时"""
+        start = time.perf_counter()
+        try:
+            with start_span(f"stage.{name}"):
+                yield
+        finally:
+            self.durations[name] = self._elapsed_ms(start)
+
+    async def measure(self, name: str, awaitable: Awaitable[Any]) -> Any:
+        """等待 awaitable 并统计其耗时"""
+        start = time.perf_counter()
+        try:
+            with start_span(f"stage.{name}"):
+                return await awaitable
+        finally:
+            self.durations[name] = self._elapsed_ms(start)
+
+    def mark(self, name: str) -> None:
+        """记录从请求开始到当前的时间"""
+        self.durations[name] = self._elapsed_ms(self.started_at)
+
+    def summary(self) -> str:
+        """格式化为日志友好的字符串"""
+        return " ".join(f"{name}={duration:.1f}ms" for name, duration in self.durations.items())
@@ -0,0 +1,100 @@
+"""请求链路追踪（OpenTelemetry）"""
+import logging
+import os
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+from opentelemetry import propagate, trace
+from opentelemetry.context import Context
+from opentelemetry.sdk.trace import TracerProvider as SDKTracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+from opentelemetry.trace import Span, Status, StatusCode
+
+from src.config import TRACING_EXPORTER, TRACING_FILE
+
+logger = logging.getLogger(__name__)
+
+tracer = trace.get_tracer("agentcore_baidu_map_agent")
+
+
+def configure_tracing(exporter: str = TRACING_EXPORTER, file_path: str = TRACING_FILE):
+    """按配置启用 span 导出
+
+    Args:
+        exporter: 逗号分隔的导出方式：console（标准输出）、file（JSON Lines 文件）、
+            otlp（本地或远程 collector，地址使用 OTEL_EXPORTER_OTLP_ENDPOINT，
+            需要安装 opentelemetry-exporter-otlp-proto-http）；为空时不导出
+        file_path: file 导出方式的文件路径
+
+    Returns:
+        StrandsTelemetry 实例，未启用导出时返回 None
+    """
+    exporters = [name.strip().lower() for name in exporter.split(",") if name.strip()]
+    if not exporters:
+        return None
+
+    from strands.telemetry import StrandsTelemetry
+
+    # 已有 SDK TracerProvider（如 AgentCore 可观测性自动注入）时在其上追加导出器
+    provider = trace.get_tracer_provider()
+    telemetry = StrandsTelemetry(tracer_provider=provider) if isinstance(provider, SDKTracerProvider) else StrandsTelemetry()
+
+    for name in exporters:
+        if name == "console":
+            telemetry.setup_console_exporter()
+        elif name == "file":
+            out = open(file_path, "a", encoding="utf-8")
+            exporter_instance = ConsoleSpanExporter(out=out, formatter=lambda span: span.to_json(indent=None) + os.linesep)
+            telemetry.tracer_provider.add_span_processor(BatchSpanProcessor(exporter_instance))
+            logger.info(f"Exporting traces to {file_path}")
+        elif name == "otlp":
+            try:
+                telemetry.setup_otlp_exporter()
+            except ImportError:
+                logger.warning("opentelemetry-exporter-otlp-proto-http not installed, OTLP trace export disabled")
+        else:
+            logger.warning(f"Unknown trace exporter: {name}")
+    return telemetry
+
+
+def get_request_headers(context) -> Dict[str, str]:
+    """收集 AgentCore 运行时上下文中的请求头（键统一为小写）"""
+    headers: Dict[str, str] = {}
+    request = getattr(context, "request", None)
+    if request is not None and getattr(request, "headers", None) is not None:
+        headers.update({key.lower(): value for key, value in request.headers.items()})
+    for attribute in ("request_headers", "headers"):
+        values = getattr(context, attribute, None)
+        if isinstance(values, dict):
+            headers.update({key.lower(): value for key, value in values.items()})
+    return headers
+
+
+def extract_trace_context(context) -> Context:
+    """从请求头（traceparent / baggage 等，按全局 propagator 配置）中提取上游链路上下文"""
+    return propagate.extract(get_request_headers(context))
+
+
+def arguments_size(arguments: Any) -> int:
+    """工具参数的大致字节数"""
+    return len(str(arguments).encode("utf-8"))
+
+
+@contextmanager
+def start_span(name: str, parent: Optional[Context] = None, **attributes: Any) -> Iterator[Span]:
+    """创建子 span 并设为当前 span，异常时记录错误状态
+
+    Args:
+        name: span 名称
+        parent: 父链路上下文，默认使用当前 span
+        **attributes: span 属性（值为 None 的属性会被忽略）
+    """
+    attributes = {key: value for key, value in attributes.items() if value is not None}
+    with tracer.start_as_current_span(name, context=parent, attributes=attributes) as span:
+        yield span
+
+
+def mark_error(span: Span, error: BaseException) -> None:
+    """记录被捕获（未向上抛出）的异常"""
+    span.record_exception(error)
+    span.set_status(Status(StatusCode.ERROR, str(error)))
@@ -0,0 +1,101 @@
+"""
+测试 Agent 模板的复用与重建
+使用替身模型，无需访问 Bedrock
+"""
+
+import os
+
+os.environ.setdefault("PREWARM_ON_STARTUP", "false")
+
+from strands import tool
+from strands.models.model import Model
+
+from src.agent import main as agent_main
+from src.agent import template as template_module
+from src.agent.template import AgentTemplate, get_agent_template
+from src.utils.memory import SessionManagerCache
+
+
+class FakeModel(Model):
+    """不发起请求的模型"""
+    def update_config(self, **model_config):
+        pass
+
+    def get_config(self):
+        return {}
+
+    async def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        yield {}
+
+    async def stream(self, messages, tool_specs=None, system_prompt=None, **kwargs):
+        yield {"messageStop": {"stopReason": "end_turn"}}
+
+
+@tool
+def tavily_search(query: str) -> str:
+    """网络搜索"""
+    return query
+
+
+@tool
+def map_weather(location: str) -> str:
+    """查询天气"""
+    return location
+
+
+@tool
+def map_directions(origin: str, destination: str) -> str:
+    """路线规划"""
+    return destination
+
+
+def test_tools_are_sorted_by_name():
+    """工具按名称排序：工具目录顺序变化时工具定义逐字节一致"""
+    model = FakeModel()
+    first = AgentTemplate([tavily_search, map_weather, map_directions], model=model)
+    second = AgentTemplate([map_directions, tavily_search, map_weather], model=model)
+    assert first.tool_names == ["map_directions", "map_weather", "tavily_search"]
+    assert first.serialized_tool_specs == second.serialized_tool_specs
+
+
+def test_template_is_reused_until_tools_change(monkeypatch):
+    """同一组工具对象复用模板；工具变化时重建模板，但复用模型客户端"""
+    models = []
+
+    def create_model():
+        models.append(FakeModel())
+        return models[-1]
+
+    monkeypatch.setattr(template_module, "_template", None)
+    monkeypatch.setattr(template_module, "create_model", create_model)
+
+    tools = [tavily_search, map_weather]
+    template = get_agent_template(tools)
+    assert get_agent_template(list(tools)) is template
+
+    rebuilt = get_agent_template([tavily_search, map_weather, map_directions])
+    assert rebuilt is not template
+    assert rebuilt.model is template.model and len(models) == 1
+    assert rebuilt.tool_names == ["map_directions", "map_weather", "tavily_search"]
+    assert get_agent_template([tavily_search, map_weather, map_directions]) is rebuilt
+
+
+def test_bind_agent_reuses_agent_until_template_changes(monkeypatch):
+    """会话条目的 Agent 在模板不变时复用；模板变化时丢弃旧条目并重建 Agent"""
+    cache = SessionManagerCache("memory-id", "us-west-2", factory=lambda actor_id, session_id: None)
+    monkeypatch.setattr(agent_main, "session_cache", cache)
+    model = FakeModel()
+    template = AgentTemplate([tavily_search, map_weather], model=model)
+
+    entry, agent = agent_main._bind_agent(cache.acquire("car_001", "s1"), template, "car_001", "s1")
+    cache.release(entry)
+    entry, again = agent_main._bind_agent(cache.acquire("car_001", "s1"), template, "car_001", "s1")
+    cache.release(entry)
+    assert again is agent and entry.agent_template is template
+
+    changed = template.with_tools([tavily_search, map_weather, map_directions])
+    entry, rebuilt = agent_main._bind_agent(cache.acquire("car_001", "s1"), changed, "car_001", "s1")
+    cache.release(entry)
+    assert rebuilt is not agent and entry.agent_template is changed
+    assert sorted(rebuilt.tool_names) == ["map_directions", "map_weather", "tavily_search"]
+    assert cache.stats()["hits"] == 2
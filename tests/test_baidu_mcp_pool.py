@@ -0,0 +1,199 @@
+"""
+测试百度地图 MCP 会话池和工具目录缓存
+使用假的 MCPClient，无需访问 mcp.map.baidu.com
+"""
+
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+from strands.types.exceptions import MCPClientInitializationError
+
+from src.tools.baidu_maps import BaiduMCPSessionPool, BaiduToolCatalog, BaiduToolResultCache, PooledMCPTool
+from src.utils.singleflight import SingleFlight
+
+
+class FakeMCPClient:
+    """模拟 MCPClient：start/stop 控制会话存活状态，会话未运行时调用抛出 MCPClientInitializationError"""
+    def __init__(self):
+        self.active = False
+        self.calls = 0
+        self.cancel_signals = []
+
+    def start(self):
+        self.active = True
+        return self
+
+    def stop(self, exc_type, exc_val, exc_tb):
+        self.active = False
+
+    def list_tools_sync(self):
+        if not self.active:
+            raise MCPClientInitializationError("the client session is not running")
+        return []
+
+    async def call_tool_async(self, tool_use_id, name, arguments=None, read_timeout_seconds=None, cancel_signal=None):
+        if not self.active:
+            raise MCPClientInitializationError("the client session is not running")
+        self.calls += 1
+        self.cancel_signals.append(cancel_signal)
+        if cancel_signal is not None and cancel_signal.is_set():
+            return {"toolUseId": tool_use_id, "status": "error", "content": [{"text": "cancelled"}], "cancelled": True}
+        return {"toolUseId": tool_use_id, "status": "success", "content": [{"text": name}]}
+
+
+def test_pool_reuses_sessions_across_calls():
+    """多次调用应复用已建立的会话，不重复建连"""
+    created = []
+
+    def factory():
+        created.append(FakeMCPClient())
+        return created[-1]
+
+    pool = BaiduMCPSessionPool(factory, size=2, health_check_interval=0).start()
+
+    for i in range(6):
+        result = asyncio.run(pool.call_tool_async(str(i), "map_geocode", {"address": "北京"}))
+        assert result["status"] == "success"
+
+    stats = pool.stats()
+    assert len(created) == 2
+    assert stats["connects"] == 2
+    assert stats["reconnects"] == 0
+    assert stats["active"] == 2
+    pool.close()
+
+
+def test_pool_reconnects_dropped_session():
+    """SSE 会话断开后，下一次调用应透明重连"""
+    created = []
+
+    def factory():
+        created.append(FakeMCPClient())
+        return created[-1]
+
+    pool = BaiduMCPSessionPool(factory, size=1, health_check_interval=0).start()
+    created[0].stop(None, None, None)
+
+    result = asyncio.run(pool.call_tool_async("1", "map_directions", {}))
+
+    assert result["status"] == "success"
+    assert pool.stats()["reconnects"] == 1
+    assert created[1].calls == 1
+    pool.close()
+
+
+def test_health_check_replaces_dead_session():
+    """后台探活发现断开的会话时应提前重建"""
+    created = []
+
+    def factory():
+        created.append(FakeMCPClient())
+        return created[-1]
+
+    pool = BaiduMCPSessionPool(factory, size=2, health_check_interval=0).start()
+    created[1].stop(None, None, None)
+    pool.health_check()
+
+    stats = pool.stats()
+    assert stats["health_check_failures"] == 1
+    assert stats["reconnects"] == 1
+    assert stats["active"] == 2
+    pool.close()
+
+
+def test_cancel_signal_is_forwarded_and_not_retried():
+    """Agent 的取消信号传给 MCP 调用；被取消的调用不重试、不标记会话失效"""
+    created = []
+
+    def factory():
+        created.append(FakeMCPClient())
+        return created[-1]
+
+    pool = BaiduMCPSessionPool(factory, size=1, health_check_interval=0).start()
+    schema = {"type": "object"}
+    tool = PooledMCPTool(SimpleNamespace(name="map_geocode", description="", inputSchema=schema), pool,
+                         single_flight=SingleFlight(), result_cache=BaiduToolResultCache(ttls={}))
+    agent = SimpleNamespace(_cancel_signal=threading.Event())
+    agent._cancel_signal.set()
+
+    async def run():
+        tool_use = {"toolUseId": "tooluse_1", "input": {"address": "北京"}}
+        return [event async for event in tool.stream(tool_use, {"agent": agent})][-1].tool_result
+
+    result = asyncio.run(run())
+    assert result["cancelled"] and result["toolUseId"] == "tooluse_1"
+    assert created[0].cancel_signals == [agent._cancel_signal]
+    assert pool.stats()["active"] == 1 and len(created) == 1
+    pool.close()
+
+
+class FakeTool:
+    """模拟 PooledMCPTool，只提供 tool_spec"""
+    def __init__(self, name, description="desc"):
+        self.tool_spec = {"name": name, "description": description, "inputSchema": {"json": {}}}
+
+
+class FakePool:
+    """模拟会话池：返回预设的工具列表，可注入失败"""
+    def __init__(self, tools):
+        self.tools = tools
+        self.fail = False
+        self.list_calls = 0
+
+    def list_tools_sync(self):
+        self.list_calls += 1
+        if self.fail:
+            raise RuntimeError("SSE dropped")
+        return list(self.tools)
+
+
+def _wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_catalog_serves_tools_from_memory():
+    """目录加载后，后续请求不再访问 MCP 服务端"""
+    pool = FakePool([FakeTool("map_geocode"), FakeTool("map_directions")])
+    catalog = BaiduToolCatalog(pool, ttl=60)
+
+    first = catalog.get_tools()
+    for _ in range(5):
+        assert catalog.get_tools() == first
+
+    stats = catalog.stats()
+    assert pool.list_calls == 1
+    assert stats["misses"] == 1
+    assert stats["hits"] == 5
+
+
+def test_catalog_keeps_tool_objects_when_hash_unchanged():
+    """后台刷新得到相同的工具规格时，保留原有工具对象"""
+    pool = FakePool([FakeTool("map_geocode")])
+    catalog = BaiduToolCatalog(pool, ttl=0)
+    original = catalog.get_tools()
+
+    pool.tools = [FakeTool("map_geocode")]
+    catalog.get_tools()
+    _wait_for(lambda: catalog.stats()["refreshes"] == 2)
+
+    assert catalog.get_tools()[0] is original[0]
+    assert catalog.stats()["refresh_changes"] == 0
+
+
+def test_catalog_serves_stale_tools_when_refresh_fails():
+    """刷新失败时继续提供旧目录"""
+    pool = FakePool([FakeTool("map_geocode")])
+    catalog = BaiduToolCatalog(pool, ttl=0)
+    catalog.get_tools()
+
+    pool.fail = True
+    tools = catalog.get_tools()
+    _wait_for(lambda: catalog.stats()["refresh_failures"] == 1)
+
+    assert [tool.tool_spec["name"] for tool in tools] == ["map_geocode"]
+    assert [tool.tool_spec["name"] for tool in catalog.get_tools()] == ["map_geocode"]
+    assert catalog.stats()["stale_hits"] >= 1
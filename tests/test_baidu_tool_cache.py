@@ -0,0 +1,98 @@
+"""
+测试百度地图工具结果缓存
+使用假的会话池，无需访问 mcp.map.baidu.com
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+from strands.types._events import ToolResultEvent, ToolStreamEvent
+
+from src.tools.baidu_maps import BYPASS_TOOL_CACHE, BaiduToolResultCache, PooledMCPTool
+from src.utils.singleflight import SingleFlight
+
+
+class FakePool:
+    """模拟会话池，按工具名记录调用次数"""
+    def __init__(self, status="success"):
+        self.status = status
+        self.calls = {}
+
+    async def call_tool_async(self, tool_use_id, name, arguments=None, read_timeout_seconds=None, cancel_signal=None):
+        self.calls[name] = self.calls.get(name, 0) + 1
+        return {"toolUseId": tool_use_id, "status": self.status, "content": [{"text": f"{name} 第{self.calls[name]}次"}]}
+
+
+def make_tool(name, pool, cache):
+    mcp_tool = SimpleNamespace(name=name, description=name, inputSchema={"type": "object"})
+    return PooledMCPTool(mcp_tool, pool, single_flight=SingleFlight(), result_cache=cache)
+
+
+def call(tool, arguments, tool_use_id="tooluse_1", invocation_state=None):
+    async def run():
+        events = [event async for event in tool.stream({"toolUseId": tool_use_id, "input": arguments}, invocation_state or {})]
+        # 与 MCPAgentTool 一致：只产出一个 ToolResultEvent，不产出会被转发为 ToolStreamEvent 的中间事件
+        assert len(events) == 1 and isinstance(events[0], ToolResultEvent)
+        assert not any(isinstance(event, ToolStreamEvent) for event in events)
+        return events[-1].tool_result
+    return asyncio.run(run())
+
+
+CACHE_TTLS = {"map_geocode": 3600, "map_road_traffic": 0}
+
+
+def test_deterministic_tool_is_cached_by_canonical_arguments():
+    """地理编码结果按规范化参数缓存，命中时带上本次的 toolUseId"""
+    pool = FakePool()
+    cache = BaiduToolResultCache(ttls=CACHE_TTLS)
+    tool = make_tool("map_geocode", pool, cache)
+
+    call(tool, {"address": "北京市海淀区上地十街10号", "city": "北京"}, "tooluse_1")
+    result = call(tool, {"city": "北京", "address": "北京市海淀区上地十街10号"}, "tooluse_2")
+
+    assert pool.calls["map_geocode"] == 1
+    assert result["toolUseId"] == "tooluse_2"
+    assert result["content"][0]["text"] == "map_geocode 第1次"
+    assert cache.stats()["map_geocode"]["hits"] == 1
+
+
+def test_realtime_and_unknown_tools_are_not_cached():
+    """路况（TTL 为 0）和未配置的工具每次都访问上游"""
+    pool = FakePool()
+    cache = BaiduToolResultCache(ttls=CACHE_TTLS, default_ttl=0)
+    traffic = make_tool("map_road_traffic", pool, cache)
+    other = make_tool("map_new_tool", pool, cache)
+
+    for _ in range(2):
+        call(traffic, {"road_name": "北五环", "city": "北京"})
+        call(other, {})
+
+    assert pool.calls == {"map_road_traffic": 2, "map_new_tool": 2}
+    assert cache.stats() == {}
+
+
+def test_bypass_skips_lookup_and_refreshes_cache():
+    """bypass_tool_cache 为 True 时访问上游，并用新结果更新缓存"""
+    pool = FakePool()
+    cache = BaiduToolResultCache(ttls=CACHE_TTLS)
+    tool = make_tool("map_geocode", pool, cache)
+
+    call(tool, {"address": "公司"})
+    bypassed = call(tool, {"address": "公司"}, invocation_state={BYPASS_TOOL_CACHE: True})
+    cached = call(tool, {"address": "公司"})
+
+    assert pool.calls["map_geocode"] == 2
+    assert bypassed["content"][0]["text"] == "map_geocode 第2次"
+    assert cached["content"][0]["text"] == "map_geocode 第2次"
+
+
+def test_failed_results_are_not_cached():
+    """失败的工具结果不缓存"""
+    pool = FakePool(status="error")
+    cache = BaiduToolResultCache(ttls=CACHE_TTLS)
+    tool = make_tool("map_geocode", pool, cache)
+
+    call(tool, {"address": "公司"})
+    call(tool, {"address": "公司"})
+
+    assert pool.calls["map_geocode"] == 2
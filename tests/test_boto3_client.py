@@ -0,0 +1,49 @@
+"""
+测试 boto3 客户端的无交互并发回放
+使用假的 bedrock-agentcore 客户端，无需访问 AgentCore Runtime
+"""
+
+import io
+import json
+
+from clients.boto3_client import all_scenarios, run_headless
+
+
+class FakeStreamingBody:
+    """模拟流式响应体（按行拼接成 SSE 字节流）"""
+    def __init__(self, lines):
+        self._raw_stream = io.BytesIO(b"".join(line + b"\n" for line in lines))
+
+
+class FakeAgentCoreClient:
+    """模拟 invoke_agent_runtime：普通问题返回 3 个文本块，包含"股价"的问题返回错误事件"""
+    def __init__(self):
+        self.session_ids = set()
+
+    def invoke_agent_runtime(self, agentRuntimeArn, runtimeSessionId, payload, qualifier):
+        self.session_ids.add(runtimeSessionId)
+        if "股价" in json.loads(payload)["prompt"]:
+            lines = [b'data: {"error": "Agent execution failed"}', b""]
+        else:
+            delta = json.dumps({"event": {"contentBlockDelta": {"delta": {"text": "好的"}}}}).encode()
+            lines = [b'data: {"event": {"messageStart": {"role": "assistant"}}}', b""] + [b"data: " + delta, b""] * 3
+        return {"contentType": "text/event-stream", "response": FakeStreamingBody(lines)}
+
+
+def test_headless_run_writes_one_jsonl_line_per_turn(tmp_path):
+    """每个会话独立 session ID，逐轮记录耗时、文本块数和错误"""
+    client = FakeAgentCoreClient()
+    output = tmp_path / "results.jsonl"
+
+    results = run_headless("arn:test", ["基础场景", "🚗停车场景"], sessions=4, concurrency=2, output=str(output), client=client)
+
+    expected_turns = 2 * len(all_scenarios["基础场景"]) + 2 * len(all_scenarios["🚗停车场景"])
+    lines = [json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()]
+    assert len(results) == len(lines) == expected_turns
+    assert len(client.session_ids) == 4
+
+    errors = [line for line in lines if line["error"]]
+    assert len(errors) == 2 and all("股价" in line["question"] for line in errors)
+    ok = [line for line in lines if not line["error"]]
+    assert all(line["chunks"] == 3 and line["chars"] == 6 for line in ok)
+    assert all(line["ttfb_ms"] <= line["first_token_ms"] <= line["total_ms"] for line in ok)
@@ -0,0 +1,85 @@
+"""
+测试按 token 预算压缩对话历史
+"""
+
+from src.utils.history import HistoryCompactor, estimate_tokens, shrink_text
+from src.utils.memory import build_context_aware_prompt
+
+ANSWER = (
+    "好的，我来帮您查询。从海淀区上地十街10号到北京首都国际机场，推荐走北五环转机场高速，"
+    "全程约35公里，预计用时45分钟。当前北五环西段有轻微拥堵，建议提前出发。"
+    "希望对您有帮助，如果还有其他问题请随时告诉我。"
+)
+
+
+def _history(rounds):
+    history = []
+    for i in range(rounds):
+        history.append({"role": "user", "content": f"第{i + 1}次提问：明天上午9点从上地十街10号去机场怎么走？"})
+        history.append({"role": "assistant", "content": ANSWER})
+    return history
+
+
+def test_estimate_tokens():
+    """中文按字计数，英文约 4 个字符一个 token"""
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("北京天气") == 4
+    assert estimate_tokens("weather in Beijing") == 5
+
+
+def test_shrink_keeps_entities_and_drops_pleasantries():
+    """保留地址、时间、距离句，丢弃寒暄"""
+    shrunk = shrink_text(ANSWER, 60)
+    assert "上地十街10号" in shrunk and "45分钟" in shrunk
+    assert "好的" not in shrunk and "希望对您有帮助" not in shrunk
+    assert estimate_tokens(shrunk) <= 60
+    # 第一个实体句都放不下时截断
+    assert estimate_tokens(shrink_text(ANSWER, 20)) <= 20
+
+
+def test_compact_fits_budget_and_keeps_recent_turns_verbatim():
+    """最近的对话保留原文，较早的对话被压缩或丢弃，总量不超过预算"""
+    history = _history(6)
+    compactor = HistoryCompactor(budget_tokens=300, keep_recent_turns=2, older_turn_max_tokens=60)
+
+    result = compactor.compact(history)
+
+    assert result.tokens_after <= 300 < result.tokens_before
+    assert result.turns[-2:] == [(turn["role"], turn["content"]) for turn in history[-2:]]
+    assert result.shrunk > 0 and result.dropped > 0
+    assert all("希望对您有帮助" not in content for _, content in result.turns[:-2])
+    stats = compactor.stats()
+    assert stats["requests"] == 1 and stats["tokens_saved"] == result.tokens_saved > 0
+
+
+def test_short_history_is_unchanged():
+    """预算内的历史原样保留"""
+    history = _history(1)
+    result = HistoryCompactor(budget_tokens=1000).compact(history)
+    assert result.tokens_saved == 0
+    assert [content for _, content in result.turns] == [turn["content"] for turn in history]
+
+
+def test_build_context_aware_prompt_format():
+    """提示词格式保持不变：[对话历史] + 编号对话 + [当前问题]"""
+    prompt = build_context_aware_prompt("那附近有停车场吗", _history(1), HistoryCompactor(budget_tokens=1000))
+    assert prompt.startswith("\n\n[对话历史]:\n1. user: 第1次提问")
+    assert "2. assistant: 好的，我来帮您查询。" in prompt
+    assert prompt.endswith("\n[当前问题]:\n那附近有停车场吗")
+    assert build_context_aware_prompt("你好", []) == "你好"
+
+
+def test_pleasantry_turn_does_not_drop_earlier_turns():
+    """只有寒暄的较早对话被单独丢弃，更早的有内容的对话仍然保留"""
+    thanks = "好的，谢谢！希望对您有帮助，如果还有其他问题请随时告诉我。祝您一路顺风，路上注意安全！"
+    history = [
+        {"role": "user", "content": "我家在北京市海淀区中关村大街27号，公司在朝阳区人寿保险大厦"},
+        {"role": "assistant", "content": thanks},
+        {"role": "user", "content": "那附近有停车场吗？"},
+        {"role": "assistant", "content": "人寿保险大厦地下有停车场。"},
+    ]
+    result = HistoryCompactor(budget_tokens=600, keep_recent_turns=2, older_turn_max_tokens=20).compact(history)
+
+    assert [content for _, content in result.turns][0].startswith("我家在北京市海淀区中关村大街27号")
+    assert all(content != thanks for _, content in result.turns)
+    assert result.dropped == 1 and len(result.turns) == 3
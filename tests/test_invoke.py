@@ -0,0 +1,117 @@
+"""
+测试请求入口的并发准备阶段
+使用替身模型和假的会话管理器，无需访问 AgentCore Memory 和 Bedrock
+"""
+
+import asyncio
+import os
+
+os.environ.setdefault("PREWARM_ON_STARTUP", "false")
+
+import pytest
+from strands import tool
+from strands.models.model import Model
+
+from src.agent import main as agent_main
+from src.agent.template import AgentTemplate
+from src.utils.memory import RecentTurnsBuffer, SessionManagerCache
+
+
+class AnswerModel(Model):
+    """直接回答的替身模型"""
+    def update_config(self, **model_config):
+        pass
+
+    def get_config(self):
+        return {}
+
+    async def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        yield {}
+
+    async def stream(self, messages, tool_specs=None, system_prompt=None, **kwargs):
+        yield {"messageStart": {"role": "assistant"}}
+        yield {"contentBlockStart": {"start": {}}}
+        yield {"contentBlockDelta": {"delta": {"text": "好的"}}}
+        yield {"contentBlockStop": {}}
+        yield {"messageStop": {"stopReason": "end_turn"}}
+
+
+@tool
+def tavily_search(query: str) -> str:
+    """网络搜索"""
+    return query
+
+
+class Context:
+    session_id = "s1"
+    headers = {"X-Amzn-Bedrock-AgentCore-Runtime-Custom-Actor-Id": "car_001"}
+
+
+@pytest.fixture
+def invoke_env(monkeypatch):
+    """替换 main 的会话缓存、历史读取、工具加载和模板，返回记录各阶段的状态"""
+    state = {"history_started": None, "tools_started": None, "fail": None, "timings": None}
+    cache = SessionManagerCache("memory-id", "us-west-2", factory=lambda actor_id, session_id: None)
+    template = AgentTemplate([tavily_search], model=AnswerModel())
+
+    async def get_conversation_context(session_manager, **kwargs):
+        # 两个阶段互相等待对方开始：顺序执行时会超时
+        state["history_started"].set()
+        await asyncio.wait_for(state["tools_started"].wait(), 1)
+        if state["fail"] == "history":
+            raise RuntimeError("history unavailable")
+        return []
+
+    async def load_tools_async():
+        state["tools_started"].set()
+        await asyncio.wait_for(state["history_started"].wait(), 1)
+        if state["fail"] == "tools":
+            raise RuntimeError("catalog unavailable")
+        return [tavily_search]
+
+    def record_stage_timings(durations, outcome):
+        state["timings"] = (dict(durations), outcome)
+
+    monkeypatch.setattr(agent_main, "MEMORY_ID", "memory-id")
+    monkeypatch.setattr(agent_main, "PREFETCH_ENABLED", False)
+    monkeypatch.setattr(agent_main, "session_cache", cache)
+    monkeypatch.setattr(agent_main, "session_summaries", None)
+    monkeypatch.setattr(agent_main, "turn_buffer", RecentTurnsBuffer())
+    monkeypatch.setattr(agent_main, "get_conversation_context", get_conversation_context)
+    monkeypatch.setattr(agent_main, "_load_tools_async", load_tools_async)
+    monkeypatch.setattr(agent_main, "get_agent_template", lambda tools: template)
+    monkeypatch.setattr(agent_main, "record_stage_timings", record_stage_timings)
+    state["cache"] = cache
+    return state
+
+
+def _run(state, prompt="今天北京天气怎么样？"):
+    async def run():
+        state["history_started"], state["tools_started"] = asyncio.Event(), asyncio.Event()
+        return [event async for event in agent_main.invoke({"prompt": prompt}, Context())]
+    return asyncio.run(run())
+
+
+def test_session_and_tools_are_prepared_concurrently(invoke_env):
+    """会话管理器 + 对话历史 与 工具加载 并发进行，各阶段耗时都被记录"""
+    events = _run(invoke_env)
+
+    assert not any("error" in event for event in events)
+    durations, outcome = invoke_env["timings"]
+    assert outcome == "success"
+    assert {"session_manager", "history", "tools", "setup", "first_token", "total"} <= set(durations)
+    assert durations["setup"] >= max(durations["tools"], durations["session_manager"] + durations["history"]) - 1
+    assert invoke_env["cache"].stats()["size"] == 1
+
+
+@pytest.mark.parametrize("stage", ["tools", "history"])
+def test_failed_stage_releases_session_entry(invoke_env, stage):
+    """任一准备阶段失败时返回错误，已取出的会话条目被归还（下一次请求不会因条目仍在使用而绕过缓存）"""
+    invoke_env["fail"] = stage
+    events = _run(invoke_env)
+
+    assert events[-1]["error"].startswith("Agent execution failed")
+    assert invoke_env["timings"][1] == "error"
+    cache = invoke_env["cache"]
+    entry = cache.acquire("car_001", "s1")
+    assert entry.cached and cache.stats()["busy_bypasses"] == 0
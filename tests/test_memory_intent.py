@@ -0,0 +1,61 @@
+"""
+测试长期记忆检索意图路由
+"""
+
+from bedrock_agentcore.memory.integrations.strands.config import RetrievalConfig
+
+from benchmarks.memory_intent_labels import LABELS
+from src.utils.intent import FACTS, LOCATIONS, PREFERENCES, MemoryIntentClassifier
+from src.utils.memory import select_namespaces
+
+ACTOR = "car_001"
+RETRIEVAL_CONFIG = {
+    f"/users/{ACTOR}/facts": RetrievalConfig(top_k=5, relevance_score=0.5),
+    f"/users/{ACTOR}/preferences": RetrievalConfig(top_k=3, relevance_score=0.5),
+    f"/users/{ACTOR}/locations": RetrievalConfig(top_k=5, relevance_score=0.5),
+    f"/summaries/{ACTOR}/session_a": RetrievalConfig(top_k=2, relevance_score=0.5),
+}
+
+
+def test_realtime_query_needs_no_memory():
+    """实时信息查询不检索任何命名空间"""
+    intent = MemoryIntentClassifier().classify("查询amazon最新的股价是多少")
+    assert intent.namespaces == []
+
+
+def test_saved_places_only_need_locations():
+    """只提到保存的地点时只检索 locations，且检索完整 top_k"""
+    intent = MemoryIntentClassifier().classify("从我的住址导航到我的办公室")
+    assert intent.top_k == {LOCATIONS: 5}
+
+
+def test_unseen_prompts():
+    """标注集之外的问题"""
+    classifier = MemoryIntentClassifier()
+    assert set(classifier.classify("下班回家路上推荐一家好吃的火锅").namespaces) == {PREFERENCES, LOCATIONS}
+    assert set(classifier.classify("我的车尾号是3，明天限行吗").namespaces) == {FACTS}
+    assert classifier.classify("明天北京的天气怎么样").namespaces == []
+
+
+def test_label_set_accuracy():
+    """标注集上命名空间集合完全一致的比例不低于 90%"""
+    classifier = MemoryIntentClassifier()
+    exact = sum(1 for prompt, label in LABELS.items() if set(classifier.classify(prompt).namespaces) == label)
+    assert exact / len(LABELS) >= 0.9
+
+
+def test_select_namespaces_filters_retrieval_config():
+    """按意图过滤检索配置；分类器不认识的命名空间始终检索；统计少检索的记录数"""
+    classifier = MemoryIntentClassifier()
+
+    selected = select_namespaces(RETRIEVAL_CONFIG, "从我的住址导航到我的办公室", classifier)
+    assert list(selected) == [f"/users/{ACTOR}/locations", f"/summaries/{ACTOR}/session_a"]
+    assert selected[f"/users/{ACTOR}/locations"].top_k == 5
+
+    selected = select_namespaces(RETRIEVAL_CONFIG, "查询amazon最新的股价是多少", classifier)
+    assert list(selected) == [f"/summaries/{ACTOR}/session_a"]
+
+    stats = classifier.stats()
+    assert stats["prompts"] == 2
+    assert stats["namespaces_skipped"] == 5
+    assert stats["records_skipped"] == 13 + 8
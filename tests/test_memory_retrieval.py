@@ -0,0 +1,191 @@
+"""
+测试长期记忆并发检索和按用户的检索缓存
+使用假的 MemoryClient，无需访问 AgentCore Memory
+"""
+
+import threading
+import time
+from types import SimpleNamespace
+
+from bedrock_agentcore.memory.integrations.strands.config import RetrievalConfig
+
+from src.utils import memory
+from src.utils.memory import CachedMemorySessionManager, MemoryRetrievalCache, build_context_aware_prompt, retrieve_long_term_memories
+from src.utils.metrics import MEMORY_RETRIEVAL_DURATION
+
+ACTOR = "car_001"
+RETRIEVAL_CONFIG = {
+    f"/users/{ACTOR}/facts": RetrievalConfig(top_k=5, relevance_score=0.5),
+    f"/users/{ACTOR}/preferences": RetrievalConfig(top_k=3, relevance_score=0.5),
+    f"/users/{ACTOR}/locations": RetrievalConfig(top_k=5, relevance_score=0.5),
+}
+
+
+class FakeMemoryClient:
+    """模拟 MemoryClient.retrieve_memories：每次检索耗时 delay 秒"""
+    def __init__(self, delay=0.1, fail_namespace=None):
+        self.delay = delay
+        self.fail_namespace = fail_namespace
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def retrieve_memories(self, memory_id, namespace_path, query, top_k):
+        with self._lock:
+            self.calls.append(namespace_path)
+        time.sleep(self.delay)
+        if namespace_path == self.fail_namespace:
+            raise RuntimeError("throttled")
+        name = namespace_path.rsplit("/", 1)[-1]
+        return [
+            {"content": {"text": f"{name}: 家在海淀区上地十街10号"}, "score": 0.9},
+            {"content": {"text": f"{name}: 不相关"}, "score": 0.1},
+        ]
+
+
+def _retrieve(client, cache, query="导航回家"):
+    return retrieve_long_term_memories(client, "memory-1", ACTOR, RETRIEVAL_CONFIG, query, cache=cache)
+
+
+def test_namespaces_are_retrieved_concurrently():
+    """三个命名空间并发检索，低于相关度阈值的记录被过滤"""
+    client = FakeMemoryClient(delay=0.3)
+
+    start = time.perf_counter()
+    items = _retrieve(client, None)
+
+    # 串行需要 0.9 秒
+    assert time.perf_counter() - start < 0.6
+    assert items == [f"{name}: 家在海淀区上地十街10号" for name in ("facts", "preferences", "locations")]
+    assert len(client.calls) == 3
+
+
+def test_cached_results_skip_remote_retrieval():
+    """相同用户、相同查询（归一化后）命中缓存，并按命名空间记录耗时"""
+    client = FakeMemoryClient(delay=0)
+    cache = MemoryRetrievalCache(ttl=60, max_bytes=1024 * 1024, extraction_delay=60)
+
+    first = _retrieve(client, cache)
+    second = _retrieve(client, cache, query="  导航回家 ")
+
+    assert second == first
+    assert len(client.calls) == 3
+    assert cache.stats()["hits"] == 3
+    outcomes = {(series["labels"]["namespace"], series["labels"]["outcome"]) for series in MEMORY_RETRIEVAL_DURATION.snapshot()}
+    assert {("facts", "hit"), ("preferences", "miss"), ("locations", "hit")} <= outcomes
+
+
+def test_writes_invalidate_actor_cache_after_extraction_delay():
+    """写入新事件后，旧结果在抽取延迟后失效；立即失效时下一次检索直接访问 Memory"""
+    client = FakeMemoryClient(delay=0)
+    cache = MemoryRetrievalCache(ttl=60, max_bytes=1024 * 1024, extraction_delay=0.5)
+    _retrieve(client, cache)
+
+    cache.invalidate(ACTOR)
+    _retrieve(client, cache)
+    assert len(client.calls) == 3
+
+    time.sleep(0.6)
+    _retrieve(client, cache)
+    assert len(client.calls) == 6
+    assert cache.stats()["invalidations"] == 3
+
+    cache.invalidate(ACTOR, delay=0)
+    _retrieve(client, cache)
+    assert len(client.calls) == 9
+
+    # 其他用户的缓存不受影响
+    cache.invalidate("car_002", delay=0)
+    _retrieve(client, cache)
+    assert len(client.calls) == 9
+
+
+def test_fetch_during_extraction_delay_expires_when_write_becomes_visible():
+    """写入后、抽取完成前取得的结果可能缺少新记录，在写入生效（抽取延迟结束）后失效"""
+    client = FakeMemoryClient(delay=0)
+    cache = MemoryRetrievalCache(ttl=60, max_bytes=1024 * 1024, extraction_delay=0.5)
+
+    cache.invalidate(ACTOR)
+    time.sleep(0.1)
+    _retrieve(client, cache)
+    _retrieve(client, cache)
+    assert len(client.calls) == 3
+
+    time.sleep(0.5)
+    _retrieve(client, cache)
+    assert len(client.calls) == 6
+
+
+def test_failed_namespace_does_not_block_others():
+    """单个命名空间失败时仍返回其他命名空间的结果，且失败结果不缓存"""
+    client = FakeMemoryClient(delay=0, fail_namespace=f"/users/{ACTOR}/preferences")
+    cache = MemoryRetrievalCache(ttl=60, max_bytes=1024 * 1024, extraction_delay=60)
+
+    items = _retrieve(client, cache)
+    assert [item.split(":")[0] for item in items] == ["facts", "locations"]
+
+    _retrieve(client, cache)
+    assert client.calls.count(f"/users/{ACTOR}/preferences") == 2
+
+
+def _session_manager(client, cache):
+    """不连接 AgentCore Memory 的 CachedMemorySessionManager（只设置检索用到的属性）"""
+    session_manager = CachedMemorySessionManager.__new__(CachedMemorySessionManager)
+    session_manager.config = SimpleNamespace(
+        actor_id=ACTOR, session_id="session_a", memory_id="memory-1", context_tag="user_context",
+        retrieval_config={namespace.replace(ACTOR, "{actorId}"): config for namespace, config in RETRIEVAL_CONFIG.items()}
+    )
+    session_manager.memory_client = client
+    session_manager.retrieval_cache = cache
+    return session_manager
+
+
+def _message_added(prompt):
+    return SimpleNamespace(agent=SimpleNamespace(messages=[{"role": "user", "content": [{"text": prompt}]}]))
+
+
+def test_customer_context_is_keyed_on_current_question():
+    """检索只使用当前问题：对话历史不同的多轮请求命中同一缓存"""
+    client = FakeMemoryClient(delay=0)
+    session_manager = _session_manager(client, MemoryRetrievalCache(ttl=60, max_bytes=1024 * 1024, extraction_delay=60))
+    history = [{"role": "user", "content": "去首都机场"}, {"role": "assistant", "content": "已规划路线"}]
+
+    for turns in (history[:0], history, history + history):
+        event = _message_added(build_context_aware_prompt("导航回家", turns))
+        session_manager.retrieve_customer_context(event)
+        assert event.agent.messages[-1]["content"][0]["text"].startswith("<user_context>")
+
+    assert len(client.calls) == len(set(client.calls))
+    assert session_manager.retrieval_cache.stats()["hits"] == 2 * len(client.calls)
+
+
+def test_customer_context_failure_does_not_fail_the_turn(monkeypatch):
+    """检索或地点学习出错时记录日志并继续，不影响本轮对话"""
+    client = FakeMemoryClient(delay=0)
+    session_manager = _session_manager(client, None)
+
+    def learn(actor_id, text):
+        raise ValueError("bad record")
+
+    monkeypatch.setattr(memory, "get_known_places", lambda: SimpleNamespace(learn=learn))
+    event = _message_added("导航回家")
+    session_manager.retrieve_customer_context(event)
+    assert event.agent.messages[-1]["content"][0]["text"].startswith("<user_context>")
+
+    monkeypatch.setattr(memory, "retrieve_long_term_memories", lambda *args, **kwargs: 1 / 0)
+    event = _message_added("导航回家")
+    session_manager.retrieve_customer_context(event)
+    assert event.agent.messages[-1]["content"] == [{"text": "导航回家"}]
+
+
+def test_intent_is_classified_on_current_question(monkeypatch):
+    """意图只按当前问题判断：上一轮的导航对话不会让股价查询去检索记忆"""
+    monkeypatch.setattr(memory, "MEMORY_INTENT_ROUTING", True)
+    client = FakeMemoryClient(delay=0)
+    session_manager = _session_manager(client, None)
+    history = [{"role": "user", "content": "从我家导航到公司"}, {"role": "assistant", "content": "已为您规划回家的路线"}]
+
+    event = _message_added(build_context_aware_prompt("查询amazon最新的股价", history))
+    session_manager.retrieve_customer_context(event)
+
+    assert client.calls == []
+    assert not event.agent.messages[-1]["content"][0]["text"].startswith("<user_context>")
@@ -0,0 +1,80 @@
+"""
+测试耗时直方图和指标导出
+"""
+
+from types import SimpleNamespace
+
+from src.utils.metrics import Histogram, MetricsRegistry, TOOL_DURATION, ToolMetricsHook
+
+
+def test_histogram_buckets_and_quantiles():
+    """观测值落入正确的桶，分位数按桶插值估算"""
+    histogram = Histogram("stage_seconds", "test", ("stage",), buckets=(10, 100, 1000))
+    for value in (5, 10, 50, 50, 500):
+        histogram.observe(value, stage="history")
+    histogram.observe(5000, stage="history")
+
+    snapshot = histogram.snapshot()[0]
+    assert snapshot["labels"] == {"stage": "history"}
+    assert snapshot["count"] == 6
+    assert snapshot["sum_ms"] == 5615
+    assert 10 <= snapshot["p50_ms"] <= 100
+    assert snapshot["p99_ms"] == 1000
+
+
+def test_prometheus_rendering():
+    """Prometheus 输出为累积桶（秒），包含 +Inf、_sum、_count 和组件计数器"""
+    registry = MetricsRegistry()
+    histogram = registry.histogram("agentcore_stage_duration_seconds", "test", ("stage", "outcome"), buckets=(10, 100))
+    histogram.observe(5, stage="total", outcome="success")
+    histogram.observe(50, stage="total", outcome="success")
+    histogram.observe(500, stage="total", outcome="success")
+    registry.register_stats("session_cache", lambda: {"hits": 3, "hit_ratio": 0.75, "enabled": True})
+    registry.register_stats("baidu_tool_cache", lambda: {"map_geocode": {"hits": 2, "ttl": 3600.0}})
+
+    lines = registry.render_prometheus().splitlines()
+
+    assert 'agentcore_stage_duration_seconds_bucket{stage="total",outcome="success",le="0.01"} 1' in lines
+    assert 'agentcore_stage_duration_seconds_bucket{stage="total",outcome="success",le="0.1"} 2' in lines
+    assert 'agentcore_stage_duration_seconds_bucket{stage="total",outcome="success",le="+Inf"} 3' in lines
+    assert 'agentcore_stage_duration_seconds_sum{stage="total",outcome="success"} 0.555000' in lines
+    assert 'agentcore_stage_duration_seconds_count{stage="total",outcome="success"} 3' in lines
+    assert "agentcore_session_cache_hits 3" in lines
+    assert "agentcore_session_cache_hit_ratio 0.75" in lines
+    assert not any("enabled" in line for line in lines)
+    assert 'agentcore_baidu_tool_cache_hits{key="map_geocode"} 2' in lines
+
+
+def test_failing_collector_does_not_break_export():
+    """组件 stats() 抛出异常时，其余指标照常导出"""
+    registry = MetricsRegistry()
+
+    def broken():
+        raise RuntimeError("pool closed")
+
+    registry.register_stats("baidu_mcp_pool", broken)
+    registry.register_stats("session_cache", lambda: {"size": 1})
+
+    assert registry.snapshot()["stats"]["baidu_mcp_pool"] == {"error": "pool closed"}
+    assert "agentcore_session_cache_size 1" in registry.render_prometheus()
+
+
+def test_tool_hook_records_duration_by_tool_and_outcome():
+    """工具调用结束后按工具名和结果记录耗时"""
+    hook = ToolMetricsHook()
+
+    def event(name, status=None, exception=None):
+        result = {"status": status} if status else None
+        return SimpleNamespace(tool_use={"name": name}, result=result, exception=exception, duration=0.12)
+
+    hook._after_tool_call(event("test_metrics_geocode", "success"))
+    hook._after_tool_call(event("test_metrics_geocode", "error"))
+    hook._after_tool_call(event("test_metrics_geocode", exception=RuntimeError("boom")))
+
+    series = {
+        entry["labels"]["outcome"]: entry
+        for entry in TOOL_DURATION.snapshot()
+        if entry["labels"]["tool"] == "test_metrics_geocode"
+    }
+    assert set(series) == {"success", "error", "exception"}
+    assert series["success"]["sum_ms"] == 120
@@ -0,0 +1,141 @@
+"""
+测试附近 POI 空间索引
+使用假的会话池，无需访问 mcp.map.baidu.com
+"""
+
+import asyncio
+import json
+import random
+import time
+from types import SimpleNamespace
+
+from src.tools.baidu_maps import BaiduPOIIndex, BaiduToolResultCache, PooledMCPTool
+from src.utils.singleflight import SingleFlight
+from src.utils.spatial_index import SpatialIndex, distance_m
+
+# 北京海淀区上地附近
+CENTER = (40.0489, 116.3055)
+
+
+def test_radius_query_matches_brute_force():
+    """半径查询结果与逐点计算一致，并按距离排序"""
+    rng = random.Random(7)
+    index = SpatialIndex(max_points=10000, max_age=60, cell_degrees=0.01)
+    points = {}
+    for i in range(2000):
+        lat = CENTER[0] + rng.uniform(-0.1, 0.1)
+        lng = CENTER[1] + rng.uniform(-0.1, 0.1)
+        points[str(i)] = (lat, lng)
+        index.upsert(str(i), lat, lng, "加油站" if i % 2 else "停车场")
+
+    matches = index.query(*CENTER, 3000, category="加油站")
+    expected = {
+        uid for uid, (lat, lng) in points.items()
+        if int(uid) % 2 and distance_m(CENTER[0], CENTER[1], lat, lng) <= 3000
+    }
+
+    assert {point.uid for _, point in matches} == expected
+    assert [distance for distance, _ in matches] == sorted(distance for distance, _ in matches)
+
+
+def test_bounded_size_and_age_eviction():
+    """超过点数上限淘汰最久未更新的点，过期的点不再返回"""
+    index = SpatialIndex(max_points=3, max_age=0.05)
+    for uid in ("a", "b", "c"):
+        index.upsert(uid, *CENTER)
+    index.upsert("a", *CENTER)
+    index.upsert("d", *CENTER)
+
+    assert {point.uid for _, point in index.query(*CENTER, 100)} == {"a", "c", "d"}
+    assert index.stats()["evictions"] == 1
+
+    time.sleep(0.06)
+    assert index.query(*CENTER, 100) == []
+    assert len(index) == 0
+
+
+def test_coverage_requires_containment_and_freshness():
+    """查询圆必须完全落在新鲜的已检索区域内"""
+    index = SpatialIndex(max_points=100, max_age=0.05)
+    index.mark_covered("加油站|", *CENTER, 3000)
+
+    assert index.is_covered("加油站|", *CENTER, 1000)
+    assert not index.is_covered("加油站|", *CENTER, 5000)
+    assert not index.is_covered("停车场|", *CENTER, 1000)
+    time.sleep(0.06)
+    assert not index.is_covered("加油站|", *CENTER, 1000)
+
+
+NEAR = {"uid": "near", "name": "中国石化上地加油站", "location": {"lat": 40.0500, "lng": 116.3060}}
+FAR = {"uid": "far", "name": "中国石油西二旗加油站", "location": {"lat": 40.0600, "lng": 116.3200}}
+
+
+class FakePool:
+    """模拟周边检索，依次返回 bodies 中百度地图格式的响应体（最后一个重复使用）"""
+    def __init__(self, *bodies):
+        self.bodies = list(bodies) or [{"status": 0, "message": "ok", "total": 2, "results": [NEAR, FAR]}]
+        self.calls = 0
+
+    async def call_tool_async(self, tool_use_id, name, arguments=None, read_timeout_seconds=None, cancel_signal=None):
+        body = self.bodies[min(self.calls, len(self.bodies) - 1)]
+        self.calls += 1
+        return {"toolUseId": tool_use_id, "status": "success", "content": [{"text": json.dumps(body, ensure_ascii=False)}]}
+
+
+def make_search(pool):
+    """周边检索工具（不缓存工具结果，只使用 POI 索引）"""
+    mcp_tool = SimpleNamespace(name="map_search_places", description="周边检索", inputSchema={"type": "object"})
+    tool = PooledMCPTool(
+        mcp_tool, pool,
+        single_flight=SingleFlight(),
+        result_cache=BaiduToolResultCache(ttls={}),
+        poi_index=BaiduPOIIndex(SpatialIndex(max_points=100, max_age=60))
+    )
+
+    def search(radius, location="40.0489,116.3055", **arguments):
+        async def run():
+            tool_use = {"toolUseId": "tooluse_1", "input": {"query": "加油站", "location": location, "radius": radius, **arguments}}
+            return [event async for event in tool.stream(tool_use, {})][-1].tool_result
+        return json.loads(asyncio.run(run())["content"][0]["text"])
+
+    return tool, search
+
+
+def test_nearby_search_is_answered_from_index():
+    """已检索过的区域内的同类检索由索引回答，超出区域时访问上游"""
+    pool = FakePool()
+    tool, search = make_search(pool)
+
+    search(3000)
+    nearby = search(1000)
+    search(5000)
+
+    assert [poi["uid"] for poi in nearby["results"]] == ["near"]
+    assert pool.calls == 2
+    assert tool.poi_index.stats()["hits"] == 1
+
+
+def test_error_body_does_not_mark_area_covered():
+    """百度地图返回错误（如配额超限）时不记录已检索区域，之后的检索仍访问上游"""
+    pool = FakePool({"status": 302, "message": "天配额超限"}, {"status": 0, "message": "ok", "total": 1, "results": [NEAR]})
+    tool, search = make_search(pool)
+
+    assert search(3000)["status"] == 302
+    assert [poi["uid"] for poi in search(1000)["results"]] == ["near"]
+    assert pool.calls == 2 and tool.poi_index.stats()["hits"] == 0
+
+
+def test_partial_page_and_next_page_bypass_index():
+    """只返回了部分结果（total 大于本页条数）时不记录已检索区域；翻页请求不由索引回答"""
+    pool = FakePool({"status": 0, "message": "ok", "total": 40, "results": [FAR]})
+    tool, search = make_search(pool)
+
+    search(5000)
+    search(1000)
+    assert pool.calls == 2
+
+    pool.bodies = [{"status": 0, "message": "ok", "total": 2, "results": [NEAR, FAR]}]
+    search(5000, location="40.0500,116.3060")
+    assert search(1000, location="40.0500,116.3060")["total"] == 1
+    search(1000, location="40.0500,116.3060", page_num=1)
+    assert pool.calls == 4 and tool.poi_index.stats()["hits"] == 1
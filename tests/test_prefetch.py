@@ -0,0 +1,115 @@
+"""
+测试已知地点提取和百度地图工具的推测性预取
+使用假的会话池，无需访问 mcp.map.baidu.com
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+from src.tools.baidu_maps import SPECULATIVE_PREFETCH, BaiduToolResultCache, PooledMCPTool
+from src.tools.prefetch import SpeculativePrefetcher
+from src.utils.places import KnownPlaces, extract_places
+from src.utils.singleflight import SingleFlight
+
+HOME = "北京海淀区上地十街10号"
+OFFICE = "北京朝阳区人寿保险大厦"
+LOCATIONS = f"我家的地址是:{HOME}，我的办公室在:{OFFICE}，我的爱好是出门赏花"
+
+
+class FakePool:
+    """模拟会话池，按工具名记录调用次数，每次调用等待 delay 秒"""
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = {}
+
+    async def call_tool_async(self, tool_use_id, name, arguments=None, read_timeout_seconds=None, cancel_signal=None):
+        self.calls[name] = self.calls.get(name, 0) + 1
+        await asyncio.sleep(self.delay)
+        return {"toolUseId": tool_use_id, "status": "success", "content": [{"text": f"{name} 第{self.calls[name]}次"}]}
+
+
+def make_tools(pool, names=("map_geocode", "map_directions", "map_road_traffic")):
+    cache = BaiduToolResultCache(ttls={"map_geocode": 3600, "map_directions": 60, "map_road_traffic": 0})
+    single_flight = SingleFlight()
+    return [
+        PooledMCPTool(SimpleNamespace(name=name, description=name, inputSchema={"type": "object"}), pool,
+                      single_flight=single_flight, result_cache=cache)
+        for name in names
+    ]
+
+
+def make_prefetcher(**kwargs):
+    known_places = KnownPlaces()
+    known_places.learn("user", LOCATIONS)
+    return SpeculativePrefetcher(known_places=known_places, **kwargs)
+
+
+async def call(tool, arguments, batch):
+    tool_use = {"toolUseId": "tooluse_1", "input": arguments}
+    events = [event async for event in tool.stream(tool_use, {SPECULATIVE_PREFETCH: batch})]
+    return events[-1].tool_result
+
+
+def test_extract_labeled_places():
+    """地址不包含"是、在、位于"等引导词，标签可以在地址之前或之后"""
+    assert extract_places(LOCATIONS) == [("家", HOME), ("公司", OFFICE)]
+    assert extract_places("用户的家庭住址是北京市海淀区上地十街10号") == [("家", "北京市海淀区上地十街10号")]
+    assert extract_places(f"用户在{OFFICE}上班") == [("公司", OFFICE)]
+    assert extract_places("到北京市东城区东长安街的路线") == [(None, "北京市东城区东长安街")]
+
+
+def test_plan_known_places_and_reference_to_previous_turn():
+    """家、公司映射为已知地址；"那里"指代上一轮提到的地址"""
+    prefetcher = make_prefetcher()
+    assert prefetcher.plan("user", "从我的住址导航到我的办公室") == [
+        ("map_directions", {"origin": HOME, "destination": OFFICE}),
+        ("map_geocode", {"address": HOME}),
+        ("map_geocode", {"address": OFFICE}),
+    ]
+    assert prefetcher.plan("user", "查询amazon最新的股价是多少") == []
+
+    history = [{"role": "user", "content": "去北京朝阳区国贸商城"}, {"role": "assistant", "content": "好的"}]
+    assert prefetcher.plan("someone", "那里有停车场吗？", history) == [("map_geocode", {"address": "北京朝阳区国贸商城"})]
+
+
+def test_prefetch_is_claimed_by_model_call():
+    """模型在预取进行中发起相同调用时等待预取结果，不重复访问上游；未被调用的预取计为浪费"""
+    pool = FakePool(delay=0.05)
+    tools = make_tools(pool)
+    prefetcher = make_prefetcher()
+
+    async def run():
+        batch = prefetcher.start("user", "从我的住址导航到我的办公室", [], tools)
+        await asyncio.sleep(0)
+        result = await call(tools[1], {"destination": OFFICE, "origin": HOME}, batch)
+        await call(tools[0], {"address": "北京西城区金融大街"}, batch)
+        await asyncio.gather(*batch.tasks)
+        prefetcher.finish(batch)
+        return result
+
+    result = asyncio.run(run())
+    assert result["content"][0]["text"] == "map_directions 第1次"
+    assert pool.calls == {"map_directions": 1, "map_geocode": 3}
+    stats = prefetcher.stats()
+    assert stats["started"] == 3 and stats["used"] == 1 and stats["wasted"] == 2
+    assert stats["hit_rate"] == 1 / 3 and stats["in_flight"] == 0
+
+
+def test_budget_cap_and_cached_results_are_not_prefetched():
+    """超过每请求和全局上限的预取不发起；已缓存的结果不重复预取"""
+    pool = FakePool()
+    tools = make_tools(pool)
+
+    async def run(prefetcher):
+        batch = prefetcher.start("user", "从我的住址导航到我的办公室", [], tools)
+        await asyncio.gather(*batch.tasks)
+        prefetcher.finish(batch)
+        return batch
+
+    capped = make_prefetcher(max_calls_per_request=3, max_in_flight=1)
+    assert len(asyncio.run(run(capped)).calls) == 1
+    assert capped.stats()["skipped_budget"] == 2
+
+    again = asyncio.run(run(make_prefetcher(max_calls_per_request=3)))
+    assert pool.calls == {"map_directions": 1, "map_geocode": 2}
+    assert len(again.calls) == 2 and again.wasted == 2
@@ -0,0 +1,98 @@
+"""
+测试提示词前缀缓存：检查发给 Bedrock Converse 接口的请求体
+请求在 botocore 发送前被拦截并返回固定响应，无需访问 AWS
+"""
+
+import asyncio
+import json
+
+from botocore.awsrequest import AWSResponse
+from strands import tool
+
+from src.agent.template import AgentTemplate, create_model
+from src.utils.metrics import ModelTokenUsage
+
+USAGE = {"inputTokens": 30, "outputTokens": 5, "totalTokens": 635, "cacheReadInputTokens": 600, "cacheWriteInputTokens": 0}
+
+
+@tool
+def tavily_search(query: str) -> str:
+    """网络搜索"""
+    return query
+
+
+@tool
+def map_weather(location: str) -> str:
+    """查询天气"""
+    return location
+
+
+@tool
+def map_directions(origin: str, destination: str) -> str:
+    """路线规划"""
+    return destination
+
+
+class _Raw:
+    def __init__(self, body: bytes):
+        self._body = body
+
+    def stream(self):
+        yield self._body
+
+
+def _model(monkeypatch, bodies):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "test")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "test")
+    model = create_model(streaming=False)
+
+    def respond(request, **kwargs):
+        bodies.append(json.loads(request.body))
+        response = {
+            "output": {"message": {"role": "assistant", "content": [{"text": "好的"}]}},
+            "stopReason": "end_turn",
+            "usage": USAGE,
+            "metrics": {"latencyMs": 1},
+        }
+        return AWSResponse(request.url, 200, {"Content-Type": "application/json"}, _Raw(json.dumps(response).encode()))
+
+    model.client.meta.events.register("before-send.bedrock-runtime.Converse", respond)
+    return model
+
+
+def _run(template, prompt, usage):
+    async def run():
+        agent = template.bind(None, callback_handler=None)
+        async for event in agent.stream_async(prompt):
+            if isinstance(event, dict) and "metadata" in event.get("event", {}):
+                usage.record(event["event"]["metadata"]["usage"])
+    asyncio.run(run())
+
+
+def test_tools_and_system_prompt_end_with_cache_points(monkeypatch):
+    """工具定义和系统提示词之后都有 cachePoint"""
+    bodies = []
+    _run(AgentTemplate([tavily_search, map_weather], model=_model(monkeypatch, bodies)), "会下雨吗？", ModelTokenUsage())
+
+    body = bodies[0]
+    assert [block.get("toolSpec", {}).get("name") for block in body["toolConfig"]["tools"][:-1]] == ["map_weather", "tavily_search"]
+    assert "cachePoint" in body["toolConfig"]["tools"][-1]
+    assert "text" in body["system"][0] and "cachePoint" in body["system"][-1]
+
+
+def test_prefix_is_byte_stable_across_requests_and_tool_order(monkeypatch):
+    """不同问题、不同工具目录顺序下，可缓存前缀（工具定义 + 系统提示词）逐字节一致"""
+    bodies = []
+    usage = ModelTokenUsage()
+    model = _model(monkeypatch, bodies)
+    _run(AgentTemplate([tavily_search, map_weather, map_directions], model=model), "从我家导航到公司", usage)
+    _run(AgentTemplate([map_directions, map_weather, tavily_search], model=model), "查询amazon最新的股价是多少", usage)
+
+    prefixes = {json.dumps([body["toolConfig"], body["system"]], ensure_ascii=False) for body in bodies}
+    assert len(bodies) == 2 and len(prefixes) == 1
+    assert bodies[0]["messages"] != bodies[1]["messages"]
+
+    stats = usage.stats()
+    assert stats["model_calls"] == 2
+    assert stats["cache_read_input_tokens"] == 1200
+    assert stats["cache_read_ratio"] == 1200 / (1200 + 60)
@@ -0,0 +1,87 @@
+"""
+测试进程内最近对话缓冲
+使用假的会话管理器，无需访问 AgentCore Memory
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+from src.utils.memory import RecentTurnsBuffer, get_conversation_context
+
+
+class FakeSessionManager:
+    """模拟 AgentCoreMemorySessionManager，记录 list_messages 调用次数
+
+    与真实实现一样，读取失败时返回空列表而不是抛出异常。
+    """
+    session_id = "session_a"
+
+    def __init__(self, messages=None, fail=False):
+        self.messages = messages or []
+        self.fail = fail
+        self.calls = 0
+
+    def list_messages(self, session_id, agent_id, limit=None, offset=0):
+        self.calls += 1
+        if self.fail:
+            return []
+        return [SimpleNamespace(message=message) for message in self.messages[-limit:]]
+
+
+KEY = ("car_001", "session_a")
+
+
+def _message(role, text):
+    return {"role": role, "content": [{"text": text}]}
+
+
+def test_remote_fetch_seeds_buffer_and_next_turn_hits_locally():
+    """第一次从 Memory 拉取并填充缓冲，之后直接读缓冲；工具调用消息不计入对话历史"""
+    session_manager = FakeSessionManager([
+        _message("user", "我家在海淀区上地十街10号"),
+        {"role": "assistant", "content": [{"toolUse": {"toolUseId": "t1", "name": "map_geocode", "input": {}}}]},
+        {"role": "user", "content": [{"toolResult": {"toolUseId": "t1", "content": []}}]},
+        _message("assistant", "好的，已记住"),
+    ])
+    buffer = RecentTurnsBuffer(max_turns=10, max_sessions=4)
+
+    first = asyncio.run(get_conversation_context(session_manager, 10, buffer, KEY))
+    buffer.record(KEY, [{"role": "user", "content": "从我家去公司"}, {"role": "assistant", "content": "推荐走北五环"}])
+    second = asyncio.run(get_conversation_context(session_manager, 10, buffer, KEY))
+
+    assert session_manager.calls == 1
+    assert first == [{"role": "user", "content": "我家在海淀区上地十街10号"}, {"role": "assistant", "content": "好的，已记住"}]
+    assert [turn["content"] for turn in second] == ["我家在海淀区上地十街10号", "好的，已记住", "从我家去公司", "推荐走北五环"]
+
+
+def test_first_completed_turn_seeds_buffer():
+    """新会话（或读取失败）时不填充缓冲；首轮完成后用本轮读到的历史和本轮对话填充，下一轮不再访问 Memory"""
+    session_manager = FakeSessionManager(fail=True)
+    buffer = RecentTurnsBuffer()
+
+    history = asyncio.run(get_conversation_context(session_manager, 10, buffer, KEY))
+    assert history == [] and buffer.get(KEY, 10) is None
+
+    buffer.record(KEY, [{"role": "user", "content": "前方路况怎么样？"}, {"role": "assistant", "content": "畅通"}], history=history)
+    second = asyncio.run(get_conversation_context(session_manager, 10, buffer, KEY))
+    assert session_manager.calls == 1
+    assert [turn["content"] for turn in second] == ["前方路况怎么样？", "畅通"]
+
+    # 未读取历史的请求（use_history=False）不填充缓冲
+    buffer.record(("car_001", "s2"), [{"role": "user", "content": "你好"}])
+    assert buffer.get(("car_001", "s2"), 10) is None
+
+
+def test_buffer_bounds_turns_and_sessions():
+    """每个会话只保留最近的对话，会话数超限时按 LRU 淘汰"""
+    buffer = RecentTurnsBuffer(max_turns=3, max_sessions=2)
+    buffer.seed(("car_001", "s1"), [])
+    buffer.seed(("car_001", "s2"), [])
+    for i in range(5):
+        buffer.append(("car_001", "s1"), "user", f"问题{i}")
+
+    assert [turn["content"] for turn in buffer.get(("car_001", "s1"), 10)] == ["问题2", "问题3", "问题4"]
+
+    buffer.seed(("car_001", "s3"), [])
+    assert buffer.get(("car_001", "s2"), 10) is None
+    assert buffer.stats()["evictions"] == 1
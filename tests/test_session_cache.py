@@ -0,0 +1,95 @@
+"""
+测试会话管理器 LRU 缓存
+使用假的会话管理器工厂，无需访问 AgentCore Memory
+"""
+
+import time
+
+from src.utils.memory import SessionManagerCache
+
+
+class FakeSessionManager:
+    """模拟 AgentCoreMemorySessionManager，记录是否被关闭"""
+    def __init__(self, actor_id, session_id):
+        self.key = (actor_id, session_id)
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def _make_cache(**kwargs):
+    created = []
+
+    def factory(actor_id, session_id):
+        created.append(FakeSessionManager(actor_id, session_id))
+        return created[-1]
+
+    return SessionManagerCache("memory-id", "us-west-2", factory=factory, **kwargs), created
+
+
+def test_same_session_reuses_session_manager():
+    """同一 (actor_id, session_id) 的多轮请求复用会话管理器"""
+    cache, created = _make_cache(max_size=4, idle_ttl=60)
+
+    for _ in range(3):
+        entry = cache.acquire("car_001", "session_a")
+        cache.release(entry)
+
+    stats = cache.stats()
+    assert len(created) == 1
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+
+
+def test_lru_eviction_closes_least_recently_used():
+    """超出容量时淘汰最久未使用的会话并关闭"""
+    cache, created = _make_cache(max_size=2, idle_ttl=60)
+
+    for session_id in ["s1", "s2", "s1", "s3"]:
+        cache.release(cache.acquire("car_001", session_id))
+
+    assert cache.stats()["evictions"] == 1
+    assert created[1].key == ("car_001", "s2")
+    assert created[1].closed
+    assert not created[0].closed
+
+
+def test_idle_sessions_expire():
+    """空闲超过 TTL 的会话被淘汰"""
+    cache, created = _make_cache(max_size=4, idle_ttl=0.01)
+
+    cache.release(cache.acquire("car_001", "s1"))
+    time.sleep(0.02)
+    cache.release(cache.acquire("car_002", "s2"))
+
+    assert cache.stats()["expirations"] == 1
+    assert created[0].closed
+
+
+def test_concurrent_use_of_same_session_bypasses_cache():
+    """条目正在使用时，并发请求拿到临时会话管理器，用完即关闭"""
+    cache, created = _make_cache(max_size=4, idle_ttl=60)
+
+    first = cache.acquire("car_001", "s1")
+    second = cache.acquire("car_001", "s1")
+    assert second is not first
+    assert not second.cached
+
+    cache.release(second)
+    cache.release(first)
+
+    assert created[1].closed
+    assert not created[0].closed
+    assert cache.stats()["busy_bypasses"] == 1
+
+
+def test_discarded_entry_is_rebuilt():
+    """请求失败时丢弃条目，下一轮重建会话管理器"""
+    cache, created = _make_cache(max_size=4, idle_ttl=60)
+
+    cache.release(cache.acquire("car_001", "s1"), discard=True)
+    entry = cache.acquire("car_001", "s1")
+
+    assert created[0].closed
+    assert entry.session_manager is created[1]
@@ -0,0 +1,87 @@
+"""
+测试会话滚动摘要
+"""
+
+import threading
+import time
+
+from src.utils.memory import build_context_aware_prompt
+from src.utils.summary import SessionSummaryStore, extractive_summarize
+
+KEY = ("car_001", "session_a")
+
+STOPS = ["海淀区上地十街10号", "北京首都国际机场", "国贸大厦停车场", "颐和园北宫门", "西单大悦城", "北京南站"]
+
+
+def _turns(i):
+    return [
+        {"role": "user", "content": f"好的，谢谢。下一站去{STOPS[i]}，下午{i + 1}点到。"},
+        {"role": "assistant", "content": f"好的。到{STOPS[i]}约{10 + i}公里，预计{20 + i}分钟。祝您一路顺风！"},
+    ]
+
+
+def test_old_turns_are_folded_into_summary():
+    """超出保留条数的早期对话折叠进摘要，摘要保留地点和时间"""
+    store = SessionSummaryStore(keep_turns=4, max_tokens=300, workers=1)
+    for i in range(len(STOPS)):
+        store.record(KEY, _turns(i))
+    assert store.drain(timeout=5)
+
+    snapshot = store.get(KEY)
+    assert [turn["content"] for turn in snapshot.turns] == [turn["content"] for i in (4, 5) for turn in _turns(i)]
+    assert snapshot.folded_turns == 8
+    assert STOPS[0] in snapshot.text and "下午1点" in snapshot.text
+    assert "谢谢" not in snapshot.text and "一路顺风" not in snapshot.text
+    assert store.stats()["folded_turns"] == 8
+
+
+def test_first_record_seeds_with_history():
+    """会话首次记录时用本轮之前的对话历史填充"""
+    store = SessionSummaryStore(keep_turns=4, workers=1)
+    assert store.get(KEY) is None
+
+    store.record(KEY, _turns(2), history=_turns(0) + _turns(1))
+    assert store.drain(timeout=5)
+
+    snapshot = store.get(KEY)
+    assert STOPS[0] in snapshot.text
+    assert len(snapshot.turns) == 4
+
+
+def test_get_never_waits_for_summarization():
+    """摘要生成期间读取立即返回，正在折叠的对话仍以原文出现"""
+    release = threading.Event()
+
+    def slow_summarizer(previous, turns, max_tokens):
+        release.wait(5)
+        return extractive_summarize(previous, turns, max_tokens)
+
+    store = SessionSummaryStore(slow_summarizer, keep_turns=2, workers=1)
+    store.record(KEY, _turns(0))
+    store.record(KEY, _turns(1))
+
+    start = time.perf_counter()
+    snapshot = store.get(KEY)
+    assert time.perf_counter() - start < 0.1
+    assert snapshot.text == "" and len(snapshot.turns) == 4
+    assert store.stats()["in_flight"] == 1
+
+    release.set()
+    assert store.drain(timeout=5)
+    snapshot = store.get(KEY)
+    assert STOPS[0] in snapshot.text and len(snapshot.turns) == 2
+
+
+def test_summary_is_bounded():
+    """摘要超过最大 token 数时丢弃最早的内容"""
+    summary = ""
+    for i in range(len(STOPS)):
+        summary = extractive_summarize(summary, _turns(i), 60)
+    assert STOPS[-1] in summary and STOPS[0] not in summary
+
+
+def test_prompt_injects_summary_before_recent_turns():
+    """摘要注入在对话历史之前"""
+    prompt = build_context_aware_prompt("那附近有停车场吗", _turns(1), summary="用户：下一站去海淀区上地十街10号")
+    assert prompt.startswith("\n\n[会话摘要]:\n用户：下一站去海淀区上地十街10号\n\n[对话历史]:\n1. user:")
+    assert prompt.endswith("\n[当前问题]:\n那附近有停车场吗")
@@ -0,0 +1,118 @@
+"""
+测试相同并发调用合并（single-flight）
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from src.tools.baidu_maps import PooledMCPTool
+from src.utils.singleflight import SingleFlight
+
+
+class SlowUpstream:
+    """模拟慢速上游，记录实际请求次数"""
+    def __init__(self, delay=0.05, error=None):
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+
+    async def fetch(self, value):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return {"value": value}
+
+
+def test_concurrent_identical_calls_share_one_request():
+    """相同 key 的并发调用只请求一次上游，不同 key 各自请求"""
+    flight = SingleFlight()
+    upstream = SlowUpstream()
+
+    async def run():
+        same = [flight.do("tavily", "前方路况", lambda: upstream.fetch("a")) for _ in range(10)]
+        other = flight.do("tavily", "北京天气", lambda: upstream.fetch("b"))
+        return await asyncio.gather(*same, other)
+
+    results = asyncio.run(run())
+
+    assert upstream.calls == 2
+    assert results[0] is results[9]
+    assert flight.stats()["tavily"]["coalesced"] == 9
+    assert flight.stats()["tavily"]["in_flight"] == 0
+
+
+def test_errors_are_shared_and_not_remembered():
+    """上游异常传递给所有等待者，完成后下一次调用重新请求"""
+    flight = SingleFlight()
+    upstream = SlowUpstream(error=RuntimeError("upstream down"))
+
+    async def run():
+        results = await asyncio.gather(
+            *(flight.do("baidu_maps", "k", lambda: upstream.fetch("a")) for _ in range(3)),
+            return_exceptions=True
+        )
+        upstream.error = None
+        return results, await flight.do("baidu_maps", "k", lambda: upstream.fetch("a"))
+
+    errors, recovered = asyncio.run(run())
+
+    assert all(isinstance(error, RuntimeError) for error in errors)
+    assert recovered == {"value": "a"}
+    assert upstream.calls == 2
+
+
+def test_cancelled_caller_does_not_cancel_waiters():
+    """发起者被取消时，其他等待者仍拿到结果"""
+    flight = SingleFlight()
+    upstream = SlowUpstream()
+
+    async def run():
+        leader = asyncio.ensure_future(flight.do("tavily", "k", lambda: upstream.fetch("a")))
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(flight.do("tavily", "k", lambda: upstream.fetch("a")))
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await waiter
+
+    assert asyncio.run(run()) == {"value": "a"}
+    assert upstream.calls == 1
+
+
+class FakePool:
+    """模拟会话池，记录 MCP 调用次数"""
+    def __init__(self):
+        self.calls = 0
+
+    async def call_tool_async(self, tool_use_id, name, arguments=None, read_timeout_seconds=None, cancel_signal=None):
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        return {"toolUseId": tool_use_id, "status": "success", "content": [{"text": "拥堵"}]}
+
+
+def test_pooled_mcp_tool_coalesces_identical_calls():
+    """参数相同（键顺序不同）的并发工具调用只发起一次 MCP 请求，结果带各自的 toolUseId"""
+    pool = FakePool()
+    mcp_tool = SimpleNamespace(name="map_road_traffic", description="路况查询", inputSchema={"type": "object"})
+    tool = PooledMCPTool(mcp_tool, pool, single_flight=SingleFlight())
+
+    async def call(tool_use_id, arguments):
+        events = [event async for event in tool.stream({"toolUseId": tool_use_id, "input": arguments}, {})]
+        return events[-1].tool_result
+
+    async def run():
+        return await asyncio.gather(
+            call("tooluse_1", {"road_name": "北五环", "city": "北京"}),
+            call("tooluse_2", {"city": "北京", "road_name": "北五环"})
+        )
+
+    first, second = asyncio.run(run())
+
+    assert pool.calls == 1
+    assert first["toolUseId"] == "tooluse_1"
+    assert second["toolUseId"] == "tooluse_2"
+    assert tool.single_flight.stats()["baidu_maps"]["coalesced"] == 1
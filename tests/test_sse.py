@@ -0,0 +1,68 @@
+"""
+测试增量 SSE 解析器
+"""
+
+import io
+import json
+
+from clients.sse import SSEDecoder, iter_sse_events, iter_sse_json
+
+STREAM = (
+    b'data: {"event": {"messageStart": {"role": "assistant"}}}\n\n'
+    b": keep-alive\n\n"
+    b"event: delta\nid: 7\nretry: 3000\ndata: first line\ndata: second line\n\n"
+    b'data: {"event": {"contentBlockDelta": {"delta": {"text": "\xe4\xbd\xa0\xe5\xa5\xbd"}}}}\n\n'
+)
+
+
+def _decode(chunks):
+    decoder = SSEDecoder()
+    events = []
+    for chunk in chunks:
+        events.extend(decoder.feed(chunk))
+    return [(event.event, event.id, event.retry, event.data) for event in events]
+
+
+def test_byte_by_byte_matches_whole_stream():
+    """任意切分（包括切断多字节 UTF-8 字符）的结果与整块解析一致"""
+    whole = _decode([STREAM])
+    assert _decode([STREAM[i:i + 1] for i in range(len(STREAM))]) == whole
+    assert _decode([STREAM[i:i + 7] for i in range(0, len(STREAM), 7)]) == whole
+    assert len(whole) == 3
+
+
+def test_fields_and_multiline_data():
+    """多行 data 以换行连接；event / id / retry 生效，注释行被忽略"""
+    events = list(iter_sse_events(STREAM))
+
+    assert events[0].event == "message" and events[0].id is None
+    assert events[1].event == "delta"
+    assert events[1].data == "first line\nsecond line"
+    assert events[1].id == "7" and events[1].retry == 3000
+    # id 和 retry 对后续事件保持有效
+    assert events[2].id == "7"
+    assert events[2].json()["event"]["contentBlockDelta"]["delta"]["text"] == "你好"
+
+
+def test_crlf_and_cr_line_endings():
+    """CRLF（包括跨块切开的 CRLF）和单独 CR 都视为换行，UTF-8 BOM 被去掉"""
+    crlf = b"\xef\xbb\xbf" + STREAM.replace(b"\n", b"\r\n")
+    split_at = crlf.index(b"\r\n") + 1
+    assert _decode([crlf[:split_at], crlf[split_at:]]) == _decode([STREAM])
+    assert _decode([STREAM.replace(b"\n", b"\r")]) == _decode([STREAM])
+
+
+def test_incomplete_event_is_held_back():
+    """没有结束空行的事件不会提前返回，流结束时被丢弃"""
+    decoder = SSEDecoder()
+    assert decoder.feed(b'data: {"a": 1}\n') == []
+    assert [event.data for event in decoder.feed(b'\ndata: {"b"')] == ['{"a": 1}']
+    assert list(iter_sse_json(b'data: {"a": 1}\n\ndata: {"b": 2}')) == [{"a": 1}]
+
+
+def test_iter_sse_json_reads_file_like_and_skips_non_json():
+    """从 read1 / read 读取大块，跳过非 JSON 事件"""
+    body = io.BytesIO(STREAM + b"data: [DONE]\n\n")
+    payloads = list(iter_sse_json(body, chunk_size=16))
+    assert [list(payload["event"]) for payload in payloads] == [["messageStart"], ["contentBlockDelta"]]
+    assert payloads == [json.loads(line[6:]) for line in STREAM.split(b"\n") if line.startswith(b"data: {")]
@@ -0,0 +1,116 @@
+"""
+测试流式输出文本增量合并
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from src.utils.streaming import coalesce_text_deltas
+
+
+def text_event(text, index=0):
+    return {"event": {"contentBlockDelta": {"delta": {"text": text}, "contentBlockIndex": index}}}
+
+
+async def source(items):
+    """按顺序产生事件，数字表示暂停的秒数，异常实例表示抛出"""
+    for item in items:
+        if isinstance(item, (int, float)):
+            await asyncio.sleep(item)
+        elif isinstance(item, Exception):
+            raise item
+        else:
+            yield item
+
+
+def collect(items, **kwargs):
+    async def run():
+        frames = []
+        async for frame in coalesce_text_deltas(source(items), **kwargs):
+            frames.append((time.perf_counter(), frame))
+        return frames
+    return asyncio.run(run())
+
+
+def texts(frames):
+    return [frame["event"]["contentBlockDelta"]["delta"]["text"] for _, frame in frames if "event" in frame]
+
+
+def test_first_token_is_immediate_and_rest_is_merged_by_bytes():
+    """首个增量单独输出，之后按字节数合并"""
+    frames = collect([text_event("前方"), *[text_event("路况") for _ in range(6)]], window_ms=1000, max_bytes=12)
+
+    assert texts(frames) == ["前方", "路况路况", "路况路况", "路况路况"]
+
+
+def test_buffer_is_flushed_by_time_while_upstream_is_idle():
+    """上游暂停时，缓冲的文本在时间窗口到期后输出，不等待下一个事件"""
+    started = time.perf_counter()
+    frames = collect([text_event("从"), text_event("我家"), text_event("去公司"), 0.3, text_event("走北五环")], window_ms=20)
+
+    assert texts(frames) == ["从", "我家去公司", "走北五环"]
+    assert frames[1][0] - started < 0.15
+
+
+def test_other_events_flush_buffer_and_keep_order():
+    """工具调用等模型事件之前先输出缓冲的文本，回调事件直接透传"""
+    tool_use = {"event": {"contentBlockStart": {"start": {"toolUse": {"name": "map_geocode"}}}}}
+    callback = {"data": "好", "delta": {"text": "好"}}
+    frames = collect([text_event("好"), text_event("的，"), callback, text_event("我查一下"), tool_use], window_ms=1000)
+
+    assert [frame for _, frame in frames] == [
+        text_event("好"),
+        callback,
+        text_event("的，我查一下"),
+        tool_use
+    ]
+
+
+def test_block_index_change_flushes():
+    """不同内容块的文本不合并"""
+    frames = collect([text_event("a", 0), text_event("b", 0), text_event("c", 1)], window_ms=1000)
+
+    assert texts(frames) == ["a", "b", "c"]
+
+
+def test_upstream_error_propagates_after_flush():
+    """上游异常在输出缓冲文本后抛出"""
+    async def run():
+        frames = []
+        with pytest.raises(RuntimeError):
+            async for frame in coalesce_text_deltas(source([text_event("a"), text_event("b"), RuntimeError("boom")]), window_ms=1000):
+                frames.append(frame)
+        return frames
+
+    assert [frame["event"]["contentBlockDelta"]["delta"]["text"] for frame in asyncio.run(run())] == ["a", "b"]
+
+
+def test_disabled_window_passes_through():
+    """时间窗口为 0 时不合并"""
+    frames = collect([text_event("a"), text_event("b"), text_event("c")], window_ms=0)
+
+    assert texts(frames) == ["a", "b", "c"]
+
+
+def test_slow_consumer_applies_backpressure_to_upstream():
+    """下游暂停消费时，上游最多只被多读 queue_size 个事件"""
+    produced = []
+
+    async def upstream():
+        for i in range(100):
+            produced.append(i)
+            yield text_event(str(i))
+
+    async def run():
+        stream = coalesce_text_deltas(upstream(), window_ms=1000, max_bytes=1, queue_size=4)
+        await stream.__anext__()
+        await asyncio.sleep(0.05)
+        read_while_paused = len(produced)
+        rest = [frame async for frame in stream]
+        return read_while_paused, rest
+
+    read_while_paused, rest = asyncio.run(run())
+    assert read_while_paused <= 1 + 4 + 1
+    assert len(rest) == 99
@@ -0,0 +1,148 @@
+"""
+测试 Tavily 搜索结果缓存
+使用假的 Tavily 客户端，无需访问 Tavily API
+"""
+
+import asyncio
+import time
+
+import httpx
+
+from src.tools.tavily_search import TavilyClient, TavilySearchCache
+from src.utils.cache import FRESH, MISS, STALE, TTLCache
+from src.utils.singleflight import SingleFlight
+
+
+class FakeTavilyClient(TavilyClient):
+    """模拟 Tavily 客户端，记录每次搜索的查询"""
+    def __init__(self, delay=0.0):
+        super().__init__(api_url="http://tavily.test/search", api_key="test")
+        self.delay = delay
+        self.queries = []
+        self.fail = False
+
+    async def search(self, query, max_results=5):
+        self.queries.append(query)
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise httpx.ConnectError("refused")
+        return {"answer": f"第{len(self.queries)}次", "results": []}
+
+
+def test_repeated_queries_hit_cache_after_normalization():
+    """大小写和空白不同的相同查询命中同一缓存条目，并统计节省的延迟"""
+    client = FakeTavilyClient(delay=0.02)
+    cache = TavilySearchCache(client=client)
+
+    async def run():
+        first = await cache.search("查询amazon最新的股价")
+        first["toolUseId"] = "tooluse_1"
+        second = await cache.search("  查询Amazon最新的股价 ")
+        return second
+
+    second = asyncio.run(run())
+    stats = cache.stats()
+
+    assert len(client.queries) == 1
+    assert "toolUseId" not in second
+    assert stats["hits"] == 1 and stats["hit_ratio"] == 0.5
+    assert stats["saved_ms"] >= 20
+
+
+def test_max_results_is_part_of_key():
+    """max_results 不同的查询分别缓存"""
+    client = FakeTavilyClient()
+    cache = TavilySearchCache(client=client)
+
+    async def run():
+        await cache.search("北京天气", 5)
+        await cache.search("北京天气", 3)
+
+    asyncio.run(run())
+    assert len(client.queries) == 2
+
+
+def test_concurrent_misses_are_coalesced():
+    """缓存未命中的相同查询并发到达时只请求一次 Tavily"""
+    client = FakeTavilyClient(delay=0.05)
+    cache = TavilySearchCache(client=client, single_flight=SingleFlight())
+
+    async def run():
+        return await asyncio.gather(*(cache.search("查询amazon最新的股价") for _ in range(20)))
+
+    results = asyncio.run(run())
+
+    assert len(client.queries) == 1
+    assert len({id(result) for result in results}) == 20
+    assert cache.single_flight.stats()["tavily"]["coalesced"] == 19
+
+
+def test_stale_result_is_served_while_revalidating():
+    """过期后先返回旧结果，后台刷新完成后返回新结果"""
+    client = FakeTavilyClient(delay=0.05)
+    cache = TavilySearchCache(ttl=0.2, stale_ttl=60, client=client)
+
+    async def run():
+        await cache.search("北京天气")
+        await asyncio.sleep(0.21)
+        start = time.perf_counter()
+        stale = await cache.search("北京天气")
+        stale_ms = (time.perf_counter() - start) * 1000
+        await cache.search("北京天气")
+        await asyncio.sleep(0.1)
+        fresh = await cache.search("北京天气")
+        return stale, stale_ms, fresh
+
+    stale, stale_ms, fresh = asyncio.run(run())
+
+    assert stale["content"][1]["json"]["answer"] == "第1次"
+    assert stale_ms < 20
+    assert fresh["content"][1]["json"]["answer"] == "第2次"
+    assert len(client.queries) == 2
+    assert cache.stats()["revalidations"] == 1
+
+
+def test_errors_are_cached_briefly():
+    """失败结果在 negative_ttl 内直接返回，过期后重新请求"""
+    client = FakeTavilyClient()
+    client.fail = True
+    cache = TavilySearchCache(negative_ttl=0.05, client=client)
+
+    async def run():
+        first = await cache.search("前方路况")
+        await cache.search("前方路况")
+        await asyncio.sleep(0.06)
+        client.fail = False
+        return first, await cache.search("前方路况")
+
+    first, recovered = asyncio.run(run())
+
+    assert first["status"] == "error"
+    assert recovered["status"] == "success"
+    assert len(client.queries) == 2
+    assert cache.stats()["negative_hits"] == 1
+
+
+def test_ttl_cache_evicts_by_bytes_in_lru_order():
+    """超过字节上限时淘汰最久未使用的条目"""
+    cache = TTLCache(ttl=60, max_bytes=30, sizeof=lambda value: 10)
+    for key in ("a", "b", "c"):
+        cache.put(key, key)
+    assert cache.lookup("a")[0] == FRESH
+
+    cache.put("d", "d")
+
+    assert cache.lookup("b") == (MISS, None)
+    assert cache.lookup("a")[0] == FRESH
+    assert cache.stats()["evictions"] == 1 and cache.stats()["bytes"] == 30
+
+
+def test_ttl_cache_states():
+    """新鲜、过期可用、完全过期三种状态"""
+    cache = TTLCache(ttl=0.02, max_bytes=1024, stale_ttl=0.05)
+    cache.put("k", "v")
+    assert cache.lookup("k") == (FRESH, "v")
+    time.sleep(0.03)
+    assert cache.lookup("k") == (STALE, "v")
+    time.sleep(0.05)
+    assert cache.lookup("k") == (MISS, None)
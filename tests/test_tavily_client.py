@@ -0,0 +1,64 @@
+"""
+测试 Tavily 异步客户端
+替换 TavilyClient.search，无需访问 Tavily API
+"""
+
+import asyncio
+
+import httpx
+
+from src.tools import tavily_search as tavily_module
+from src.tools.tavily_search import TavilyClient, TavilySearchCache, search_tavily, tavily_search_sync
+
+
+class FakeTavilyClient(TavilyClient):
+    """模拟 Tavily 客户端，按需返回结果或抛出异常"""
+    def __init__(self, error=None):
+        super().__init__(api_url="http://tavily.test/search", api_key="test")
+        self.error = error
+        self.calls = 0
+
+    async def search(self, query, max_results=5):
+        self.calls += 1
+        if self.error:
+            raise self.error
+        return {"answer": "晴", "results": [{"title": "北京天气", "url": "https://example.com", "content": "晴转多云"}]}
+
+
+def test_search_success_and_error_mapping():
+    """成功结果格式化为文本 + JSON，超时和请求失败映射为中文错误"""
+    result = asyncio.run(search_tavily("北京天气", client=FakeTavilyClient()))
+    assert result["status"] == "success"
+    assert "答案摘要:\n晴" in result["content"][0]["text"]
+
+    timeout = asyncio.run(search_tavily("北京天气", client=FakeTavilyClient(httpx.ReadTimeout("timeout"))))
+    assert timeout["content"][0]["text"] == "搜索请求超时，请稍后重试"
+
+    failed = asyncio.run(search_tavily("北京天气", client=FakeTavilyClient(httpx.ConnectError("refused"))))
+    assert failed["content"][0]["text"].startswith("搜索请求失败")
+
+
+def test_pool_is_shared_per_loop_and_split_into_shards():
+    """同一事件循环内复用连接池，连接数上限平均分配到各分片"""
+    client = TavilyClient(api_key="test", max_connections=64, max_keepalive_connections=32, shards=8)
+
+    async def get_states():
+        first, second = client._get_state(), client._get_state()
+        await client.aclose()
+        return first, second
+
+    first, second = asyncio.run(get_states())
+    assert first is second
+    assert len(first.clients) == 8
+    assert client.limits.max_connections == 8
+    assert client.limits.max_keepalive_connections == 4
+
+
+def test_sync_shim(monkeypatch):
+    """同步版本在后台事件循环中执行，复用同一个客户端"""
+    fake = FakeTavilyClient()
+    monkeypatch.setattr(tavily_module, "_search_cache", TavilySearchCache(client=fake))
+
+    assert tavily_search_sync("北京天气")["status"] == "success"
+    assert tavily_search_sync("上海天气")["status"] == "success"
+    assert fake.calls == 2
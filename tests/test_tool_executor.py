@@ -0,0 +1,105 @@
+"""
+测试同一轮多个工具调用的并发执行
+使用假的会话池，无需访问 mcp.map.baidu.com
+"""
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+from strands import Agent
+from strands.models.model import Model
+
+from src.agent.tool_executor import BoundedToolExecutor
+from src.tools.baidu_maps import BaiduToolResultCache, PooledMCPTool
+from src.utils.singleflight import SingleFlight
+
+
+class SlowPool:
+    """模拟会话池：参数中的 delay 决定调用耗时，记录同时进行的最大调用数"""
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def call_tool_async(self, tool_use_id, name, arguments=None, read_timeout_seconds=None, cancel_signal=None):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(arguments["delay"])
+        self.in_flight -= 1
+        return {"toolUseId": tool_use_id, "status": "success", "content": [{"text": f"{arguments['delay']}"}]}
+
+
+class FanOutModel(Model):
+    """第一次调用请求 calls 中的全部工具调用，之后记录工具结果的顺序并结束"""
+
+    def __init__(self, calls):
+        self.calls = calls
+        self.result_order = None
+
+    def update_config(self, **model_config):
+        pass
+
+    def get_config(self):
+        return {}
+
+    async def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        yield {}
+
+    async def stream(self, messages, tool_specs=None, system_prompt=None, **kwargs):
+        last = messages[-1]["content"]
+        yield {"messageStart": {"role": "assistant"}}
+        if any("toolResult" in block for block in last):
+            self.result_order = [block["toolResult"]["toolUseId"] for block in last]
+            yield {"contentBlockStart": {"start": {}}}
+            yield {"contentBlockDelta": {"delta": {"text": "好的"}}}
+            yield {"contentBlockStop": {}}
+            yield {"messageStop": {"stopReason": "end_turn"}}
+            return
+        for index, (name, arguments) in enumerate(self.calls):
+            yield {"contentBlockStart": {"start": {"toolUse": {"toolUseId": f"tooluse_{index}", "name": name}}, "contentBlockIndex": index}}
+            yield {"contentBlockDelta": {"delta": {"toolUse": {"input": json.dumps(arguments)}}, "contentBlockIndex": index}}
+            yield {"contentBlockStop": {"contentBlockIndex": index}}
+        yield {"messageStop": {"stopReason": "tool_use"}}
+
+
+def make_tool(name, pool):
+    schema = {"type": "object", "properties": {"delay": {"type": "number"}}}
+    mcp_tool = SimpleNamespace(name=name, title=None, description=name, inputSchema=schema, input_schema=schema,
+                               outputSchema=None, output_schema=None, annotations=None)
+    return PooledMCPTool(mcp_tool, pool, single_flight=SingleFlight(), result_cache=BaiduToolResultCache(ttls={}))
+
+
+def test_calls_run_concurrently_within_backend_limit_and_keep_order():
+    """同一轮的百度地图调用最多同时进行 limit 个，工具结果按请求顺序返回"""
+    pool = SlowPool()
+    delays = [0.08, 0.06, 0.04, 0.02, 0.01, 0.03]
+    model = FanOutModel([("map_directions", {"delay": delay}) for delay in delays])
+    executor = BoundedToolExecutor(limits={"baidu_maps": 3})
+    agent = Agent(model=model, tools=[make_tool("map_directions", pool)], tool_executor=executor, callback_handler=None)
+
+    async def run():
+        return [event async for event in agent.stream_async("帮我规划一个最优路线")]
+
+    events = asyncio.run(run())
+    assert pool.max_in_flight == 3
+    # 工具结果只作为 ToolResultEvent 交给执行器，不会作为工具流事件重复出现在 Agent 的事件流中
+    assert not any("tool_stream_event" in event for event in events)
+    assert model.result_order == [f"tooluse_{index}" for index in range(len(delays))]
+    stats = executor.stats()["baidu_maps"]
+    assert stats["calls"] == 6 and stats["queued"] == 3 and stats["limit"] == 3
+
+
+def test_unlimited_backend_runs_all_calls_at_once():
+    """上限为 0 的后端不限制并发"""
+    pool = SlowPool()
+    model = FanOutModel([("map_search_places", {"delay": 0.02 + index / 1000}) for index in range(5)])
+    executor = BoundedToolExecutor(limits={"baidu_maps": 0})
+    agent = Agent(model=model, tools=[make_tool("map_search_places", pool)], tool_executor=executor, callback_handler=None)
+
+    async def run():
+        async for _ in agent.stream_async("沿途有哪些加油站和餐厅？"):
+            pass
+
+    asyncio.run(run())
+    assert pool.max_in_flight == 5
+    assert executor.stats() == {}
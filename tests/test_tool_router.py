@@ -0,0 +1,102 @@
+"""
+测试工具子集路由
+"""
+
+import asyncio
+
+from strands import Agent, tool
+from strands.models.model import Model
+
+from src.agent.tool_router import TOOL_SELECTION, ToolRouter, ToolRoutingModel
+
+TOOL_NAMES = [
+    "tavily_search", "map_geocode", "map_reverse_geocode", "map_search_places", "map_place_details",
+    "map_directions", "map_directions_matrix", "map_road_traffic", "map_weather", "map_ip_location", "map_new_tool",
+]
+
+
+def test_stock_price_only_needs_search():
+    """股价查询只提供搜索工具"""
+    selection = ToolRouter().route("查询amazon最新的股价是多少", tool_names=TOOL_NAMES)
+    assert selection.routes == ["search"]
+    assert selection.names == {"tavily_search", "map_new_tool"}
+
+
+def test_nearby_and_navigation_routes():
+    """附近的地点提供地点检索工具，导航提供路线工具；分组之外的工具始终提供"""
+    router = ToolRouter()
+    places = router.route("附近有充电桩吗？", tool_names=TOOL_NAMES)
+    assert "map_search_places" in places.names and "map_directions" not in places.names
+
+    navigation = router.route("从我的住址导航到我的办公室", tool_names=TOOL_NAMES)
+    assert {"map_directions", "map_geocode", "map_new_tool"} <= navigation.names
+    assert "tavily_search" not in navigation.names
+
+
+def test_follow_up_uses_previous_question():
+    """追问结合上一轮问题；无法判断时回退到全部工具"""
+    router = ToolRouter()
+    history = [
+        {"role": "user", "content": "我从我家去三里屯太古里购物"},
+        {"role": "assistant", "content": "好的，已为您规划路线。"},
+    ]
+    selection = router.route("那里有停车场吗？", history, TOOL_NAMES)
+    assert selection.routes == ["places", "navigation"]
+
+    assert router.route("你好", [], TOOL_NAMES).fallback
+    assert router.route("你好", [], TOOL_NAMES).names is None
+
+
+class RecordingModel(Model):
+    """记录每次调用收到的工具名，直接结束对话"""
+
+    def __init__(self):
+        self.tool_names = []
+
+    def update_config(self, **model_config):
+        pass
+
+    def get_config(self):
+        return {}
+
+    async def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        yield {}
+
+    async def stream(self, messages, tool_specs=None, system_prompt=None, **kwargs):
+        self.tool_names.append(sorted(spec["name"] for spec in tool_specs or []))
+        yield {"messageStart": {"role": "assistant"}}
+        yield {"contentBlockStart": {"start": {}}}
+        yield {"contentBlockDelta": {"delta": {"text": "好的"}}}
+        yield {"contentBlockStop": {}}
+        yield {"messageStop": {"stopReason": "end_turn"}}
+
+
+@tool
+def tavily_search(query: str) -> str:
+    """搜索"""
+    return query
+
+
+@tool
+def map_weather(location: str) -> str:
+    """天气"""
+    return location
+
+
+def test_routing_model_filters_tool_specs_and_counts_tokens():
+    """Agent 的工具注册表不变，只有发给模型的工具规格被过滤"""
+    model = RecordingModel()
+    agent = Agent(model=ToolRoutingModel(model), tools=[tavily_search, map_weather], callback_handler=None)
+    selection = ToolRouter().route("会下雨吗？", tool_names=["tavily_search", "map_weather"])
+
+    async def run():
+        async for _ in agent.stream_async("会下雨吗？", invocation_state={TOOL_SELECTION: selection}):
+            pass
+        async for _ in agent.stream_async("会下雨吗？"):
+            pass
+
+    asyncio.run(run())
+    assert model.tool_names == [["map_weather"], ["map_weather", "tavily_search"]]
+    assert selection.model_calls == 1
+    assert 0 < selection.tokens_sent < selection.tokens_full
+    assert selection.tokens_saved == selection.tokens_full - selection.tokens_sent
@@ -0,0 +1,119 @@
+"""
+测试请求链路追踪
+使用内存 span 导出器和假的 MCP 客户端 / Tavily 客户端，无需外部服务
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from opentelemetry import trace
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+from src.tools.baidu_maps import BaiduMCPSessionPool, BaiduToolResultCache, PooledMCPTool
+from src.tools.tavily_search import TavilyClient, TavilySearchCache, _LoopState
+from src.utils.memory import get_conversation_context
+from src.utils.singleflight import SingleFlight
+from src.utils.timing import StageTimer
+from src.utils.tracing import extract_trace_context, start_span
+
+TRACE_ID = "0af7651916cd43dd8448eb211c80319c"
+PARENT_SPAN_ID = "b7ad6b7169203331"
+
+_exporter = InMemorySpanExporter()
+
+
+@pytest.fixture
+def spans():
+    """把 span 导出到内存，返回已结束的 span 列表的读取函数"""
+    provider = trace.get_tracer_provider()
+    if not isinstance(provider, TracerProvider):
+        provider = TracerProvider()
+        trace.set_tracer_provider(provider)
+    if not getattr(provider, "_test_exporter_added", False):
+        provider.add_span_processor(SimpleSpanProcessor(_exporter))
+        provider._test_exporter_added = True
+    _exporter.clear()
+    yield lambda: {span.name: span for span in _exporter.get_finished_spans()}
+    _exporter.clear()
+
+
+class FakeMCPClient:
+    """模拟已连接的 MCPClient"""
+    def start(self):
+        return self
+
+    def stop(self, exc_type, exc_val, exc_tb):
+        pass
+
+    async def call_tool_async(self, tool_use_id, name, arguments=None, read_timeout_seconds=None, cancel_signal=None):
+        return {"toolUseId": tool_use_id, "status": "success", "content": [{"text": name}]}
+
+
+class FakeTavilyClient(TavilyClient):
+    """模拟 Tavily 客户端：请求由 httpx.MockTransport 应答"""
+    def _get_state(self):
+        transport = httpx.MockTransport(lambda request: httpx.Response(200, json={"answer": "晴", "results": []}))
+        return _LoopState([httpx.AsyncClient(transport=transport)])
+
+
+class FakeSessionManager:
+    """模拟 Memory 会话管理器"""
+    session_id = "s1"
+
+    def list_messages(self, session_id, agent_id, limit=None, offset=0):
+        return [
+            SimpleNamespace(message={"role": "user", "content": [{"text": "你好"}]}),
+            SimpleNamespace(message={"role": "assistant", "content": [{"text": "你好！"}]}),
+        ]
+
+
+def test_invoke_span_continues_incoming_traceparent(spans):
+    """根 span 延续请求头中的 traceparent"""
+    context = SimpleNamespace(request_headers={"Traceparent": f"00-{TRACE_ID}-{PARENT_SPAN_ID}-01"})
+
+    with start_span("invoke", parent=extract_trace_context(context)):
+        pass
+
+    span = spans()["invoke"]
+    assert format(span.context.trace_id, "032x") == TRACE_ID
+    assert format(span.parent.span_id, "016x") == PARENT_SPAN_ID
+
+
+def test_tool_and_memory_spans_nest_under_invoke(spans):
+    """记忆读取、MCP 工具和 Tavily 搜索的 span 都挂在同一个请求 span 下"""
+    pool = BaiduMCPSessionPool(FakeMCPClient, size=1, health_check_interval=0).start()
+    mcp_tool = SimpleNamespace(name="map_geocode", description="map_geocode", inputSchema={"type": "object"})
+    tool = PooledMCPTool(mcp_tool, pool, single_flight=SingleFlight(), result_cache=BaiduToolResultCache(ttls={}))
+    tavily = TavilySearchCache(client=FakeTavilyClient(api_url="http://tavily.test/search", api_key="test"))
+    timer = StageTimer()
+
+    async def run():
+        with start_span("invoke"):
+            await timer.measure("history", get_conversation_context(FakeSessionManager()))
+            async for _ in tool.stream({"toolUseId": "tooluse_1", "input": {"address": "北京"}}, {}):
+                pass
+            await tavily.search("北京天气")
+
+    asyncio.run(run())
+    pool.close()
+    finished = spans()
+
+    root = finished["invoke"]
+    assert finished["stage.history"].parent.span_id == root.context.span_id
+    assert finished["memory.get_conversation_context"].parent.span_id == finished["stage.history"].context.span_id
+    assert finished["memory.get_conversation_context"].attributes["memory.turns"] == 2
+
+    tool_span = finished["baidu_maps.map_geocode"]
+    assert tool_span.parent.span_id == root.context.span_id
+    assert tool_span.attributes["tool.arguments_size"] > 0
+    assert tool_span.attributes["tool.source"] == "miss"
+    assert finished["mcp.call_tool"].parent.span_id == tool_span.context.span_id
+
+    assert finished["tavily_search"].parent.span_id == root.context.span_id
+    assert finished["tavily.request"].parent.span_id == finished["tavily_search"].context.span_id
+    assert finished["tavily.request"].attributes["http.status_code"] == 200
+    assert {span.context.trace_id for span in finished.values()} == {root.context.trace_id}